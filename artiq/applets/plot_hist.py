@@ -1,33 +1,42 @@
 #!/usr/bin/env python3
 
+import numpy as np
 import PyQt5  # make sure pyqtgraph imports Qt5
 import pyqtgraph
 
-from artiq.applets.simple import TitleApplet
+from artiq.applets.simple import TitleApplet, DatasetArray
 
 
 class HistogramPlot(pyqtgraph.PlotWidget):
     def __init__(self, args):
         pyqtgraph.PlotWidget.__init__(self)
         self.args = args
+        self.x = DatasetArray(args.x)
+        self.y = DatasetArray(args.y)
+        self.histogram = None
 
     def data_changed(self, data, mods, title):
-        try:
-            y = data[self.args.y][1]
-            if self.args.x is None:
-                x = None
-            else:
-                x = data[self.args.x][1]
-        except KeyError:
+        x_changed = self.x.update(data, mods)
+        y_changed = self.y.update(data, mods)
+        self.setTitle(title)
+        if not (x_changed or y_changed):
+            return
+        y = self.y.value
+        if y is None or y.ndim != 1:
             return
-        if x is None:
-            x = list(range(len(y)+1))
+        if self.args.x is None:
+            x = np.arange(len(y)+1)
+        else:
+            x = self.x.value
+            if x is None:
+                return
 
         if len(y) and len(x) == len(y) + 1:
-            self.clear()
-            self.plot(x, y, stepMode=True, fillLevel=0,
-                      brush=(0, 0, 255, 150))
-            self.setTitle(title)
+            if self.histogram is None:
+                self.histogram = self.plot(x, y, stepMode=True, fillLevel=0,
+                                           brush=(0, 0, 255, 150))
+            else:
+                self.histogram.setData(x, y, stepMode=True)
 
 
 def main():
@@ -4,28 +4,38 @@ import numpy as np
 import PyQt5  # make sure pyqtgraph imports Qt5
 import pyqtgraph
 
-from artiq.applets.simple import TitleApplet
+from artiq.applets.simple import TitleApplet, DatasetArray
 
 
 class XYPlot(pyqtgraph.PlotWidget):
     def __init__(self, args):
         pyqtgraph.PlotWidget.__init__(self)
         self.args = args
+        self.arrays = {name: DatasetArray(getattr(args, name))
+                       for name in ("x", "y", "error", "fit")}
+        self.points = None
+        self.errbars = None
+        self.fit_curve = None
 
     def data_changed(self, data, mods, title):
-        try:
-            y = data[self.args.y][1]
-        except KeyError:
+        changed = {name: array.update(data, mods)
+                   for name, array in self.arrays.items()}
+        self.setTitle(title)
+        if not any(changed.values()):
+            return
+
+        y = self.arrays["y"].value
+        if y is None or y.ndim != 1:
             return
-        x = data.get(self.args.x, (False, None))[1]
+        x = self.arrays["x"].value
         if x is None:
             x = np.arange(len(y))
-        error = data.get(self.args.error, (False, None))[1]
-        fit = data.get(self.args.fit, (False, None))[1]
+        error = self.arrays["error"].value
+        fit = self.arrays["fit"].value
 
         if not len(y) or len(y) != len(x):
             return
-        if error is not None and hasattr(error, "__len__"):
+        if error is not None and error.ndim:
             if not len(error):
                 error = None
             elif len(error) != len(y):
@@ -36,19 +46,32 @@ class XYPlot(pyqtgraph.PlotWidget):
             elif len(fit) != len(y):
                 return
 
-        self.clear()
-        self.plot(x, y, pen=None, symbol="x")
-        self.setTitle(title)
+        # Update the existing plot items instead of recreating them.
+        if self.points is None:
+            self.points = self.plot(x, y, pen=None, symbol="x")
+        else:
+            self.points.setData(x, y)
+
         if error is not None:
-            # See https://github.com/pyqtgraph/pyqtgraph/issues/211
-            if hasattr(error, "__len__") and not isinstance(error, np.ndarray):
-                error = np.array(error)
-            errbars = pyqtgraph.ErrorBarItem(
-                x=np.array(x), y=np.array(y), height=error)
-            self.addItem(errbars)
+            if self.errbars is None:
+                self.errbars = pyqtgraph.ErrorBarItem(x=x, y=y, height=error)
+                self.addItem(self.errbars)
+            else:
+                self.errbars.setData(x=x, y=y, height=error)
+        elif self.errbars is not None:
+            self.removeItem(self.errbars)
+            self.errbars = None
+
         if fit is not None:
-            xi = np.argsort(x)
-            self.plot(x[xi], fit[xi])
+            if changed["x"] or changed["fit"] or self.fit_curve is None:
+                xi = np.argsort(x)
+                if self.fit_curve is None:
+                    self.fit_curve = self.plot(x[xi], fit[xi])
+                else:
+                    self.fit_curve.setData(x[xi], fit[xi])
+        elif self.fit_curve is not None:
+            self.removeItem(self.fit_curve)
+            self.fit_curve = None
 
 
 def main():
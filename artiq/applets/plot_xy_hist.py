@@ -8,14 +8,10 @@ from artiq.applets.simple import SimpleApplet
 
 
 def _compute_ys(histogram_bins, histograms_counts):
-        bin_centers = np.empty(len(histogram_bins)-1)
-        for i in range(len(bin_centers)):
-            bin_centers[i] = (histogram_bins[i] + histogram_bins[i+1])/2
-
-        ys = np.empty(histograms_counts.shape[0])
-        for n, counts in enumerate(histograms_counts):
-            ys[n] = sum(bin_centers*counts)/sum(counts)
-        return ys
+    histogram_bins = np.asarray(histogram_bins)
+    histograms_counts = np.asarray(histograms_counts)
+    bin_centers = (histogram_bins[:-1] + histogram_bins[1:])/2
+    return histograms_counts @ bin_centers/histograms_counts.sum(axis=1)
 
 
 # pyqtgraph.GraphicsWindow fails to behave like a regular Qt widget
@@ -47,32 +43,27 @@ class XYHistPlot(QtWidgets.QSplitter):
         self.selected_index = None
 
         self.histogram_bins = histogram_bins
+        self.histograms_counts = histograms_counts
 
         ys = _compute_ys(self.histogram_bins, histograms_counts)
+        # The per-point data is the index of the histogram of the point.
         self.xy_plot_data = self.xy_plot.plot(x=xs, y=ys,
+                                              data=np.arange(len(ys)),
                                               pen=None,
                                               symbol="x", symbolSize=20)
         self.xy_plot_data.sigPointsClicked.connect(self._point_clicked)
-        for index, (point, counts) in (
-                enumerate(zip(self.xy_plot_data.scatter.points(),
-                              histograms_counts))):
-            point.histogram_index = index
-            point.histogram_counts = counts
 
         self.hist_plot_data = self.hist_plot.plot(
             stepMode=True, fillLevel=0,
             brush=(0, 0, 255, 150))
 
     def _set_partial_data(self, xs, histograms_counts):
+        self.histograms_counts = histograms_counts
         ys = _compute_ys(self.histogram_bins, histograms_counts)
         self.xy_plot_data.setData(x=xs, y=ys,
+                                  data=np.arange(len(ys)),
                                   pen=None,
                                   symbol="x", symbolSize=20)
-        for index, (point, counts) in (
-                enumerate(zip(self.xy_plot_data.scatter.points(),
-                              histograms_counts))):
-            point.histogram_index = index
-            point.histogram_counts = counts
 
     def _point_clicked(self, data_item, spot_items):
         spot_item = spot_items[0]
@@ -86,9 +77,10 @@ class XYHistPlot(QtWidgets.QSplitter):
             self.xy_plot.addItem(self.arrow)
         else:
             self.arrow.setPos(position)
-        self.selected_index = spot_item.histogram_index
-        self.hist_plot_data.setData(x=self.histogram_bins,
-                                    y=spot_item.histogram_counts)
+        self.selected_index = int(spot_item.data())
+        self.hist_plot_data.setData(
+            x=self.histogram_bins,
+            y=self.histograms_counts[self.selected_index])
 
     def _can_use_partial(self, mods):
         if self.hist_plot_data is None:
@@ -3,7 +3,9 @@ import argparse
 import asyncio
 import os
 import string
+import glob
 
+import numpy as np
 from quamash import QEventLoop, QtWidgets, QtCore
 
 from artiq.protocols.sync_struct import Subscriber, process_mod
@@ -41,6 +43,23 @@ class AppletIPCClient(AsyncioChildComm):
     def fix_initial_size(self):
         self.write_pyon({"action": "fix_initial_size"})
 
+    def _load_shared_arrays(self, obj):
+        # See artiq.gui.applets.SharedArrays.
+        if isinstance(obj, dict):
+            if "__shm__" in obj:
+                path = obj["__shm__"]
+                try:
+                    return np.fromfile(path, dtype=obj["dtype"]).reshape(
+                        obj["shape"])
+                finally:
+                    self.write_pyon({"action": "release", "path": path})
+            return {k: self._load_shared_arrays(v) for k, v in obj.items()}
+        elif isinstance(obj, (list, tuple)):
+            r = [self._load_shared_arrays(v) for v in obj]
+            return r if isinstance(obj, list) else tuple(r)
+        else:
+            return obj
+
     async def listen(self):
         data = None
         while True:
@@ -51,7 +70,7 @@ class AppletIPCClient(AsyncioChildComm):
                     self.close_cb()
                     return
                 elif action == "mod":
-                    mod = obj["mod"]
+                    mod = self._load_shared_arrays(obj["mod"])
                     if mod["action"] == "init":
                         data = self.init_cb(mod["struct"])
                     else:
@@ -66,12 +85,98 @@ class AppletIPCClient(AsyncioChildComm):
 
     def subscribe(self, datasets, init_cb, mod_cb):
         self.write_pyon({"action": "subscribe",
-                         "datasets": datasets})
+                         "datasets": datasets,
+                         "shared_arrays": True})
         self.init_cb = init_cb
         self.mod_cb = mod_cb
         asyncio.ensure_future(self.listen())
 
 
+class DatasetArray:
+    """Keeps a NumPy copy of a dataset value for plotting, and updates it
+    from the mods received by the applet.
+
+    Appends to a list and assignments to elements are applied to the copy;
+    other modifications cause the dataset to be converted again in full.
+    The storage grows geometrically so that appending is cheap.
+
+    :param name: name of the dataset, or ``None``.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._buffer = None
+        self._length = 0
+
+    @property
+    def value(self):
+        """The current value as a NumPy array, or ``None`` if the dataset
+        does not exist. Scalars are returned as 0-dimensional arrays."""
+        if self._buffer is None or self._buffer.ndim == 0:
+            return self._buffer
+        return self._buffer[:self._length]
+
+    def _reload(self, data):
+        try:
+            value = data[self.name][1]
+        except KeyError:
+            self._buffer = None
+            return
+        self._buffer = np.array(value)
+        if self._buffer.ndim:
+            self._length = len(self._buffer)
+
+    def _append(self, x):
+        if (self._buffer is None or self._buffer.ndim != 1
+                or np.ndim(x) != 0):
+            return False
+        if self._length == len(self._buffer):
+            new_buffer = np.empty(max(16, 2*self._length),
+                                  dtype=np.result_type(self._buffer, x))
+            new_buffer[:self._length] = self._buffer[:self._length]
+            self._buffer = new_buffer
+        elif not np.can_cast(np.result_type(x), self._buffer.dtype,
+                             casting="same_kind"):
+            return False
+        self._buffer[self._length] = x
+        self._length += 1
+        return True
+
+    def _setitem(self, key, value):
+        if self._buffer is None or self._buffer.ndim == 0:
+            return False
+        try:
+            self.value[key] = value
+        except (TypeError, ValueError, IndexError):
+            return False
+        return True
+
+    def update(self, data, mods):
+        """Apply the mods and return ``True`` if the value has changed."""
+        if self.name is None:
+            return False
+        changed = False
+        for mod in mods:
+            if mod["action"] == "init":
+                self._reload(data)
+                return True
+            path = mod["path"]
+            if path:
+                if path[0] != self.name:
+                    continue
+            elif mod.get("key") != self.name:
+                continue
+            changed = True
+            if path == [self.name, 1]:
+                if mod["action"] == "append" and self._append(mod["x"]):
+                    continue
+                if (mod["action"] == "setitem"
+                        and self._setitem(mod["key"], mod["value"])):
+                    continue
+            self._reload(data)
+            return True
+        return changed
+
+
 class SimpleApplet:
     def __init__(self, main_widget_class, cmd_description=None,
                  default_update_delay=0.0):
@@ -197,10 +302,18 @@ class SimpleApplet:
         else:
             self.emit_data_changed(self.data, [mod])
 
+    def get_key_filter(self):
+        # Optional datasets that are not given are None.
+        return [glob.escape(name) for name in
+                sorted(name for name in self.datasets if name is not None)]
+
     def subscribe(self):
         if self.embed is None:
+            # Let the master filter the datasets, so that we do not
+            # receive the whole database.
             self.subscriber = Subscriber("datasets",
-                                         self.sub_init, self.sub_mod)
+                                         self.sub_init, self.sub_mod,
+                                         key_filter=self.get_key_filter())
             self.loop.run_until_complete(self.subscriber.connect(
                 self.args.server, self.args.port))
         else:
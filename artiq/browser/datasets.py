@@ -7,6 +7,7 @@ from artiq.tools import short_format
 from artiq.gui.tools import LayoutWidget, QRecursiveFilterProxyModel
 from artiq.gui.models import DictSyncTreeSepModel
 from artiq.protocols.pc_rpc import AsyncioClient as RPCClient
+from artiq.browser.h5datasets import LazyDataset, load
 
 # reduced read-only version of artiq.dashboard.datasets
 
@@ -19,6 +20,9 @@ class Model(DictSyncTreeSepModel):
         DictSyncTreeSepModel.__init__(self, ".", ["Dataset", "Value"], init)
 
     def convert(self, k, v, column):
+        if isinstance(v[1], LazyDataset):
+            # same as short_format, without reading the data
+            return "ndarray " + str(v[1].shape)
         return short_format(v[1])
 
 
@@ -104,7 +108,7 @@ class DatasetsDock(QtWidgets.QDockWidget):
             key = self.table_model.index_to_key(idx)
             if key is not None:
                 persist, value = self.table_model.backing_store[key]
-                asyncio.ensure_future(self._upload_dataset(key, value))
+                asyncio.ensure_future(self._upload_dataset(key, load(value)))
 
     def save_state(self):
         return bytes(self.table.header().saveState())
@@ -12,6 +12,7 @@ from artiq.gui.tools import LayoutWidget, log_level_to_name, get_open_file_name
 from artiq.gui.entries import procdesc_to_entry
 from artiq.protocols import pyon
 from artiq.master.worker import Worker, log_worker_exception
+from artiq.browser.h5datasets import load
 
 logger = logging.getLogger(__name__)
 
@@ -384,7 +385,7 @@ class LocalDatasetDB:
         self._data = data
 
     def get(self, key):
-        return self._data.backing_store[key][1]
+        return load(self._data.backing_store[key][1])
 
     def update(self, mod):
         self.datasets_sub.update(mod)
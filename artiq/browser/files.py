@@ -1,11 +1,14 @@
 import logging
 import os
+import collections
 from datetime import datetime
 
 import h5py
 from PyQt5 import QtCore, QtWidgets, QtGui
 
 from artiq.protocols import pyon
+from artiq.browser.h5info import H5InfoCache
+from artiq.browser.h5datasets import read_datasets
 
 logger = logging.getLogger(__name__)
 
@@ -24,32 +27,6 @@ def open_h5(info):
                        exc_info=True)
 
 
-class ThumbnailIconProvider(QtWidgets.QFileIconProvider):
-    def icon(self, info):
-        icon = self.hdf5_thumbnail(info)
-        if icon is None:
-            icon = QtWidgets.QFileIconProvider.icon(self, info)
-        return icon
-
-    def hdf5_thumbnail(self, info):
-        f = open_h5(info)
-        if not f:
-            return
-        with f:
-            try:
-                t = f["datasets/thumbnail"]
-            except KeyError:
-                return
-            try:
-                img = QtGui.QImage.fromData(t.value)
-            except:
-                logger.warning("unable to read thumbnail from %s",
-                               info.filePath(), exc_info=True)
-                return
-            pix = QtGui.QPixmap.fromImage(img)
-            return QtGui.QIcon(pix)
-
-
 class DirsOnlyProxy(QtCore.QSortFilterProxyModel):
     def filterAcceptsRow(self, row, parent):
         idx = self.sourceModel().index(row, 0, parent)
@@ -88,30 +65,74 @@ class ZoomIconView(QtWidgets.QListView):
 
 
 class Hdf5FileSystemModel(QtWidgets.QFileSystemModel):
-    def __init__(self):
+    """File system model that shows the thumbnails of HDF5 result files as
+    their icons, and their metadata as tooltips.
+
+    The HDF5 files are read in the background (see :class:`H5InfoCache`),
+    and the data of a file is updated once its information is available.
+    """
+    icon_cache_size = 1000
+
+    def __init__(self, cache_dir=None):
         QtWidgets.QFileSystemModel.__init__(self)
         self.setFilter(QtCore.QDir.Drives | QtCore.QDir.NoDotAndDotDot |
                        QtCore.QDir.AllDirs | QtCore.QDir.Files)
         self.setNameFilterDisables(False)
-        self.setIconProvider(ThumbnailIconProvider())
+        self.info_cache = H5InfoCache(self.info_ready, cache_dir)
+        # path -> (mtime, icon), in LRU order
+        self.icons = collections.OrderedDict()
+
+    def info_ready(self, path):
+        idx = self.index(path)
+        if idx.isValid():
+            self.dataChanged.emit(idx, idx, [QtCore.Qt.DecorationRole,
+                                             QtCore.Qt.ToolTipRole])
+
+    def _h5_info(self, info):
+        if not (info.isFile() and info.suffix() == "h5"):
+            return None, None
+        mtime = info.lastModified().toMSecsSinceEpoch()
+        return mtime, self.info_cache.get(info.filePath(), mtime)
+
+    def _thumbnail(self, info):
+        path = info.filePath()
+        try:
+            mtime, icon = self.icons[path]
+        except KeyError:
+            pass
+        else:
+            if mtime == info.lastModified().toMSecsSinceEpoch():
+                self.icons.move_to_end(path)
+                return icon
+        mtime, h5_info = self._h5_info(info)
+        if h5_info is None or h5_info[1] is None:
+            return None
+        img = QtGui.QImage.fromData(h5_info[1])
+        if img.isNull():
+            logger.warning("unable to read thumbnail from %s", path)
+            icon = None
+        else:
+            icon = QtGui.QIcon(QtGui.QPixmap.fromImage(img))
+        self.icons[path] = mtime, icon
+        if len(self.icons) > self.icon_cache_size:
+            self.icons.popitem(last=False)
+        return icon
 
     def data(self, idx, role):
-        if role == QtCore.Qt.ToolTipRole:
-            info = self.fileInfo(idx)
-            h5 = open_h5(info)
-            if h5 is not None:
-                try:
-                    expid = pyon.decode(h5["expid"].value)
-                    start_time = datetime.fromtimestamp(h5["start_time"].value)
-                    v = ("artiq_version: {}\nrepo_rev: {}\nfile: {}\n"
-                         "class_name: {}\nrid: {}\nstart_time: {}").format(
-                             h5["artiq_version"].value, expid["repo_rev"],
-                             expid["file"], expid["class_name"],
-                             h5["rid"].value, start_time)
-                    return v
-                except:
-                    logger.warning("unable to read metadata from %s",
-                                   info.filePath(), exc_info=True)
+        if role == QtCore.Qt.DecorationRole and idx.column() == 0:
+            icon = self._thumbnail(self.fileInfo(idx))
+            if icon is not None:
+                return icon
+        elif role == QtCore.Qt.ToolTipRole:
+            _, h5_info = self._h5_info(self.fileInfo(idx))
+            if h5_info is not None and h5_info[0] is not None:
+                metadata = h5_info[0]
+                start_time = datetime.fromtimestamp(metadata["start_time"])
+                return ("artiq_version: {}\nrepo_rev: {}\nfile: {}\n"
+                        "class_name: {}\nrid: {}\nstart_time: {}").format(
+                            metadata["artiq_version"], metadata["repo_rev"],
+                            metadata["file"], metadata["class_name"],
+                            metadata["rid"], start_time)
         return QtWidgets.QFileSystemModel.data(self, idx, role)
 
 
@@ -120,7 +141,7 @@ class FilesDock(QtWidgets.QDockWidget):
     dataset_changed = QtCore.pyqtSignal(str)
     metadata_changed = QtCore.pyqtSignal(dict)
 
-    def __init__(self, datasets, browse_root=""):
+    def __init__(self, datasets, browse_root="", cache_dir=None):
         QtWidgets.QDockWidget.__init__(self, "Files")
         self.setObjectName("Files")
         self.setFeatures(self.DockWidgetMovable | self.DockWidgetFloatable)
@@ -130,7 +151,7 @@ class FilesDock(QtWidgets.QDockWidget):
 
         self.datasets = datasets
 
-        self.model = Hdf5FileSystemModel()
+        self.model = Hdf5FileSystemModel(cache_dir)
 
         self.rt = QtWidgets.QTreeView()
         rt_model = DirsOnlyProxy()
@@ -161,6 +182,9 @@ class FilesDock(QtWidgets.QDockWidget):
         self.rl.activated.connect(self.list_activated)
         self.splitter.addWidget(self.rl)
 
+    def stop(self):
+        self.model.info_cache.close()
+
     def tree_current_changed(self, current, previous):
         idx = self.rt.model().mapToSource(current)
         self.rl.setRootIndex(idx)
@@ -187,15 +211,17 @@ class FilesDock(QtWidgets.QDockWidget):
             except:
                 logger.warning("unable to read metadata from %s",
                                info.filePath(), exc_info=True)
+            # Large arrays are only read when needed, see LazyDataset.
             rd = dict()
             if "archive" in f:
-                rd = {k: (True, v.value) for k, v in f["archive"].items()}
+                rd = {k: (True, v)
+                      for k, v in read_datasets(f, "archive").items()}
             if "datasets" in f:
-                for k, v in f["datasets"].items():
+                for k, v in read_datasets(f, "datasets").items():
                     if k in rd:
                         logger.warning("dataset '%s' is both in archive and "
                                        "outputs", k)
-                    rd[k] = (True, v.value)
+                    rd[k] = (True, v)
             if rd:
                 self.datasets.init(rd)
         self.dataset_changed.emit(info.filePath())
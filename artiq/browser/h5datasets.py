@@ -0,0 +1,97 @@
+"""
+On-demand loading of the datasets of HDF5 result files.
+
+When a result file is selected, the browser only reads the values of the
+small datasets. The others are represented by :class:`LazyDataset` objects
+that record their shape and dtype, and read the data from the file when it
+is actually needed (e.g. by an applet or an experiment's ``analyze``).
+"""
+
+import weakref
+import logging
+
+import h5py
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class LazyDataset:
+    """Placeholder for an array dataset of an HDF5 file whose data has not
+    been read yet.
+
+    :param filename: name of the HDF5 file.
+    :param name: full name of the dataset in the file,
+        e.g. ``datasets/foo``.
+    :param shape: shape of the dataset.
+    :param dtype: NumPy dtype of the dataset.
+    """
+    def __init__(self, filename, name, shape, dtype):
+        self.filename = filename
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        # The loaded array is shared as long as somebody holds it.
+        self._value = None
+
+    def __repr__(self):
+        return "<LazyDataset {}:{} {} {}>".format(
+            self.filename, self.name, self.shape, self.dtype)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape))*self.dtype.itemsize
+
+    def load(self):
+        """Return the data of the dataset as a NumPy array.
+
+        Contiguous datasets are memory-mapped copy-on-write, so that only
+        the parts of the data that are accessed are read from disk, and
+        the array can still be modified in place without changing the
+        file. Chunked or compressed datasets are read completely.
+        """
+        value = self._value() if self._value is not None else None
+        if value is None:
+            value = self._read()
+            self._value = weakref.ref(value)
+        return value
+
+    def _read(self):
+        with h5py.File(self.filename, "r") as f:
+            dset = f[self.name]
+            offset = None
+            if dset.chunks is None and dset.compression is None:
+                offset = dset.id.get_offset()
+            if offset is None:
+                # also when no storage has been allocated
+                return dset[()]
+        mm = np.memmap(self.filename, mode="c", dtype=self.dtype,
+                       shape=self.shape, offset=offset)
+        # Return a plain ndarray view, which e.g. PYON can serialize.
+        return np.asarray(mm)
+
+
+def load(value):
+    """Return *value*, or its data if it is a :class:`LazyDataset`."""
+    if isinstance(value, LazyDataset):
+        return value.load()
+    return value
+
+
+def read_datasets(f, group, threshold=64*1024):
+    """Read the datasets of *group* in the open HDF5 file *f*.
+
+    Returns a dictionary mapping dataset names to their values, or to a
+    :class:`LazyDataset` for the array datasets larger than *threshold*
+    bytes.
+    """
+    r = dict()
+    for k, dset in f[group].items():
+        if (dset.shape and not dset.dtype.hasobject
+                and dset.size*dset.dtype.itemsize > threshold):
+            r[k] = LazyDataset(f.filename, dset.name, dset.shape,
+                               dset.dtype)
+        else:
+            r[k] = dset[()]
+    return r
@@ -0,0 +1,173 @@
+"""
+Cache of the run metadata and thumbnails of HDF5 result files.
+
+The browser shows this information as tooltips and icons for every file
+in the current directory. Reading it requires opening each file, so it is
+done by a pool of background threads, and the results are kept in memory
+and persisted in the user cache directory, one file per results directory.
+Entries are keyed on the path and modification time of the HDF5 file.
+"""
+
+import asyncio
+import collections
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+
+from artiq.protocols import pyon
+
+
+logger = logging.getLogger(__name__)
+
+
+def _str(x):
+    if isinstance(x, bytes):
+        return x.decode()
+    return x
+
+
+def read_h5_info(path):
+    """Read the run metadata and the thumbnail of an HDF5 result file.
+
+    Returns a tuple ``(metadata, thumbnail)``. ``metadata`` is a dictionary
+    with the ``artiq_version``, ``repo_rev``, ``file``, ``class_name``,
+    ``rid`` and ``start_time`` (as a timestamp) keys, or ``None`` if the file
+    does not contain it. ``thumbnail`` is the image data of the ``thumbnail``
+    dataset, or ``None``.
+    """
+    metadata = None
+    thumbnail = None
+    with h5py.File(path, "r") as f:
+        try:
+            expid = pyon.decode(_str(f["expid"][()]))
+            metadata = {
+                "artiq_version": _str(f["artiq_version"][()]),
+                "repo_rev": expid["repo_rev"],
+                "file": expid["file"],
+                "class_name": expid["class_name"],
+                "rid": int(f["rid"][()]),
+                "start_time": float(f["start_time"][()]),
+            }
+        except KeyError:
+            pass
+        try:
+            thumbnail = f["datasets/thumbnail"][()]
+        except KeyError:
+            pass
+        else:
+            thumbnail = bytes(thumbnail)
+    return metadata, thumbnail
+
+
+class H5InfoCache:
+    """Reads and caches the information returned by :func:`read_h5_info`.
+
+    Must be used from the thread running the asyncio event loop.
+
+    :param ready_cb: called with the path of a file when its information
+        has become available after a cache miss.
+    :param cache_dir: directory for persisted entries, or ``None`` to keep
+        them only in memory.
+    :param max_dirs: number of results directories whose entries are kept
+        in memory.
+    :param workers: number of background threads reading HDF5 files.
+    """
+    def __init__(self, ready_cb=None, cache_dir=None, max_dirs=64,
+                 workers=4):
+        self.ready_cb = ready_cb
+        self.cache_dir = cache_dir
+        self.max_dirs = max_dirs
+        self.executor = ThreadPoolExecutor(workers)
+        # directory -> {file name: (mtime, metadata, thumbnail)},
+        # in LRU order
+        self.dirs = collections.OrderedDict()
+        self.dirty = set()
+        self.pending = set()
+        self.store_scheduled = False
+
+    def _dir_file(self, directory):
+        name = hashlib.sha1(directory.encode()).hexdigest() + ".pyon"
+        return os.path.join(self.cache_dir, name)
+
+    def _get_dir(self, directory):
+        try:
+            entries = self.dirs[directory]
+        except KeyError:
+            entries = dict()
+            if self.cache_dir is not None:
+                try:
+                    entries = pyon.load_file(self._dir_file(directory))
+                except FileNotFoundError:
+                    pass
+                except:
+                    logger.warning("failed to load cached file information "
+                                   "for %s", directory, exc_info=True)
+            self.dirs[directory] = entries
+            while len(self.dirs) > self.max_dirs:
+                evicted, evicted_entries = self.dirs.popitem(last=False)
+                if evicted in self.dirty:
+                    self._store_dir(evicted, evicted_entries)
+        else:
+            self.dirs.move_to_end(directory)
+        return entries
+
+    def get(self, path, mtime):
+        """Return the ``(metadata, thumbnail)`` tuple of the file at *path*,
+        whose modification time is *mtime*, or ``None`` if it is not
+        known yet. In the latter case, the file is read in the background
+        and ``ready_cb`` is called once it is done."""
+        directory, name = os.path.split(path)
+        entry = self._get_dir(directory).get(name)
+        if entry is not None and entry[0] == mtime:
+            return entry[1:]
+        if (path, mtime) not in self.pending:
+            self.pending.add((path, mtime))
+            future = asyncio.get_event_loop().run_in_executor(
+                self.executor, read_h5_info, path)
+            future.add_done_callback(
+                lambda future: self._read_done(path, mtime, future))
+        return None
+
+    def _read_done(self, path, mtime, future):
+        self.pending.discard((path, mtime))
+        try:
+            info = future.result()
+        except OSError:  # e.g. file being written (see #470)
+            logger.debug("OSError when opening HDF5 file %s", path,
+                         exc_info=True)
+            return
+        except:
+            logger.warning("unable to read HDF5 file %s", path,
+                           exc_info=True)
+            info = (None, None)
+        directory, name = os.path.split(path)
+        self._get_dir(directory)[name] = (mtime, ) + info
+        if self.cache_dir is not None:
+            self.dirty.add(directory)
+            if not self.store_scheduled:
+                asyncio.get_event_loop().call_later(1.0, self.store)
+                self.store_scheduled = True
+        if self.ready_cb is not None:
+            self.ready_cb(path)
+
+    def _store_dir(self, directory, entries):
+        self.dirty.discard(directory)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pyon.store_file(self._dir_file(directory), entries)
+        except:
+            logger.warning("failed to store cached file information for %s",
+                           directory, exc_info=True)
+
+    def store(self):
+        """Persist the entries that have changed."""
+        self.store_scheduled = False
+        for directory in list(self.dirty):
+            self._store_dir(directory, self.dirs[directory])
+
+    def close(self):
+        self.store()
+        self.executor.shutdown(wait=False)
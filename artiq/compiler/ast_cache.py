@@ -0,0 +1,127 @@
+"""
+The :class:`ASTCache` class keeps the parsed ASTs of embedded functions,
+so that the :class:`.embedding.Stitcher` does not have to parse the source
+of frequently used functions (e.g. coredevice drivers) again for every
+kernel that is compiled.
+
+Only the untyped AST is cached. Rewriting into the typed form creates fresh
+type variables and quotes host values, and is therefore redone for every
+compilation.
+
+Entries are keyed on the source code, its location and the ARTIQ version.
+If the ``ARTIQ_AST_CACHE_DIR`` environment variable is set, entries are
+additionally persisted in that directory and shared between processes.
+"""
+
+import os
+import re
+import sys
+import hashlib
+import logging
+import pickle
+import tempfile
+
+from pythonparser import ast, source
+from pythonparser import lexer as source_lexer, parser as source_parser
+
+from artiq import __version__ as artiq_version
+
+
+__all__ = ["ASTCache", "default_cache"]
+
+
+logger = logging.getLogger(__name__)
+
+
+def _clone(obj):
+    # Locations are immutable and are shared between the copies;
+    # only the nodes themselves are mutated by the stitcher.
+    if isinstance(obj, ast.AST):
+        fields = {field: _clone(getattr(obj, field)) for field in obj._fields}
+        fields.update({loc: getattr(obj, loc) for loc in obj._locs
+                       if hasattr(obj, loc)})
+        return obj.__class__(**fields)
+    elif isinstance(obj, list):
+        return [_clone(elem) for elem in obj]
+    else:
+        return obj
+
+
+class ASTCache:
+    """
+    :param directory: directory for persisted entries, or ``None`` to keep
+        them only in memory.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.entries = dict()
+
+    def _key(self, source_code, filename, first_line):
+        h = hashlib.sha256()
+        for part in (artiq_version, "{}.{}".format(*sys.version_info[0:2]),
+                     filename, str(first_line), source_code):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(os.path.join(self.directory, key + ".pickle"), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except:
+            logger.warning("failed to load cached AST %s", key, exc_info=True)
+            return None
+
+    def _store(self, key, node):
+        if self.directory is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write atomically, as other processes may be reading the cache.
+            fd, tmpname = tempfile.mkstemp(dir=self.directory)
+            with open(fd, "wb") as f:
+                pickle.dump(node, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpname, os.path.join(self.directory, key + ".pickle"))
+        except:
+            logger.warning("failed to store cached AST %s", key, exc_info=True)
+
+    def parse_function(self, source_code, filename, first_line, engine):
+        """
+        Parse the source of a single function definition, as returned by
+        :func:`inspect.getsource`, and return a fresh copy of its AST
+        that the caller is free to modify.
+        """
+        key = self._key(source_code, filename, first_line)
+        node = self.entries.get(key)
+        if node is None:
+            node = self._load(key)
+            if node is None:
+                node = self._parse(source_code, filename, first_line, engine)
+                self._store(key, node)
+            self.entries[key] = node
+        return _clone(node)
+
+    def _parse(self, source_code, filename, first_line, engine):
+        # Find out how indented we are.
+        initial_whitespace = re.search(r"^\s*", source_code).group(0)
+        initial_indent = len(initial_whitespace.expandtabs())
+
+        source_buffer = source.Buffer(source_code, filename, first_line)
+        lexer = source_lexer.Lexer(source_buffer, version=sys.version_info[0:2],
+                                   diagnostic_engine=engine)
+        lexer.indent = [(initial_indent,
+                         source.Range(source_buffer, 0, len(initial_whitespace)),
+                         initial_whitespace)]
+        parser = source_parser.Parser(lexer, version=sys.version_info[0:2],
+                                      diagnostic_engine=engine)
+        return parser.file_input().body[0]
+
+    def clear(self):
+        self.entries.clear()
+
+
+default_cache = ASTCache(os.getenv("ARTIQ_AST_CACHE_DIR"))
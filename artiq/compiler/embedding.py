@@ -9,12 +9,11 @@ import sys, os, re, linecache, inspect, textwrap, types as pytypes, numpy
 from collections import OrderedDict, defaultdict
 
 from pythonparser import ast, algorithm, source, diagnostic, parse_buffer
-from pythonparser import lexer as source_lexer, parser as source_parser
 
 from Levenshtein import ratio as similarity, jaro_winkler
 
 from ..language import core as language_core
-from . import types, builtins, asttyped, prelude
+from . import types, builtins, asttyped, prelude, ast_cache
 from .transforms import ASTTypedRewriter, Inferencer, IntMonomorphizer, TypedtreePrinter
 from .transforms.asttyped_rewriter import LocalExtractor
 
@@ -652,7 +651,8 @@ class TypedtreeHasher(algorithm.Visitor):
         return hash(tuple(freeze(getattr(node, field_name)) for field_name in fields))
 
 class Stitcher:
-    def __init__(self, core, dmgr, engine=None, print_as_rpc=True):
+    def __init__(self, core, dmgr, engine=None, print_as_rpc=True,
+                 ast_cache=ast_cache.default_cache):
         self.core = core
         self.dmgr = dmgr
         if engine is None:
@@ -673,6 +673,7 @@ class Stitcher:
         self.prelude.pop("array")
 
         self.functions = {}
+        self.ast_cache = ast_cache
 
         self.embedding_map = EmbeddingMap()
         self.value_map = defaultdict(lambda: [])
@@ -877,20 +878,9 @@ class Stitcher:
         cell_names = embedded_function.__code__.co_freevars
         host_environment.update({var: cells[index] for index, var in enumerate(cell_names)})
 
-        # Find out how indented we are.
-        initial_whitespace = re.search(r"^\s*", source_code).group(0)
-        initial_indent = len(initial_whitespace.expandtabs())
-
-        # Parse.
-        source_buffer = source.Buffer(source_code, filename, first_line)
-        lexer = source_lexer.Lexer(source_buffer, version=sys.version_info[0:2],
-                                   diagnostic_engine=self.engine)
-        lexer.indent = [(initial_indent,
-                         source.Range(source_buffer, 0, len(initial_whitespace)),
-                         initial_whitespace)]
-        parser = source_parser.Parser(lexer, version=sys.version_info[0:2],
-                                      diagnostic_engine=self.engine)
-        function_node = parser.file_input().body[0]
+        # Parse, or reuse the AST from an earlier compilation.
+        function_node = self.ast_cache.parse_function(source_code, filename, first_line,
+                                                      engine=self.engine)
 
         # Mangle the name, since we put everything into a single module.
         full_function_name = "{}.{}".format(module_name, host_function.__qualname__)
@@ -1,4 +1,5 @@
 import os, sys, tempfile, subprocess, io
+from concurrent.futures import ProcessPoolExecutor
 from artiq.compiler import types, ir
 from llvmlite_artiq import ir as ll, binding as llvm
 
@@ -47,6 +48,38 @@ class RunTool:
         for filename in self._tempnames.values():
             os.unlink(filename)
 
+def _target_machine(triple, features):
+    lltarget = llvm.Target.from_triple(triple)
+    llmachine = lltarget.create_target_machine(
+                    features=",".join(["+{}".format(f) for f in features]),
+                    reloc="pic", codemodel="default")
+    llmachine.set_asm_verbosity(True)
+    return llmachine
+
+def partition_module(llvm_ir, owned_functions, owns_globals):
+    # Every partition receives the complete optimized module; definitions
+    # owned by other partitions are demoted to available_externally, so that
+    # they are visible to the code generator but not emitted, and are resolved
+    # against the other objects at link time.
+    llmodule = llvm.parse_assembly(llvm_ir)
+    for llfunction in llmodule.functions:
+        if llfunction.is_declaration:
+            continue
+        if llfunction.name not in owned_functions:
+            llfunction.linkage = llvm.Linkage.available_externally
+    if not owns_globals:
+        for llglobal in llmodule.global_variables:
+            if llglobal.is_declaration or \
+                    llglobal.linkage != llvm.Linkage.external:
+                continue
+            llglobal.linkage = llvm.Linkage.available_externally
+    return llmodule
+
+def _emit_partition(triple, features, llvm_ir, owned_functions, owns_globals):
+    # Runs in a worker process.
+    llmodule = partition_module(llvm_ir, owned_functions, owns_globals)
+    return _target_machine(triple, features).emit_object(llmodule)
+
 def _dump(target, kind, suffix, content):
     if target is not None:
         print("====== {} DUMP ======".format(kind.upper()), file=sys.stderr)
@@ -75,6 +108,15 @@ class Target:
     :var print_function: (string)
         Name of a formatted print functions (with the signature of ``printf``)
         provided by the target, e.g. ``"printf"``.
+
+    :param codegen_partitions: number of partitions the optimized module
+        is split into for machine code emission. Partitions are emitted
+        in parallel worker processes and linked together. Optimization,
+        including inlining, is always performed on the whole module.
+        With more than one partition, symbols with private or internal
+        linkage become hidden external symbols (see
+        :meth:`expose_local_symbols`), so that they can be referenced
+        across partitions; the linker can then no longer drop them.
     """
     triple = "unknown"
     data_layout = ""
@@ -82,16 +124,12 @@ class Target:
     print_function = "printf"
 
 
-    def __init__(self):
+    def __init__(self, codegen_partitions=1):
         self.llcontext = ll.Context()
+        self.codegen_partitions = codegen_partitions
 
     def target_machine(self):
-        lltarget = llvm.Target.from_triple(self.triple)
-        llmachine = lltarget.create_target_machine(
-                        features=",".join(["+{}".format(f) for f in self.features]),
-                        reloc="pic", codemodel="default")
-        llmachine.set_asm_verbosity(True)
-        return llmachine
+        return _target_machine(self.triple, self.features)
 
     def optimize(self, llmodule):
         llpassmgr = llvm.create_module_pass_manager()
@@ -168,6 +206,65 @@ class Target:
 
         return llmachine.emit_object(llmodule)
 
+    def expose_local_symbols(self, llmodule):
+        """
+        Promote the symbols with private or internal linkage of a module
+        to hidden external symbols, so that they can be referenced from
+        other partitions.
+        """
+        for index, llglobal in enumerate(list(llmodule.functions) +
+                                         list(llmodule.global_variables)):
+            if llglobal.is_declaration:
+                continue
+            if llglobal.linkage in (llvm.Linkage.private, llvm.Linkage.internal):
+                if llglobal.name == "":
+                    llglobal.name = "__artiq_partition.{}".format(index)
+                llglobal.linkage = llvm.Linkage.external
+                llglobal.visibility = llvm.Visibility.hidden
+
+    def partition(self, llmodule, count):
+        """
+        Split the function definitions of an optimized module into
+        at most ``count`` groups of roughly equal size.
+
+        Returns a list of sets of function names; the first partition
+        also owns all global variables.
+        """
+        llfunctions = [(len(str(llfunction)), llfunction.name)
+                       for llfunction in llmodule.functions
+                       if not llfunction.is_declaration]
+        partitions = [(0, set()) for _ in range(min(count, len(llfunctions)) or 1)]
+        # Greedily assign the largest functions first to the smallest partition.
+        for size, name in sorted(llfunctions, reverse=True):
+            index = min(range(len(partitions)), key=lambda i: partitions[i][0])
+            total, names = partitions[index]
+            names.add(name)
+            partitions[index] = (total + size, names)
+        return [names for total, names in partitions]
+
+    def assemble_partitioned(self, llmodule, count):
+        """
+        Emit the optimized module as a list of relocatable objects,
+        using up to ``count`` worker processes.
+        """
+        partitions = self.partition(llmodule, count)
+        if len(partitions) == 1:
+            return [self.assemble(llmodule)]
+
+        self.expose_local_symbols(llmodule)
+        llvm_ir = str(llmodule)
+        with ProcessPoolExecutor(max_workers=len(partitions)) as executor:
+            futures = [executor.submit(_emit_partition, self.triple, self.features,
+                                       llvm_ir, owned_functions, index == 0)
+                       for index, owned_functions in enumerate(partitions)]
+            objects = [future.result() for future in futures]
+
+        for index, obj in enumerate(objects):
+            _dump(os.getenv("ARTIQ_DUMP_OBJ"), "Object file (partition {})".format(index),
+                  ".{}.o".format(index), lambda: obj)
+
+        return objects
+
     def link(self, objects):
         """Link the relocatable objects into a shared library for this target."""
         with RunTool([self.triple + "-ld", "-shared", "--eh-frame-hdr"] +
@@ -184,6 +281,12 @@ class Target:
             return library
 
     def compile_and_link(self, modules):
+        if self.codegen_partitions > 1:
+            objects = []
+            for module in modules:
+                objects += self.assemble_partitioned(self.compile(module),
+                                                     self.codegen_partitions)
+            return self.link(objects)
         return self.link([self.assemble(self.compile(module)) for module in modules])
 
     def strip(self, library):
@@ -236,8 +339,8 @@ class Target:
             return results["__stdout__"].read().rstrip().split("\n")
 
 class NativeTarget(Target):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.triple = llvm.get_default_triple()
 
 class OR1KTarget(Target):
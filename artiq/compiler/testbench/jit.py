@@ -2,9 +2,15 @@ import os, sys, fileinput, ctypes
 from pythonparser import diagnostic
 from llvmlite_artiq import binding as llvm
 from ..module import Module, Source
-from ..targets import NativeTarget
+from ..targets import NativeTarget, partition_module
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1].startswith("+partitions="):
+        partitions = int(sys.argv[1][len("+partitions="):])
+        del sys.argv[1]
+    else:
+        partitions = 1
+
     libartiq_support = os.getenv("LIBARTIQ_SUPPORT")
     if libartiq_support is not None:
         llvm.load_library_permanently(libartiq_support)
@@ -27,7 +33,19 @@ def main():
     llparsedmod.verify()
 
     llmachine = llvm.Target.from_triple(target.triple).create_target_machine()
-    lljit = llvm.create_mcjit_compiler(llparsedmod, llmachine)
+    if partitions > 1:
+        # Split the module as Target.assemble_partitioned() does, and let
+        # the JIT resolve the symbols across partitions.
+        owned_functions = target.partition(llparsedmod, partitions)
+        target.expose_local_symbols(llparsedmod)
+        llvm_ir = str(llparsedmod)
+        llpartmods = [partition_module(llvm_ir, functions, index == 0)
+                      for index, functions in enumerate(owned_functions)]
+        lljit = llvm.create_mcjit_compiler(llpartmods[0], llmachine)
+        for llpartmod in llpartmods[1:]:
+            lljit.add_module(llpartmod)
+    else:
+        lljit = llvm.create_mcjit_compiler(llparsedmod, llmachine)
     llmain = lljit.get_function_address(llmod.name + ".__modinit__")
     ctypes.CFUNCTYPE(None)(llmain)()
 
@@ -62,6 +62,12 @@ def main():
     benchmark(lambda: target.assemble(llvm_ir),
               "LLVM machine code emission")
 
+    partitioned_target = OR1KTarget(codegen_partitions=os.cpu_count())
+    partitioned_llvm_ir = partitioned_target.compile(module)
+    benchmark(lambda: partitioned_target.assemble_partitioned(partitioned_llvm_ir,
+                                                              os.cpu_count()),
+              "LLVM machine code emission (partitioned)")
+
     benchmark(lambda: target.link([elf_obj]),
               "Linking")
 
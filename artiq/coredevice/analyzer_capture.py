@@ -0,0 +1,233 @@
+"""
+Continuous capture of the RTIO analyzer.
+
+:class:`AnalyzerCapture` fetches analyzer dumps from the core device at
+regular intervals and adds their messages to an :class:`AnalyzerStore`.
+Messages that were already stored by a previous capture are recognized by
+their RTIO counter value and dropped. The store keeps the messages in
+segment files in a directory, deletes the oldest segments according to
+its retention settings, and returns the messages within a range of RTIO
+counter values as a :class:`DecodedDump`.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import struct
+import time
+
+import numpy as np
+
+from artiq.protocols import pyon
+from artiq.coredevice.comm_analyzer import (MessageType, DecodedDump,
+                                            message_dtype, decode_dump)
+
+
+logger = logging.getLogger(__name__)
+
+
+def encode_dump(dump):
+    """Returns the analyzer dump (as received from the core device) that
+    holds the messages of a :class:`DecodedDump`."""
+    data = dump.records.tobytes()
+    return struct.pack(">IQbbb", len(data), len(data), 0,
+                       dump.log_channel, dump.dds_onehot_sel) + data
+
+
+async def get_analyzer_dump_async(host, port=1382):
+    """Asynchronous version of :func:`get_analyzer_dump`."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await reader.read()
+    finally:
+        writer.close()
+
+
+class AnalyzerStore:
+    """Rolling on-disk store of analyzer messages.
+
+    :param directory: directory holding the segment files, created if it
+        does not exist. Messages already stored there are kept.
+    :param segment_size: size in bytes above which a new segment file is
+        started.
+    :param max_size: total size in bytes above which the oldest segments
+        are deleted, or ``None``.
+    :param max_age: age in seconds above which segments are deleted, or
+        ``None``.
+    """
+    def __init__(self, directory, segment_size=16*2**20, max_size=2**30,
+                 max_age=None):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_size = max_size
+        self.max_age = max_age
+
+        os.makedirs(directory, exist_ok=True)
+        self.metadata_file = os.path.join(directory, "metadata.pyon")
+        try:
+            self.metadata = pyon.load_file(self.metadata_file)
+        except FileNotFoundError:
+            self.metadata = {"log_channel": 0, "dds_onehot_sel": False}
+        self.segments = sorted(
+            int(m.group(1)) for m in
+            (re.fullmatch(r"(\d{8})\.bin", f) for f in os.listdir(directory))
+            if m is not None)
+
+        # RTIO counter of the most recent message stored, and the stored
+        # messages with that counter value.
+        self.last_rtio_counter = None
+        self.last_records = set()
+        if self.segments:
+            records = self._read(self.segments[-1])
+            if len(records):
+                self._set_last(records)
+
+    def _segment_file(self, segment):
+        return os.path.join(self.directory, "{:08}.bin".format(segment))
+
+    def _read(self, segment):
+        filename = self._segment_file(segment)
+        if not os.path.getsize(filename):
+            return np.zeros(0, message_dtype)
+        return np.memmap(filename, dtype=message_dtype, mode="r")
+
+    def _set_last(self, records):
+        rtio_counter = records["rtio_counter"]
+        self.last_rtio_counter = int(rtio_counter[-1])
+        i = np.searchsorted(rtio_counter, rtio_counter[-1], "left")
+        self.last_records = {r.tobytes() for r in records[i:]}
+
+    def _new_records(self, records):
+        if self.last_rtio_counter is None or not len(records):
+            return records, False
+        rtio_counter = records["rtio_counter"]
+        if int(rtio_counter[-1]) < self.last_rtio_counter:
+            logger.warning("RTIO counter went backwards, "
+                           "assuming the core device was reset")
+            return records, True
+        i = np.searchsorted(rtio_counter, self.last_rtio_counter, "left")
+        j = np.searchsorted(rtio_counter, self.last_rtio_counter, "right")
+        keep = np.ones(len(records), bool)
+        keep[:i] = False
+        for k in range(i, j):
+            if records[k].tobytes() in self.last_records:
+                keep[k] = False
+        return records[keep], False
+
+    def add(self, dump):
+        """Appends the messages of a :class:`DecodedDump` that are not
+        already in the store. Returns the number of messages added."""
+        metadata = {"log_channel": dump.log_channel,
+                    "dds_onehot_sel": dump.dds_onehot_sel}
+        if metadata != self.metadata:
+            self.metadata = metadata
+            pyon.store_file(self.metadata_file, metadata)
+
+        records = dump.records[
+            dump.message_type != MessageType.stopped.value]
+        records, reset = self._new_records(records)
+        if not len(records):
+            return 0
+
+        if (reset or not self.segments or
+                os.path.getsize(self._segment_file(self.segments[-1]))
+                >= self.segment_size):
+            self.segments.append(self.segments[-1] + 1
+                                 if self.segments else 0)
+        with open(self._segment_file(self.segments[-1]), "ab") as f:
+            f.write(records.tobytes())
+        self._set_last(records)
+        self._apply_retention()
+        return len(records)
+
+    def _apply_retention(self):
+        now = time.time()
+        sizes = [os.path.getsize(self._segment_file(segment))
+                 for segment in self.segments]
+        total_size = sum(sizes)
+        while len(self.segments) > 1:
+            filename = self._segment_file(self.segments[0])
+            if (self.max_size is not None and total_size > self.max_size) \
+                    or (self.max_age is not None and
+                        now - os.path.getmtime(filename) > self.max_age):
+                os.unlink(filename)
+                del self.segments[0]
+                total_size -= sizes.pop(0)
+            else:
+                break
+
+    def get_range(self):
+        """Returns the RTIO counter values of the first and last stored
+        messages, or ``None`` if the store is empty."""
+        first = None
+        for segment in self.segments:
+            records = self._read(segment)
+            if len(records):
+                first = int(records["rtio_counter"][0])
+                break
+        if first is None:
+            return None
+        return first, self.last_rtio_counter
+
+    def query(self, start=None, stop=None):
+        """Returns the stored messages with RTIO counter values in
+        ``[start, stop)`` as a :class:`DecodedDump`. Messages recorded
+        before a core device reset are included if their counter values
+        are within the range."""
+        parts = []
+        for segment in self.segments:
+            records = self._read(segment)
+            if not len(records):
+                continue
+            rtio_counter = records["rtio_counter"]
+            i = 0 if start is None else np.searchsorted(rtio_counter, start)
+            j = (len(records) if stop is None
+                 else np.searchsorted(rtio_counter, stop))
+            if i < j:
+                parts.append(np.array(records[i:j]))
+        if parts:
+            # concatenate() may give the native byte order
+            records = np.concatenate(parts).astype(message_dtype)
+        else:
+            records = np.zeros(0, message_dtype)
+        return DecodedDump(self.metadata["log_channel"],
+                           self.metadata["dds_onehot_sel"], records)
+
+
+class AnalyzerCapture:
+    """Fetches analyzer dumps from the core device every ``interval``
+    seconds and adds them to ``store``."""
+    def __init__(self, store, host, port=1382, interval=1.0):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.interval = interval
+
+    async def capture(self):
+        """Fetches and stores one analyzer dump. Returns the number of new
+        messages."""
+        dump = decode_dump(await get_analyzer_dump_async(self.host,
+                                                          self.port))
+        n = self.store.add(dump)
+        logger.debug("captured %d new messages", n)
+        return n
+
+    def start(self):
+        self.task = asyncio.ensure_future(self._capture_loop())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await asyncio.wait_for(self.task, None)
+        except asyncio.CancelledError:
+            pass
+
+    async def _capture_loop(self):
+        while True:
+            try:
+                await self.capture()
+            except (OSError, ValueError):
+                logger.error("failed to capture analyzer dump",
+                             exc_info=True)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,268 @@
+"""
+Decoded RTIO analyzer messages for analysis with NumPy.
+
+The messages of an analyzer dump are grouped by channel and message type
+into tables of columns (``timestamp``, ``rtio_counter``, ``address``,
+``data``, ...) sorted by time, i.e. by timestamp for output and input
+messages and by RTIO counter for exceptions. Channels are named after the
+devices of the device database that use them. The tables can be saved to
+and loaded from HDF5 (``.h5``, ``.hdf5``) and NumPy (``.npz``) files.
+"""
+
+import os
+
+import h5py
+import numpy as np
+
+from artiq.coredevice.comm_analyzer import MessageType, message_classes
+
+
+__all__ = ["get_channel_names", "AnalyzerData"]
+
+
+_field_dtypes = {
+    "timestamp": np.uint64,
+    "rtio_counter": np.uint64,
+    "address": np.uint32,
+    "data": np.uint64,
+    "exception_type": np.uint8
+}
+
+
+def _message_type(message_type):
+    if isinstance(message_type, str):
+        return MessageType[message_type]
+    return MessageType(message_type)
+
+
+def _time_field(message_type):
+    if message_type in (MessageType.output, MessageType.input):
+        return "timestamp"
+    else:
+        return "rtio_counter"
+
+
+def _empty_columns(message_type):
+    return {field: np.zeros(0, _field_dtypes[field])
+            for field in message_classes[message_type]._fields
+            if field != "channel"}
+
+
+def get_channel_names(devices, log_channel=None):
+    """Returns a dictionary mapping RTIO channel numbers to the names of
+    the devices of the device database that use them. The names of
+    devices sharing a channel (e.g. DDS channels on the same bus) are
+    joined with commas. If ``log_channel`` is given, it is named
+    ``rtio_log``."""
+    names = dict()
+    for name, desc in devices.items():
+        if not isinstance(desc, dict) or desc.get("type") != "local":
+            continue
+        arguments = desc.get("arguments", {})
+        if desc.get("module") == "artiq.coredevice.ad9914":
+            channel = arguments.get("bus_channel")
+        else:
+            channel = arguments.get("channel")
+        if isinstance(channel, int):
+            names.setdefault(channel, []).append(name)
+    r = {channel: ",".join(sorted(channel_names))
+         for channel, channel_names in names.items()}
+    if log_channel is not None:
+        r[log_channel] = "rtio_log"
+    return r
+
+
+class AnalyzerData:
+    """Analyzer messages grouped by channel and message type.
+
+    :param tables: dictionary mapping channel names to tables. A table is
+        a dictionary with the channel number under ``channel`` and, for
+        each message type present (``output``, ``input``, ``exception``),
+        a dictionary of columns sorted by time.
+    :param stopped: RTIO counter values of the stopped messages.
+    :param log_channel: RTIO channel of the log messages.
+    :param dds_onehot_sel: whether DDS channels are selected one-hot.
+    """
+    def __init__(self, tables, stopped=None, log_channel=None,
+                 dds_onehot_sel=False):
+        self.tables = tables
+        if stopped is None:
+            stopped = np.zeros(0, np.uint64)
+        self.stopped = stopped
+        self.log_channel = log_channel
+        self.dds_onehot_sel = dds_onehot_sel
+        self._names = {table["channel"]: name
+                       for name, table in tables.items()}
+
+    @classmethod
+    def from_dump(cls, dump, devices=None):
+        """Groups the messages of a :class:`DecodedDump`, naming the
+        channels after the devices of ``devices`` (a device database)."""
+        names = get_channel_names(devices or dict(), dump.log_channel)
+        tables = dict()
+        for message_type in (MessageType.output, MessageType.input,
+                             MessageType.exception):
+            columns = dump.columns(message_type)
+            order = np.argsort(columns[_time_field(message_type)],
+                               kind="mergesort")
+            channel = columns["channel"][order]
+            columns = {field: columns[field][order]
+                       for field in message_classes[message_type]._fields
+                       if field != "channel"}
+            for ch in np.unique(channel).tolist():
+                mask = channel == ch
+                name = names.get(ch, "ch{}".format(ch))
+                table = tables.setdefault(name, {"channel": ch})
+                table[message_type.name] = {field: column[mask]
+                                            for field, column
+                                            in columns.items()}
+        stopped = np.sort(
+            dump.columns(MessageType.stopped)["rtio_counter"])
+        return cls(tables, stopped, dump.log_channel, dump.dds_onehot_sel)
+
+    @property
+    def channels(self):
+        """Dictionary mapping channel names to channel numbers."""
+        return {name: table["channel"] for name, table in self.tables.items()}
+
+    def _table(self, channel):
+        if not isinstance(channel, str):
+            try:
+                channel = self._names[channel]
+            except KeyError:
+                raise KeyError("no messages on channel {}".format(channel))
+        return self.tables[channel]
+
+    def get(self, channel, message_type="output", start=None, stop=None):
+        """Returns the columns of the messages of the given type on a
+        channel, in time order.
+
+        :param channel: channel name or number.
+        :param message_type: :class:`MessageType` or its name.
+        :param start: if given, only messages at or after this time (in
+            machine units) are returned.
+        :param stop: if given, only messages before this time are
+            returned.
+        """
+        message_type = _message_type(message_type)
+        table = self._table(channel)
+        try:
+            columns = table[message_type.name]
+        except KeyError:
+            return _empty_columns(message_type)
+        if start is None and stop is None:
+            return columns
+        time = columns[_time_field(message_type)]
+        i = 0 if start is None else np.searchsorted(time, start, "left")
+        j = len(time) if stop is None else np.searchsorted(time, stop, "left")
+        return {field: column[i:j] for field, column in columns.items()}
+
+    def select(self, channels=None, message_type="output",
+               start=None, stop=None):
+        """Returns the columns of the messages of the given type on
+        several channels (by default, all of them), merged in time order.
+        A ``channel`` column gives the channel number of each message.
+        The other arguments are as for :meth:`get`.
+        """
+        message_type = _message_type(message_type)
+        if channels is None:
+            channels = list(self.tables.keys())
+        parts = []
+        channel = []
+        for ch in channels:
+            columns = self.get(ch, message_type, start, stop)
+            parts.append(columns)
+            n = len(columns[_time_field(message_type)])
+            channel.append(np.full(n, self._table(ch)["channel"], np.uint32))
+        r = _empty_columns(message_type)
+        if parts:
+            r = {field: np.concatenate([part[field] for part in parts])
+                 for field in r.keys()}
+            channel = np.concatenate(channel)
+        else:
+            channel = np.zeros(0, np.uint32)
+        order = np.argsort(r[_time_field(message_type)], kind="mergesort")
+        r = {field: column[order] for field, column in r.items()}
+        r["channel"] = channel[order]
+        return r
+
+    def save(self, filename):
+        """Saves the messages to a HDF5 (``.h5``, ``.hdf5``) or NumPy
+        (``.npz``) file. HDF5 files contain a ``channels/<name>`` group per
+        channel, with the channel number as ``channel`` attribute and a
+        group of column datasets per message type. NumPy files contain
+        the same arrays, named after the HDF5 paths."""
+        ext = os.path.splitext(filename)[1]
+        if ext == ".npz":
+            arrays = {
+                "stopped": self.stopped,
+                "log_channel": np.array(-1 if self.log_channel is None
+                                        else self.log_channel),
+                "dds_onehot_sel": np.array(self.dds_onehot_sel)
+            }
+            for name, table in self.tables.items():
+                for key, value in table.items():
+                    if key == "channel":
+                        arrays["channels/{}/channel".format(name)] = \
+                            np.array(value)
+                    else:
+                        for field, column in value.items():
+                            arrays["channels/{}/{}/{}".format(
+                                name, key, field)] = column
+            np.savez(filename, **arrays)
+        elif ext in (".h5", ".hdf5"):
+            with h5py.File(filename, "w") as f:
+                if self.log_channel is not None:
+                    f.attrs["log_channel"] = self.log_channel
+                f.attrs["dds_onehot_sel"] = self.dds_onehot_sel
+                f["stopped"] = self.stopped
+                channels = f.create_group("channels")
+                for name, table in self.tables.items():
+                    group = channels.create_group(name)
+                    for key, value in table.items():
+                        if key == "channel":
+                            group.attrs["channel"] = value
+                        else:
+                            subgroup = group.create_group(key)
+                            for field, column in value.items():
+                                subgroup[field] = column
+        else:
+            raise ValueError("unsupported file type: " + filename)
+
+    @classmethod
+    def load(cls, filename):
+        """Loads messages saved with :meth:`save`."""
+        ext = os.path.splitext(filename)[1]
+        tables = dict()
+        if ext == ".npz":
+            with np.load(filename) as f:
+                stopped = f["stopped"]
+                log_channel = int(f["log_channel"])
+                if log_channel < 0:
+                    log_channel = None
+                dds_onehot_sel = bool(f["dds_onehot_sel"])
+                for key in f.files:
+                    path = key.split("/")
+                    if path[0] != "channels":
+                        continue
+                    table = tables.setdefault(path[1], dict())
+                    if len(path) == 3:
+                        table["channel"] = int(f[key])
+                    else:
+                        table.setdefault(path[2], dict())[path[3]] = f[key]
+        elif ext in (".h5", ".hdf5"):
+            with h5py.File(filename, "r") as f:
+                stopped = f["stopped"][()]
+                log_channel = f.attrs.get("log_channel")
+                if log_channel is not None:
+                    log_channel = int(log_channel)
+                dds_onehot_sel = bool(f.attrs["dds_onehot_sel"])
+                for name, group in f["channels"].items():
+                    table = {"channel": int(group.attrs["channel"])}
+                    for key, subgroup in group.items():
+                        table[key] = {field: dset[()]
+                                      for field, dset in subgroup.items()}
+                    tables[name] = table
+        else:
+            raise ValueError("unsupported file type: " + filename)
+        return cls(tables, stopped, log_channel, dds_onehot_sel)
@@ -1,5 +1,6 @@
 from operator import itemgetter
 from collections import namedtuple
+from collections.abc import Sequence
 from itertools import count
 from contextlib import contextmanager
 from enum import Enum
@@ -7,6 +8,8 @@ import struct
 import logging
 import socket
 
+import numpy as np
+
 
 logger = logging.getLogger(__name__)
 
@@ -37,15 +40,15 @@ class ExceptionType(Enum):
 def get_analyzer_dump(host, port=1382):
     sock = socket.create_connection((host, port))
     try:
-        r = bytes()
+        chunks = []
         while True:
-            buf = sock.recv(8192)
+            buf = sock.recv(1 << 16)
             if not buf:
                 break
-            r += buf
+            chunks.append(buf)
     finally:
         sock.close()
-    return r
+    return b"".join(chunks)
 
 
 OutputMessage = namedtuple(
@@ -61,32 +64,114 @@ StoppedMessage = namedtuple(
     "StoppedMessage", "rtio_counter")
 
 
-def decode_message(data):
-    message_type_channel = struct.unpack(">I", data[28:32])[0]
-    message_type = MessageType(message_type_channel & 0b11)
+message_classes = {
+    MessageType.output: OutputMessage,
+    MessageType.input: InputMessage,
+    MessageType.exception: ExceptionMessage,
+    MessageType.stopped: StoppedMessage
+}
+
+
+# Layout of the 32-byte analyzer messages. Exception messages carry their
+# type in the last byte of the address field.
+message_dtype = np.dtype([
+    ("data", ">u8"),
+    ("address", ">u4"),
+    ("rtio_counter", ">u8"),
+    ("timestamp", ">u8"),
+    ("message_type_channel", ">u4")
+])
+
+
+_output = MessageType.output.value
+_input = MessageType.input.value
+_exception = MessageType.exception.value
+
+
+def _make_message(data, address, rtio_counter, timestamp,
+                  message_type_channel):
+    message_type = message_type_channel & 0b11
     channel = message_type_channel >> 2
 
-    if message_type == MessageType.output:
-        parts = struct.unpack(">QIQQ", data[:28])
-        data, address, rtio_counter, timestamp = parts
+    if message_type == _output:
         return OutputMessage(channel, timestamp, rtio_counter, address, data)
-    elif message_type == MessageType.input:
-        parts = struct.unpack(">QIQQ", data[:28])
-        data, _, rtio_counter, timestamp = parts
+    elif message_type == _input:
         return InputMessage(channel, timestamp, rtio_counter, data)
-    elif message_type == MessageType.exception:
-        exception_type, rtio_counter = struct.unpack(">BQ", data[11:20])
+    elif message_type == _exception:
         return ExceptionMessage(channel, rtio_counter,
-                                ExceptionType(exception_type))
-    elif message_type == MessageType.stopped:
-        rtio_counter = struct.unpack(">Q", data[12:20])[0]
-        return StoppedMessage(rtio_counter)
+                                ExceptionType(address & 0xff))
     else:
-        raise ValueError
+        return StoppedMessage(rtio_counter)
 
 
-DecodedDump = namedtuple(
-    "DecodedDump", "log_channel dds_onehot_sel messages")
+def decode_message(data):
+    return _make_message(*struct.unpack(">QIQQI", data))
+
+
+class MessageView(Sequence):
+    """Sequence of the message namedtuples of an array of analyzer
+    messages (with dtype :data:`message_dtype`). The namedtuples are built
+    when they are accessed."""
+    def __init__(self, records):
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [_make_message(*r) for r in self.records[i].tolist()]
+        return _make_message(*self.records[i].tolist())
+
+    def __iter__(self):
+        for start in range(0, len(self.records), 4096):
+            for r in self.records[start:start+4096].tolist():
+                yield _make_message(*r)
+
+
+class DecodedDump:
+    """Contents of an analyzer dump.
+
+    The messages are kept in a NumPy structured array (``records``, with
+    dtype :data:`message_dtype`) in the order in which they were recorded.
+    ``messages`` presents them as a sequence of :class:`OutputMessage`,
+    :class:`InputMessage`, :class:`ExceptionMessage` and
+    :class:`StoppedMessage` namedtuples, and :meth:`columns` as arrays.
+    """
+    def __init__(self, log_channel, dds_onehot_sel, records):
+        self.log_channel = log_channel
+        self.dds_onehot_sel = dds_onehot_sel
+        self.records = records
+        message_type_channel = records["message_type_channel"]
+        self.message_type = (message_type_channel & 0b11).astype(np.uint8)
+        self.channel = (message_type_channel >> 2).astype(np.uint32)
+        self.messages = MessageView(records)
+        self._columns = dict()
+
+    def columns(self, message_type):
+        """Returns the messages of the given :class:`MessageType` as a
+        dictionary of arrays, keyed by the fields of the corresponding
+        namedtuple (e.g. ``channel``, ``timestamp``, ``rtio_counter``,
+        ``address`` and ``data`` for output messages). Exception types are
+        given as integers. The ``index`` array holds the positions of the
+        messages in the dump."""
+        try:
+            return self._columns[message_type]
+        except KeyError:
+            pass
+        index = np.flatnonzero(self.message_type == message_type.value)
+        records = self.records[index]
+        columns = {"index": index}
+        for field in message_classes[message_type]._fields:
+            if field == "channel":
+                columns[field] = self.channel[index]
+            elif field == "exception_type":
+                columns[field] = (records["address"] & 0xff).astype(np.uint8)
+            else:
+                columns[field] = records[field].astype(
+                    records.dtype[field].newbyteorder("="))
+        self._columns[message_type] = columns
+        return columns
 
 
 def decode_dump(data):
@@ -106,12 +191,9 @@ def decode_dump(data):
         logger.info("analyzer ring buffer has wrapped %d times",
                     total_byte_count//sent_bytes)
 
-    position = 15
-    messages = []
-    for _ in range(sent_bytes//32):
-        messages.append(decode_message(data[position:position+32]))
-        position += 32
-    return DecodedDump(log_channel, bool(dds_onehot_sel), messages)
+    records = np.frombuffer(data, dtype=message_dtype,
+                            count=sent_bytes//32, offset=15)
+    return DecodedDump(log_channel, bool(dds_onehot_sel), records)
 
 
 def vcd_codes():
@@ -125,16 +207,53 @@ def vcd_codes():
         yield code
 
 
+class _VCDBuffer:
+    # Collects the (many, small) VCD writes and passes them to the file
+    # object in large blocks.
+    def __init__(self, fileobj, size=1 << 14):
+        self.fileobj = fileobj
+        self.size = size
+        self.buffer = []
+        self.count = 0
+
+    def write(self, s):
+        self.buffer.append(s)
+        self.count += 1
+        if self.count == self.size:
+            self.flush()
+
+    def flush(self):
+        self.fileobj.write("".join(self.buffer))
+        self.buffer.clear()
+        self.count = 0
+
+
+def _binary_strings(values, width):
+    # Binary representations of an array of unsigned integers.
+    bits = np.unpackbits(
+        values.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1)
+    chars = np.ascontiguousarray(bits[:, 64-width:]) + ord("0")
+    return chars.view("S{}".format(width)).ravel().astype(str).tolist()
+
+
+def _double_strings(x):
+    # Binary representations of the IEEE 754 encodings of an array of
+    # floats.
+    return _binary_strings(x.astype(np.float64).view(np.uint64), 64)
+
+
 class VCDChannel:
     def __init__(self, out, code):
         self.out = out
         self.code = code
+        self.suffix = self.code + "\n"
+        self.vector_suffix = " " + self.code + "\n"
 
     def set_value(self, value):
         if len(value) > 1:
-            self.out.write("b" + value + " " + self.code + "\n")
+            self.out.write("b" + value + self.vector_suffix)
         else:
-            self.out.write(value + self.code + "\n")
+            self.out.write(value + self.suffix)
 
     def set_value_double(self, x):
         integer_cast = struct.unpack(">Q", struct.pack(">d", x))[0]
@@ -142,11 +261,16 @@ class VCDChannel:
 
 
 class VCDManager:
+    """Writes VCD data to ``fileobj``. Writes are buffered; :meth:`flush`
+    must be called once done."""
     def __init__(self, fileobj):
-        self.out = fileobj
+        self.out = _VCDBuffer(fileobj)
         self.codes = vcd_codes()
         self.current_time = None
 
+    def flush(self):
+        self.out.flush()
+
     def set_timescale_ps(self, timescale):
         self.out.write("$timescale {}ps $end\n".format(round(timescale)))
 
@@ -514,34 +638,67 @@ def decoded_dump_to_vcd(fileobj, devices, dump):
         logger.warning("unable to determine DDS sysclk")
         dds_sysclk = 3e9  # guess
 
-    if isinstance(dump.messages[-1], StoppedMessage):
-        messages = dump.messages[:-1]
+    records = dump.records
+    message_type = dump.message_type
+    channel = dump.channel
+    if (len(message_type)
+            and message_type[-1] == MessageType.stopped.value):
+        records = records[:-1]
+        message_type = message_type[:-1]
+        channel = channel[:-1]
     else:
         logger.warning("StoppedMessage missing")
-        messages = dump.messages
-    messages = sorted(messages, key=get_message_time)
+
+    # Sort the messages by time (as get_message_time), keeping the
+    # order of the dump for equal times.
+    has_timestamp = ((message_type == MessageType.output.value)
+                     | (message_type == MessageType.input.value))
+    times = np.where(has_timestamp, records["timestamp"],
+                     records["rtio_counter"]).astype(np.int64)
+    order = np.argsort(times, kind="mergesort")
+    times = times[order]
+    message_type = message_type[order]
+    channel = channel[order]
+    is_output = message_type == MessageType.output.value
 
     channel_handlers = create_channel_handlers(
         vcd_manager, devices, ref_period,
         dds_sysclk, dump.dds_onehot_sel)
-    vcd_log_channels = get_vcd_log_channels(dump.log_channel, messages)
+    is_log = is_output & (channel == dump.log_channel)
+    vcd_log_channels = get_vcd_log_channels(
+        dump.log_channel, MessageView(records[order[is_log]]))
     channel_handlers[dump.log_channel] = LogHandler(
         vcd_manager, vcd_log_channels)
     slack = vcd_manager.get_channel("rtio_slack", 64)
 
     vcd_manager.set_time(0)
-    start_time = 0
-    for m in messages:
-        start_time = get_message_time(m)
-        if start_time:
-            break
-
-    for message in messages:
-        if message.channel in channel_handlers:
-            t = get_message_time(message) - start_time
-            if t >= 0:
-                vcd_manager.set_time(t)
-            channel_handlers[message.channel].process_message(message)
-            if isinstance(message, OutputMessage):
-                slack.set_value_double(
-                    (message.timestamp - message.rtio_counter)*ref_period)
+    nonzero = np.flatnonzero(times)
+    if len(nonzero):
+        start_time = times[nonzero[0]]
+    else:
+        start_time = 0
+
+    handled = (np.isin(channel, list(channel_handlers.keys()))
+               & (message_type != MessageType.stopped.value))
+    order = order[handled]
+    times = (times[handled] - start_time).tolist()
+    is_output = is_output[handled]
+    records = records[order]
+
+    slack_values = np.full(len(records), None, dtype=object)
+    output_records = records[is_output]
+    slack_values[is_output] = _double_strings(
+        (output_records["timestamp"].astype(np.int64)
+         - output_records["rtio_counter"].astype(np.int64))*ref_period)
+    slack_values = slack_values.tolist()
+
+    set_time = vcd_manager.set_time
+    set_slack = slack.set_value
+    for message, t, slack_value in zip(MessageView(records), times,
+                                       slack_values):
+        if t >= 0:
+            set_time(t)
+        channel_handlers[message.channel].process_message(message)
+        if slack_value is not None:
+            set_slack(slack_value)
+    vcd_manager.flush()
@@ -65,16 +65,22 @@ class Core:
     :param ref_multiplier: ratio between the RTIO fine timestamp frequency
         and the RTIO coarse timestamp frequency (e.g. SERDES multiplication
         factor).
+    :param codegen_partitions: number of partitions kernels are split into
+        for parallel machine code emission (see
+        :class:`artiq.compiler.targets.Target`). The default of 1 emits
+        code in a single thread.
     """
 
     kernel_invariants = {
         "core", "ref_period", "coarse_ref_period", "ref_multiplier",
     }
 
-    def __init__(self, dmgr, host, ref_period, ref_multiplier=8):
+    def __init__(self, dmgr, host, ref_period, ref_multiplier=8,
+                 codegen_partitions=1):
         self.ref_period = ref_period
         self.ref_multiplier = ref_multiplier
         self.coarse_ref_period = ref_period*ref_multiplier
+        self.codegen_partitions = codegen_partitions
         if host is None:
             self.comm = CommKernelDummy()
         else:
@@ -101,7 +107,7 @@ class Core:
             module = Module(stitcher,
                 ref_period=self.ref_period,
                 attribute_writeback=attribute_writeback)
-            target = OR1KTarget()
+            target = OR1KTarget(codegen_partitions=self.codegen_partitions)
 
             library = target.compile_and_link([module])
             stripped_library = target.strip(library)
@@ -1,5 +1,6 @@
 from collections import defaultdict
 import subprocess
+import threading
 
 
 class Symbolizer:
@@ -12,10 +13,9 @@ class Symbolizer:
             cmdline.append("--demangle=rust")
         self._addr2line = subprocess.Popen(cmdline, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
                                            universal_newlines=True)
+        self._cache = dict()
 
-    def symbolize(self, addr):
-        self._addr2line.stdin.write("0x{:08x}\n0\n".format(addr))
-        self._addr2line.stdin.flush()
+    def _read_result(self, addr):
         self._addr2line.stdout.readline() # 0x[addr]
 
         result = []
@@ -28,10 +28,36 @@ class Symbolizer:
                 self._addr2line.stdout.readline() # ??:0
                 return result
 
-            file, line = self._addr2line.stdout.readline().rstrip().split(":")
+            file, line = self._addr2line.stdout.readline().rstrip().rsplit(":", 1)
 
             result.append((function, file, line, addr))
 
+    def symbolize_many(self, addrs):
+        """Symbolizes the addresses that are not in the cache yet, with
+        a single request to addr2line."""
+        addrs = sorted(set(addrs) - self._cache.keys())
+        if not addrs:
+            return
+
+        # Write from another thread, so that addr2line never blocks on
+        # a full output pipe while we are still writing its input.
+        def write_addrs():
+            self._addr2line.stdin.write("".join(
+                "0x{:08x}\n0\n".format(addr) for addr in addrs))
+            self._addr2line.stdin.flush()
+        writer = threading.Thread(target=write_addrs)
+        writer.start()
+        try:
+            for addr in addrs:
+                self._cache[addr] = self._read_result(addr)
+        finally:
+            writer.join()
+
+    def symbolize(self, addr):
+        if addr not in self._cache:
+            self.symbolize_many([addr])
+        return self._cache[addr]
+
 
 class CallgrindWriter:
     def __init__(self, output, binary, triple, compression=True, demangle=True):
@@ -41,10 +67,16 @@ class CallgrindWriter:
         self._ids = defaultdict(lambda: {})
         self._compression = compression
         self._symbolizer = Symbolizer(binary, triple, demangle=demangle)
+        self._lines = []
 
     def _write(self, fmt, *args, **kwargs):
-        self._output.write(fmt.format(*args, **kwargs))
-        self._output.write("\n")
+        self._lines.append(fmt.format(*args, **kwargs))
+
+    def _flush(self):
+        if self._lines:
+            self._lines.append("")
+            self._output.write("\n".join(self._lines))
+            self._lines.clear()
 
     def _spec(self, spec, value):
         if self._current[spec] == value:
@@ -71,14 +103,42 @@ class CallgrindWriter:
         self._write("")
         self._spec("ob", self._binary)
         self._spec("cob", self._binary)
+        self._flush()
+
+    def profile(self, hits, edges):
+        """Writes all the hits and edges of a profile, as returned by
+        :meth:`CommMgmt.get_profile`. All addresses are symbolized at once."""
+        addrs = set(hits.keys())
+        for caller, callee in edges.keys():
+            addrs.add(caller)
+            addrs.add(callee)
+        self._symbolizer.symbolize_many(addrs)
+
+        for addr, count in hits.items():
+            self._hit(addr, count)
+            if len(self._lines) > 10000:
+                self._flush()
+        for (caller, callee), count in edges.items():
+            self._edge(caller, callee, count)
+            if len(self._lines) > 10000:
+                self._flush()
+        self._flush()
 
     def hit(self, addr, count):
+        self._hit(addr, count)
+        self._flush()
+
+    def edge(self, caller, callee, count):
+        self._edge(caller, callee, count)
+        self._flush()
+
+    def _hit(self, addr, count):
         for function, file, line, addr in self._symbolizer.symbolize(addr):
             self._spec("fl", file)
             self._spec("fn", function)
             self._write("0x{:08x} {} {}", addr, line, count)
 
-    def edge(self, caller, callee, count):
+    def _edge(self, caller, callee, count):
         edges = self._symbolizer.symbolize(callee) + self._symbolizer.symbolize(caller)
         for (callee, caller) in zip(edges, edges[1:]):
             function, file, line, addr = callee
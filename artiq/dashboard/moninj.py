@@ -197,44 +197,74 @@ class _DACWidget(_SimpleDisplayWidget):
 _WidgetDesc = namedtuple("_WidgetDesc", "uid comment cls arguments")
 
 
+def _core_addr(ddb):
+    # moninj proxy (aqctl_moninj_proxy) shared by dashboards
+    v = ddb.get("core_moninj")
+    if isinstance(v, dict) and v.get("type") == "controller":
+        try:
+            return v["host"], v["port_proxy"]
+        except KeyError:
+            pass
+    v = ddb.get("core")
+    if isinstance(v, dict) and v.get("type") == "local":
+        try:
+            return v["arguments"]["host"], 1383
+        except KeyError:
+            pass
+    return None
+
+
+def _describe_entry(ddb, k, v, deps):
+    """Returns the widgets of the device database entry ``k`` and the
+    DDS system clock it defines (or ``None``). The keys of the other entries
+    that are looked up are added to ``deps``."""
+    dds_sysclk = None
+    description = set()
+
+    comment = None
+    if "comment" in v:
+        comment = v["comment"]
+    try:
+        if isinstance(v, dict) and v["type"] == "local":
+            if v["module"] == "artiq.coredevice.ttl":
+                channel = v["arguments"]["channel"]
+                force_out = v["class"] == "TTLOut"
+                widget = _WidgetDesc(k, comment, _TTLWidget, (channel, force_out, k))
+                description.add(widget)
+            elif (v["module"] == "artiq.coredevice.ad9914"
+                    and v["class"] == "AD9914"):
+                bus_channel = v["arguments"]["bus_channel"]
+                channel = v["arguments"]["channel"]
+                dds_sysclk = v["arguments"]["sysclk"]
+                widget = _WidgetDesc(k, comment, _DDSWidget, (bus_channel, channel, k))
+                description.add(widget)
+            elif (   (v["module"] == "artiq.coredevice.ad53xx" and v["class"] == "AD53XX")
+                  or (v["module"] == "artiq.coredevice.zotino" and v["class"] == "Zotino")):
+                spi_device = v["arguments"]["spi_device"]
+                deps.add(spi_device)
+                spi_device = ddb[spi_device]
+                while isinstance(spi_device, str):
+                    deps.add(spi_device)
+                    spi_device = ddb[spi_device]
+                spi_channel = spi_device["arguments"]["channel"]
+                for channel in range(32):
+                    widget = _WidgetDesc((k, channel), comment, _DACWidget, (spi_channel, channel, k))
+                    description.add(widget)
+    except KeyError:
+        pass
+    return description, dds_sysclk
+
+
 def setup_from_ddb(ddb):
-    core_addr = None
     dds_sysclk = None
     description = set()
 
     for k, v in ddb.items():
-        comment = None
-        if "comment" in v:
-            comment = v["comment"]
-        try:
-            if isinstance(v, dict) and v["type"] == "local":
-                if k == "core":
-                    core_addr = v["arguments"]["host"]
-                elif v["module"] == "artiq.coredevice.ttl":
-                    channel = v["arguments"]["channel"]
-                    force_out = v["class"] == "TTLOut"
-                    widget = _WidgetDesc(k, comment, _TTLWidget, (channel, force_out, k))
-                    description.add(widget)
-                elif (v["module"] == "artiq.coredevice.ad9914"
-                        and v["class"] == "AD9914"):
-                    bus_channel = v["arguments"]["bus_channel"]
-                    channel = v["arguments"]["channel"]
-                    dds_sysclk = v["arguments"]["sysclk"]
-                    widget = _WidgetDesc(k, comment, _DDSWidget, (bus_channel, channel, k))
-                    description.add(widget)
-                elif (   (v["module"] == "artiq.coredevice.ad53xx" and v["class"] == "AD53XX")
-                      or (v["module"] == "artiq.coredevice.zotino" and v["class"] == "Zotino")):
-                    spi_device = v["arguments"]["spi_device"]
-                    spi_device = ddb[spi_device]
-                    while isinstance(spi_device, str):
-                        spi_device = ddb[spi_device]
-                    spi_channel = spi_device["arguments"]["channel"]
-                    for channel in range(32):
-                        widget = _WidgetDesc((k, channel), comment, _DACWidget, (spi_channel, channel, k))
-                        description.add(widget)
-        except KeyError:
-            pass
-    return core_addr, dds_sysclk, description
+        entry_description, entry_dds_sysclk = _describe_entry(ddb, k, v, set())
+        description |= entry_description
+        if entry_dds_sysclk is not None:
+            dds_sysclk = entry_dds_sysclk
+    return _core_addr(ddb), dds_sysclk, description
 
 
 class _DeviceManager:
@@ -245,7 +275,20 @@ class _DeviceManager:
         self.core_connector_task = asyncio.ensure_future(self.core_connector())
 
         self.ddb = dict()
-        self.description = set()
+        # Device database mods are applied in batches: the keys they touch
+        # are collected, and the affected entries are described again and
+        # their widgets updated once the burst of mods has been received.
+        self.dirty_keys = set()
+        self.all_dirty = False
+        self.update_scheduled = False
+        # key -> set of _WidgetDesc
+        self.entry_descriptions = dict()
+        # key -> DDS system clock
+        self.entry_dds_sysclks = dict()
+        # key -> keys of the other entries that its description depends on
+        self.entry_deps = dict()
+        # key -> keys of the entries whose description depends on it
+        self.dependents = dict()
         self.widgets_by_uid = dict()
 
         self.dds_sysclk = 0
@@ -261,15 +304,70 @@ class _DeviceManager:
         return ddb
 
     def notify(self, mod):
-        core_addr, dds_sysclk, description = setup_from_ddb(self.ddb)
+        if mod["action"] == "init":
+            self.all_dirty = True
+        elif mod["path"]:
+            self.dirty_keys.add(mod["path"][0])
+        elif mod["action"] in {"setitem", "delitem"}:
+            self.dirty_keys.add(mod["key"])
+        else:
+            self.all_dirty = True
+        if not self.update_scheduled:
+            self.update_scheduled = True
+            asyncio.get_event_loop().call_soon(self.update)
+
+    def _describe(self, keys):
+        removed = set()
+        added = set()
+        for k in keys:
+            old_description = self.entry_descriptions.pop(k, set())
+            self.entry_dds_sysclks.pop(k, None)
+            for dep in self.entry_deps.pop(k, ()):
+                dependents = self.dependents[dep]
+                dependents.discard(k)
+                if not dependents:
+                    del self.dependents[dep]
+            if k in self.ddb:
+                deps = set()
+                description, dds_sysclk = _describe_entry(
+                    self.ddb, k, self.ddb[k], deps)
+                if description:
+                    self.entry_descriptions[k] = description
+                if dds_sysclk is not None:
+                    self.entry_dds_sysclks[k] = dds_sysclk
+                if deps:
+                    self.entry_deps[k] = deps
+                    for dep in deps:
+                        self.dependents.setdefault(dep, set()).add(k)
+            else:
+                description = set()
+            removed |= old_description - description
+            added |= description - old_description
+        return removed, added
+
+    def update(self):
+        self.update_scheduled = False
+        if self.all_dirty:
+            keys = set(self.ddb.keys()) | set(self.entry_descriptions.keys())
+        else:
+            keys = set(self.dirty_keys)
+            for k in self.dirty_keys:
+                keys |= self.dependents.get(k, set())
+        self.all_dirty = False
+        self.dirty_keys.clear()
 
+        core_addr = _core_addr(self.ddb)
         if core_addr != self.core_addr:
             self.core_addr = core_addr
             self.new_core_addr.set()
 
-        self.dds_sysclk = dds_sysclk
+        removed, added = self._describe(keys)
+        if self.entry_dds_sysclks:
+            self.dds_sysclk = next(iter(self.entry_dds_sysclks.values()))
+
+        ttl_changed = dds_changed = dac_changed = False
 
-        for to_remove in self.description - description:
+        for to_remove in removed:
             widget = self.widgets_by_uid[to_remove.uid]
             del self.widgets_by_uid[to_remove.uid]
 
@@ -277,21 +375,21 @@ class _DeviceManager:
                 self.setup_ttl_monitoring(False, widget.channel)
                 widget.deleteLater()
                 del self.ttl_widgets[widget.channel]
-                self.ttl_cb()
+                ttl_changed = True
             elif isinstance(widget, _DDSWidget):
                 self.setup_dds_monitoring(False, widget.bus_channel, widget.channel)
                 widget.deleteLater()
                 del self.dds_widgets[(widget.bus_channel, widget.channel)]
-                self.dds_cb()
+                dds_changed = True
             elif isinstance(widget, _DACWidget):
                 self.setup_dac_monitoring(False, widget.spi_channel, widget.channel)
                 widget.deleteLater()
                 del self.dac_widgets[(widget.spi_channel, widget.channel)]
-                self.dac_cb()     
+                dac_changed = True
             else:
                 raise ValueError
 
-        for to_add in description - self.description:
+        for to_add in added:
             widget = to_add.cls(self, *to_add.arguments)
             if to_add.comment is not None:
                 widget.setToolTip(to_add.comment)
@@ -299,20 +397,25 @@ class _DeviceManager:
 
             if isinstance(widget, _TTLWidget):
                 self.ttl_widgets[widget.channel] = widget
-                self.ttl_cb()
                 self.setup_ttl_monitoring(True, widget.channel)
+                ttl_changed = True
             elif isinstance(widget, _DDSWidget):
                 self.dds_widgets[(widget.bus_channel, widget.channel)] = widget
-                self.dds_cb()
                 self.setup_dds_monitoring(True, widget.bus_channel, widget.channel)
+                dds_changed = True
             elif isinstance(widget, _DACWidget):
                 self.dac_widgets[(widget.spi_channel, widget.channel)] = widget
-                self.dac_cb()
                 self.setup_dac_monitoring(True, widget.spi_channel, widget.channel)
+                dac_changed = True
             else:
                 raise ValueError
 
-        self.description = description
+        if ttl_changed:
+            self.ttl_cb()
+        if dds_changed:
+            self.dds_cb()
+        if dac_changed:
+            self.dac_cb()
 
     def ttl_set_mode(self, channel, mode):
         if self.core_connection is not None:
@@ -383,7 +486,7 @@ class _DeviceManager:
             new_core_connection = CommMonInj(self.monitor_cb, self.injection_status_cb,
                     lambda: logger.error("lost connection to core device moninj"))
             try:
-                await new_core_connection.connect(self.core_addr, 1383)
+                await new_core_connection.connect(*self.core_addr)
             except:
                 logger.error("failed to connect to core device moninj", exc_info=True)
             else:
@@ -4,6 +4,7 @@ import subprocess
 import shlex
 import socket
 import os
+import time
 
 from artiq.protocols.sync_struct import Subscriber
 from artiq.protocols.pc_rpc import AsyncioClient
@@ -14,8 +15,45 @@ from artiq.tools import Condition, TaskObject
 logger = logging.getLogger(__name__)
 
 
+class PingStats:
+    """Latency statistics of the pings of a controller."""
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.last = None
+        self.min = None
+        self.max = None
+        self.total = 0.0
+
+    def record(self, latency):
+        """Records a successful ping, or a failed one if ``latency`` is
+        ``None``."""
+        self.last = latency
+        if latency is None:
+            self.failures += 1
+            return
+        self.count += 1
+        self.total += latency
+        if self.min is None or latency < self.min:
+            self.min = latency
+        if self.max is None or latency > self.max:
+            self.max = latency
+
+    def get(self):
+        """Returns the statistics as a dictionary. Latencies are in
+        seconds."""
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "last": self.last,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total/self.count if self.count else None
+        }
+
+
 class Controller:
-    def __init__(self, name, ddb_entry):
+    def __init__(self, name, ddb_entry, ping_semaphore=None):
         self.name = name
         self.command = ddb_entry["command"]
         self.retry_timer = ddb_entry.get("retry_timer", 5)
@@ -30,32 +68,61 @@ class Controller:
         self.retry_timer_cur = self.retry_timer
         self.retry_now = Condition()
         self.process = None
+        # RPC session kept across calls, opened on demand
+        self.remote = None
+        self.ping_semaphore = ping_semaphore
+        self.ping_stats = PingStats()
         self.launch_task = asyncio.ensure_future(self.launcher())
 
     async def end(self):
         self.launch_task.cancel()
         await asyncio.wait_for(self.launch_task, None)
 
+    async def _get_remote(self):
+        if self.remote is None:
+            remote = AsyncioClient()
+            await remote.connect_rpc(self.host, self.port, None)
+            try:
+                targets, _ = remote.get_rpc_id()
+                await remote.select_rpc_target(targets[0])
+            except:
+                remote.close_rpc()
+                raise
+            self.remote = remote
+        return self.remote
+
+    def _close_remote(self):
+        if self.remote is not None:
+            self.remote.close_rpc()
+            self.remote = None
+
     async def call(self, method, *args, **kwargs):
-        remote = AsyncioClient()
-        await remote.connect_rpc(self.host, self.port, None)
+        remote = await self._get_remote()
         try:
-            targets, _ = remote.get_rpc_id()
-            await remote.select_rpc_target(targets[0])
-            r = await getattr(remote, method)(*args, **kwargs)
-        finally:
-            remote.close_rpc()
-        return r
+            return await getattr(remote, method)(*args, **kwargs)
+        except:
+            # the session may be broken, or hold the reply of a
+            # cancelled call
+            self._close_remote()
+            raise
 
     async def _ping(self):
+        if self.ping_semaphore is None:
+            return await self._ping_timed()
+        async with self.ping_semaphore:
+            return await self._ping_timed()
+
+    async def _ping_timed(self):
+        t0 = time.monotonic()
         try:
             ok = await asyncio.wait_for(self.call("ping"),
                                         self.ping_timeout)
-            if ok:
-                self.retry_timer_cur = self.retry_timer
-            return ok
         except:
-            return False
+            ok = False
+        self.ping_stats.record(time.monotonic() - t0 if ok else None)
+        if ok:
+            self.retry_timer_cur = self.retry_timer
+        return ok
 
     async def _wait_and_ping(self):
         while True:
@@ -94,6 +161,7 @@ class Controller:
                         LogParser(self._get_log_source).stream_task(
                             self.process.stderr))
                     await self._wait_and_ping()
+                    self._close_remote()
                 except FileNotFoundError:
                     logger.warning("Controller %s failed to start", self.name)
                 else:
@@ -115,7 +183,11 @@ class Controller:
             return
         logger.debug("Terminating controller %s", self.name)
         try:
-            await asyncio.wait_for(self.call("terminate"), self.term_timeout)
+            try:
+                await asyncio.wait_for(self.call("terminate"),
+                                       self.term_timeout)
+            finally:
+                self._close_remote()
             await asyncio.wait_for(self.process.wait(), self.term_timeout)
             logger.info("Controller %s terminated", self.name)
             return
@@ -155,8 +227,12 @@ def get_ip_addresses(host):
 
 
 class Controllers:
-    def __init__(self):
+    def __init__(self, ping_concurrency=None):
         self.host_filter = None
+        if ping_concurrency:
+            self.ping_semaphore = asyncio.Semaphore(ping_concurrency)
+        else:
+            self.ping_semaphore = None
         self.active_or_queued = set()
         self.queue = asyncio.Queue()
         self.active = dict()
@@ -169,7 +245,8 @@ class Controllers:
                 k, ddb_entry = param
                 if k in self.active:
                     await self.active[k].end()
-                self.active[k] = Controller(k, ddb_entry)
+                self.active[k] = Controller(k, ddb_entry,
+                                            self.ping_semaphore)
             elif action == "del":
                 await self.active[param].end()
                 del self.active[param]
@@ -202,8 +279,8 @@ class Controllers:
 
 
 class ControllerDB:
-    def __init__(self):
-        self.current_controllers = Controllers()
+    def __init__(self, ping_concurrency=None):
+        self.current_controllers = Controllers(ping_concurrency)
 
     def set_host_filter(self, host_filter):
         self.current_controllers.host_filter = host_filter
@@ -217,11 +294,11 @@ class ControllerDB:
 
 
 class ControllerManager(TaskObject):
-    def __init__(self, server, port, retry_master):
+    def __init__(self, server, port, retry_master, ping_concurrency=None):
         self.server = server
         self.port = port
         self.retry_master = retry_master
-        self.controller_db = ControllerDB()
+        self.controller_db = ControllerDB(ping_concurrency)
 
     async def _do(self):
         try:
@@ -256,3 +333,9 @@ class ControllerManager(TaskObject):
         """If a controller is disabled and pending retry, perform that retry
         now."""
         self.controller_db.current_controllers.active[k].retry_now.notify()
+
+    def get_ping_stats(self):
+        """Returns the ping latency statistics of the active controllers,
+        keyed by controller name."""
+        return {k: c.ping_stats.get() for k, c in
+                self.controller_db.current_controllers.active.items()}
@@ -18,6 +18,16 @@ device_db = {
         "port": 1068,
         "command": "aqctl_corelog -p {port} --bind {bind} " + core_addr
     },
+    # Uncomment to share one moninj connection to the core device between
+    # all dashboards. "host" must then be an address of the machine running
+    # the controller manager that all dashboards can reach.
+    # "core_moninj": {
+    #     "type": "controller",
+    #     "host": "::1",
+    #     "port_proxy": 1383,
+    #     "port": 1384,
+    #     "command": "aqctl_moninj_proxy --port-proxy 1383 --port-control {port} --bind {bind} " + core_addr
+    # },
     "core_cache": {
         "type": "local",
         "module": "artiq.coredevice.cache",
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+
+from artiq.tools import *
+from artiq.protocols.pc_rpc import Server
+from artiq.coredevice.analyzer_capture import (AnalyzerStore,
+                                               AnalyzerCapture, encode_dump)
+
+
+def get_argparser():
+    parser = argparse.ArgumentParser(
+        description="ARTIQ controller for continuous core device "
+                    "RTIO analyzer capture",
+        epilog="Captured messages can be retrieved with the 'query' RPC "
+               "method, which returns a raw analyzer dump that "
+               "artiq_coreanalyzer -r can read.")
+    verbosity_args(parser)
+    simple_network_args(parser, 1385)
+    parser.add_argument("--interval", default=1.0, type=float,
+                        help="interval in seconds between captures "
+                             "(default: %(default)s)")
+    parser.add_argument("--segment-size", default=16, type=float,
+                        help="size of the storage segment files in MiB "
+                             "(default: %(default)s)")
+    parser.add_argument("--max-size", default=1024, type=float,
+                        help="maximum total size of the stored messages "
+                             "in MiB (default: %(default)s)")
+    parser.add_argument("--max-age", default=None, type=float,
+                        help="delete stored messages older than this "
+                             "number of seconds (default: keep)")
+    parser.add_argument("directory",
+                        help="directory where the messages are stored")
+    parser.add_argument("core_addr",
+                        help="hostname or IP address of the core device")
+    return parser
+
+
+class CaptureTarget:
+    def __init__(self, store):
+        self.store = store
+
+    def ping(self):
+        return True
+
+    def get_range(self):
+        """Returns the RTIO counter values of the first and last stored
+        messages, or ``None``."""
+        return self.store.get_range()
+
+    def query(self, start=None, stop=None):
+        """Returns the stored messages with RTIO counter values in
+        ``[start, stop)`` as a raw analyzer dump."""
+        return encode_dump(self.store.query(start, stop))
+
+
+def main():
+    args = get_argparser().parse_args()
+    init_logger(args)
+
+    store = AnalyzerStore(args.directory,
+                          segment_size=int(args.segment_size*2**20),
+                          max_size=int(args.max_size*2**20),
+                          max_age=args.max_age)
+    capture = AnalyzerCapture(store, args.core_addr, interval=args.interval)
+
+    loop = asyncio.get_event_loop()
+    try:
+        capture.start()
+        try:
+            server = Server({"coreanalyzer": CaptureTarget(store)},
+                            None, True)
+            loop.run_until_complete(server.start(
+                bind_address_from_args(args), args.port))
+            try:
+                loop.run_until_complete(server.wait_terminate())
+            finally:
+                loop.run_until_complete(server.stop())
+        finally:
+            loop.run_until_complete(capture.stop())
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import logging
+import struct
+
+from artiq.tools import *
+from artiq.protocols.pc_rpc import Server
+from artiq.protocols.asyncio_server import AsyncioServer
+from artiq.coredevice.comm_moninj import CommMonInj
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_argparser():
+    parser = argparse.ArgumentParser(
+        description="ARTIQ core device monitoring/injection proxy",
+        epilog="Holds a single moninj connection to the core device and "
+               "serves the moninj protocol to any number of clients "
+               "(e.g. dashboards), merging their probe subscriptions.")
+    verbosity_args(parser)
+    simple_network_args(parser, [
+        ("proxy", "proxying", 1383),
+        ("control", "control", 1384)
+    ])
+    parser.add_argument("--update-interval", default=0.05, type=float,
+                        help="minimum interval in seconds between probe "
+                             "updates sent to clients (default: "
+                             "%(default)s)")
+    parser.add_argument("core_addr",
+                        help="hostname or IP address of the core device")
+    return parser
+
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.probes = set()
+
+    def send_monitor(self, channel, probe, value):
+        self.writer.write(b"\x00" + struct.pack(">lbl", channel, probe, value))
+
+    def send_injection_status(self, channel, override, value):
+        self.writer.write(b"\x01" + struct.pack(">lbb",
+                                                channel, override, value))
+
+
+class MonInjProxy(AsyncioServer):
+    """Serves the core device moninj protocol to several clients over a
+    single connection to the core device.
+
+    A probe is monitored on the core device as long as at least one client
+    monitors it. Probe values are sent to clients at most once per
+    ``update_interval``, with only the latest value of each probe.
+    Injection status replies are sent to the clients that requested them.
+
+    :param core_addr: host name or IP address of the core device.
+    :param core_port: TCP port of the moninj service of the core device.
+    :param update_interval: minimum interval in seconds between probe
+        updates sent to clients.
+    :param reconnect_interval: delay in seconds before reconnecting to the
+        core device after the connection was lost or could not be
+        established.
+    """
+    def __init__(self, core_addr, core_port=1383, update_interval=0.05,
+                 reconnect_interval=5.0):
+        AsyncioServer.__init__(self)
+        self.core_addr = core_addr
+        self.core_port = core_port
+        self.update_interval = update_interval
+        self.reconnect_interval = reconnect_interval
+
+        self.connection = None
+        self.clients = set()
+        # (channel, probe) -> set of clients
+        self.monitors = dict()
+        # (channel, probe) -> last value received from the core device
+        self.values = dict()
+        # (channel, probe) -> value, not yet sent to the clients
+        self.pending_values = dict()
+        self.flush_handle = None
+        # (channel, override) -> set of clients waiting for the status
+        self.injection_status_requests = dict()
+
+    async def start(self, host, port):
+        await AsyncioServer.start(self, host, port)
+        self.connected = asyncio.Event()
+        self.disconnected = asyncio.Event()
+        self.connector_task = asyncio.ensure_future(self._connector())
+
+    async def stop(self):
+        self.connector_task.cancel()
+        try:
+            await asyncio.wait_for(self.connector_task, None)
+        except asyncio.CancelledError:
+            pass
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        await AsyncioServer.stop(self)
+
+    async def _connector(self):
+        while True:
+            connection = CommMonInj(self._monitor_cb,
+                                    self._injection_status_cb,
+                                    self.disconnected.set)
+            try:
+                await connection.connect(self.core_addr, self.core_port)
+            except (OSError, asyncio.TimeoutError):
+                logger.error("failed to connect to core device moninj, "
+                             "retrying in %.1fs", self.reconnect_interval,
+                             exc_info=True)
+                await asyncio.sleep(self.reconnect_interval)
+                continue
+            logger.info("connected to core device moninj")
+            self.connection = connection
+            self.disconnected.clear()
+            self.connected.set()
+            try:
+                for channel, probe in self.monitors.keys():
+                    connection.monitor(True, channel, probe)
+                await self.disconnected.wait()
+                logger.error("lost connection to core device moninj, "
+                             "reconnecting in %.1fs", self.reconnect_interval)
+            finally:
+                self.connected.clear()
+                self.connection = None
+                await connection.close()
+            self.values.clear()
+            self.injection_status_requests.clear()
+            await asyncio.sleep(self.reconnect_interval)
+
+    def _monitor_cb(self, channel, probe, value):
+        key = channel, probe
+        if self.values.get(key) == value:
+            return
+        self.values[key] = value
+        self.pending_values[key] = value
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_event_loop().call_later(
+                self.update_interval, self._flush)
+
+    def _flush(self):
+        self.flush_handle = None
+        pending_values = self.pending_values
+        self.pending_values = dict()
+        for (channel, probe), value in pending_values.items():
+            for client in self.monitors.get((channel, probe), ()):
+                client.send_monitor(channel, probe, value)
+
+    def _injection_status_cb(self, channel, override, value):
+        for client in self.injection_status_requests.pop((channel, override),
+                                                         ()):
+            client.send_injection_status(channel, override, value)
+
+    def _monitor(self, client, enable, channel, probe):
+        key = channel, probe
+        if enable:
+            if key in client.probes:
+                return
+            client.probes.add(key)
+            clients = self.monitors.setdefault(key, set())
+            clients.add(client)
+            if len(clients) == 1:
+                if self.connection is not None:
+                    self.connection.monitor(True, channel, probe)
+            elif key in self.values:
+                client.send_monitor(channel, probe, self.values[key])
+        else:
+            if key not in client.probes:
+                return
+            client.probes.remove(key)
+            clients = self.monitors[key]
+            clients.remove(client)
+            if not clients:
+                del self.monitors[key]
+                self.values.pop(key, None)
+                self.pending_values.pop(key, None)
+                if self.connection is not None:
+                    self.connection.monitor(False, channel, probe)
+
+    def _inject(self, client, channel, override, value):
+        if self.connection is None:
+            logger.warning("not connected to core device, "
+                           "dropping injection")
+            return
+        self.connection.inject(channel, override, value)
+
+    def _get_injection_status(self, client, channel, override):
+        if self.connection is None:
+            return
+        key = channel, override
+        clients = self.injection_status_requests.setdefault(key, set())
+        if not clients:
+            self.connection.get_injection_status(channel, override)
+        clients.add(client)
+
+    async def _handle_connection_cr(self, reader, writer):
+        try:
+            line = await reader.readline()
+            if line != b"ARTIQ moninj\n":
+                logger.error("incorrect magic")
+                return
+            client = _Client(writer)
+            self.clients.add(client)
+            try:
+                while True:
+                    ty = await reader.read(1)
+                    if not ty:
+                        return
+                    if ty == b"\x00":
+                        enable, channel, probe = struct.unpack(
+                            ">blb", await reader.readexactly(6))
+                        self._monitor(client, enable, channel, probe)
+                    elif ty == b"\x01":
+                        channel, override, value = struct.unpack(
+                            ">lbb", await reader.readexactly(6))
+                        self._inject(client, channel, override, value)
+                    elif ty == b"\x02":
+                        channel, override = struct.unpack(
+                            ">lb", await reader.readexactly(5))
+                        self._get_injection_status(client, channel, override)
+                    else:
+                        logger.error("unknown packet type %r", ty)
+                        return
+            finally:
+                self.clients.remove(client)
+                for channel, probe in list(client.probes):
+                    self._monitor(client, False, channel, probe)
+                for clients in self.injection_status_requests.values():
+                    clients.discard(client)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class PingTarget:
+    def ping(self):
+        return True
+
+
+def main():
+    args = get_argparser().parse_args()
+    init_logger(args)
+
+    bind = bind_address_from_args(args)
+
+    loop = asyncio.get_event_loop()
+    try:
+        proxy = MonInjProxy(args.core_addr,
+                            update_interval=args.update_interval)
+        loop.run_until_complete(proxy.start(bind, args.port_proxy))
+        try:
+            server = Server({"moninj_proxy": PingTarget()}, None, True)
+            loop.run_until_complete(server.start(bind, args.port_control))
+            try:
+                loop.run_until_complete(server.wait_terminate())
+            finally:
+                loop.run_until_complete(server.stop())
+        finally:
+            loop.run_until_complete(proxy.stop())
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
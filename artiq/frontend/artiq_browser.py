@@ -11,9 +11,11 @@ from quamash import QEventLoop
 
 from artiq import __artiq_dir__ as artiq_dir
 from artiq.tools import (verbosity_args, atexit_register_coroutine,
-                         get_user_config_dir)
+                         get_user_config_dir, get_user_cache_dir)
 from artiq.gui import state, applets, models, log
 from artiq.browser import datasets, files, experiments
+from artiq.browser.h5datasets import load
+from artiq.master.results_index import ResultsIndex
 
 
 logger = logging.getLogger(__name__)
@@ -36,15 +38,24 @@ def get_argparser():
     parser.add_argument(
         "--port", default=3251, type=int,
         help="TCP port to use to connect to the master")
+    parser.add_argument("--results-index", default=None,
+                        help="results index of the master, used to look up "
+                        "runs by RID; the results directory is expected "
+                        "next to it")
     parser.add_argument("select", metavar="SELECT", nargs="?",
-                        help="directory to browse or file to load")
+                        help="directory to browse, file to load, or RID "
+                        "of the run to load (requires --results-index)")
+    parser.add_argument("--cache-dir",
+                        default=os.path.join(get_user_cache_dir(), "browser"),
+                        help="directory for cached HDF5 file metadata and "
+                        "thumbnails (default: %(default)s)")
     verbosity_args(parser)
     return parser
 
 
 class Browser(QtWidgets.QMainWindow):
     def __init__(self, smgr, datasets_sub, browse_root,
-                 master_host, master_port):
+                 master_host, master_port, cache_dir=None):
         QtWidgets.QMainWindow.__init__(self)
         smgr.register(self)
 
@@ -68,15 +79,18 @@ class Browser(QtWidgets.QMainWindow):
             QtCore.Qt.ScrollBarAsNeeded)
         self.setCentralWidget(self.experiments)
 
-        self.files = files.FilesDock(datasets_sub, browse_root)
+        self.files = files.FilesDock(datasets_sub, browse_root, cache_dir)
         smgr.register(self.files)
+        atexit.register(self.files.stop)
 
         self.files.dataset_activated.connect(
             self.experiments.dataset_activated)
         self.files.dataset_changed.connect(
             self.experiments.dataset_changed)
 
-        self.applets = applets.AppletsDock(self, datasets_sub)
+        # Large datasets are read only when an applet needs them.
+        self.applets = applets.AppletsDock(self, datasets_sub,
+                                           load_value=load)
         smgr.register(self.applets)
         atexit_register_coroutine(self.applets.stop)
 
@@ -129,6 +143,20 @@ class Browser(QtWidgets.QMainWindow):
         self.restoreGeometry(QtCore.QByteArray(state["geometry"]))
 
 
+def run_path(results_index, rid):
+    index = ResultsIndex(results_index)
+    try:
+        run = index.get(rid)
+    finally:
+        index.close()
+    if run is None:
+        logger.warning("RID %d not found in results index", rid)
+        return None
+    results_dir = os.path.join(
+        os.path.dirname(os.path.abspath(results_index)), "results")
+    return os.path.join(results_dir, run["path"])
+
+
 def main():
     # initialize application
     args = get_argparser().parse_args()
@@ -145,7 +173,7 @@ def main():
     smgr = state.StateManager(args.db_file)
 
     browser = Browser(smgr, datasets_sub, args.browse_root,
-                      args.server, args.port)
+                      args.server, args.port, args.cache_dir)
     widget_log_handler.callback = browser.log.append_message
 
     if os.name == "nt":
@@ -158,7 +186,11 @@ def main():
     atexit_register_coroutine(smgr.stop)
 
     if args.select is not None:
-        browser.files.select(args.select)
+        select = args.select
+        if args.results_index is not None and select.isdigit():
+            select = run_path(args.results_index, int(select))
+        if select is not None:
+            browser.files.select(select)
 
     browser.show()
     loop.run_until_complete(browser.exit_request.wait())
@@ -111,6 +111,20 @@ def get_argparser():
         "ls", help="list a directory on the master")
     parser_ls.add_argument("directory", default="", nargs="?")
 
+    parser_results = subparsers.add_parser(
+        "results", help="look up runs in the results index of the master")
+    parser_results.add_argument("-c", "--class-name", default=None,
+                                help="only show runs of this class")
+    parser_results.add_argument("-f", "--file", default=None,
+                                help="only show runs of this experiment file")
+    parser_results.add_argument("-d", "--dataset", default=None,
+                                help="only show runs that saved this dataset")
+    parser_results.add_argument("-n", "--limit", default=20, type=int,
+                                help="maximum number of runs to show "
+                                     "(default: %(default)s)")
+    parser_results.add_argument("rid", metavar="RID", type=int, nargs="?",
+                                help="show the details of this run")
+
     return parser
 
 
@@ -187,6 +201,42 @@ def _action_ls(remote, args):
         print(name)
 
 
+def _action_results(remote, args):
+    if args.rid is not None:
+        run = remote.get(args.rid)
+        if run is None:
+            print("RID {} not found in the results index".format(args.rid))
+            sys.exit(1)
+        for k in "rid", "path", "file", "class_name", "repo_rev", \
+                 "artiq_version":
+            print("{}: {}".format(k, run[k]))
+        for k in "start_time", "run_time":
+            if run[k] is not None:
+                print("{}: {}".format(k, time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(run[k]))))
+        print("arguments: " + pyon.encode(run["arguments"], True))
+        table = PrettyTable(["Dataset", "Archive", "Shape", "Type"])
+        for archive in "datasets", "archive":
+            for name, (shape, dtype) in sorted(run[archive].items()):
+                table.add_row([name, "Y" if archive == "archive" else "N",
+                               tuple(shape), dtype])
+        print(table)
+    else:
+        runs = remote.query(class_name=args.class_name, file=args.file,
+                            dataset=args.dataset, limit=args.limit)
+        table = PrettyTable(["RID", "Start time", "Revision", "File",
+                             "Class name", "Path"])
+        for run in runs:
+            if run["start_time"] is None:
+                start_time = ""
+            else:
+                start_time = time.strftime("%Y-%m-%d %H:%M:%S",
+                                           time.localtime(run["start_time"]))
+            table.add_row([run["rid"], start_time, run["repo_rev"],
+                           run["file"], run["class_name"], run["path"]])
+        print(table)
+
+
 def _show_schedule(schedule):
     clear_screen()
     if schedule:
@@ -310,7 +360,8 @@ def main():
             "del_dataset": "master_dataset_db",
             "scan_devices": "master_device_db",
             "scan_repository": "master_experiment_db",
-            "ls": "master_experiment_db"
+            "ls": "master_experiment_db",
+            "results": "master_results_index"
         }[action]
         remote = Client(args.server, port, target_name)
         try:
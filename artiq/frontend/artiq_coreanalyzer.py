@@ -8,6 +8,7 @@ from artiq.master.databases import DeviceDB
 from artiq.master.worker_db import DeviceManager
 from artiq.coredevice.comm_analyzer import (get_analyzer_dump,
                                             decode_dump, decoded_dump_to_vcd)
+from artiq.coredevice.analyzer_data import AnalyzerData
 
 
 def get_argparser():
@@ -26,6 +27,10 @@ def get_argparser():
                         help="format and write contents to VCD file")
     parser.add_argument("-d", "--write-dump", type=str, default=None,
                         help="write raw dump file")
+    parser.add_argument("-e", "--export", type=str, default=None,
+                        help="write decoded messages, by channel and "
+                             "message type, to a HDF5 (.h5) or NumPy (.npz) "
+                             "file")
     return parser
 
 
@@ -33,9 +38,10 @@ def main():
     args = get_argparser().parse_args()
     init_logger(args)
 
-    if (not args.print_decoded
-            and args.write_vcd is None and args.write_dump is None):
-        print("No action selected, use -p, -w and/or -d. See -h for help.")
+    if (not args.print_decoded and args.write_vcd is None
+            and args.write_dump is None and args.export is None):
+        print("No action selected, use -p, -w, -d and/or -e. "
+              "See -h for help.")
         sys.exit(1)
 
     device_mgr = DeviceManager(DeviceDB(args.device_db))
@@ -58,6 +64,9 @@ def main():
     if args.write_dump:
         with open(args.write_dump, "wb") as f:
             f.write(dump)
+    if args.export:
+        AnalyzerData.from_dump(decoded_dump, device_mgr.get_device_db()) \
+            .save(args.export)
 
 
 if __name__ == "__main__":
@@ -184,10 +184,7 @@ def main():
                 writer = CallgrindWriter(args.output, args.firmware, "or1k-linux",
                                          args.compression, args.demangle)
                 writer.header()
-                for addr, count in hits.items():
-                    writer.hit(addr, count)
-                for (caller, callee), count in edges.items():
-                    writer.edge(caller, callee, count)
+                writer.profile(hits, edges)
 
         if args.tool == "debug":
             if args.action == "allocator":
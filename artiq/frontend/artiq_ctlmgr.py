@@ -35,6 +35,10 @@ def get_argparser():
     parser.add_argument(
         "--retry-master", default=5.0, type=float,
         help="retry timer for reconnecting to master")
+    parser.add_argument(
+        "--ping-concurrency", default=0, type=int,
+        help="maximum number of controllers pinged at the same time "
+             "(default: 0, unlimited)")
     simple_network_args(parser, [("control", "control", 3249)])
     return parser
 
@@ -68,12 +72,13 @@ def main():
     atexit_register_coroutine(logfwd.stop)
 
     ctlmgr = ControllerManager(args.server, args.port_notify,
-                               args.retry_master)
+                               args.retry_master, args.ping_concurrency)
     ctlmgr.start()
     atexit_register_coroutine(ctlmgr.stop)
 
     class CtlMgrRPC:
         retry_now = ctlmgr.retry_now
+        get_ping_stats = ctlmgr.get_ping_stats
 
     rpc_target = CtlMgrRPC()
     rpc_server = Server({"ctlmgr": rpc_target}, builtin_terminate=True)
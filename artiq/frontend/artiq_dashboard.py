@@ -39,6 +39,10 @@ def get_argparser():
         help="database file for local GUI settings, "
              "by default in {} and dependant on master hostname".format(
                                                         get_user_config_dir()))
+    parser.add_argument(
+        "--log-depth", default=20000, type=int,
+        help="maximum number of entries kept by each log dock "
+             "(default: %(default)d)")
     verbosity_args(parser)
     return parser
 
@@ -187,7 +191,7 @@ def main():
         rpc_clients["schedule"], sub_clients["schedule"])
     smgr.register(d_schedule)
 
-    logmgr = log.LogDockManager(main_window)
+    logmgr = log.LogDockManager(main_window, args.log_depth)
     smgr.register(logmgr)
     broadcast_clients["log"].notify_cbs.append(logmgr.append_message)
     widget_log_handler.callback = logmgr.append_message
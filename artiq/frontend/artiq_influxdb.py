@@ -5,6 +5,7 @@ import logging
 import asyncio
 import atexit
 import fnmatch
+from collections import OrderedDict
 from functools import partial
 import time
 
@@ -30,7 +31,11 @@ def get_argparser():
                "Optional + and - pattern prefixes specify whether to ignore or "
                "log keys matching the rest of the pattern. "
                "Default (in the absence of prefix) is to ignore. Last matched "
-               "pattern takes precedence.")
+               "pattern takes precedence. "
+               "A pattern can be followed by space-separated reducers, which "
+               "log array datasets matching it as numeric fields instead of "
+               "PYON strings: min, max, mean, std, sum, size, first, last, "
+               "or an integer index (e.g. \"+counts.* mean max -1\").")
     group = parser.add_argument_group("master")
     group.add_argument(
         "--server-master", default="::1",
@@ -53,6 +58,22 @@ def get_argparser():
         "--database", default="db", help="database name to use")
     group.add_argument(
         "--table", default="lab", help="table name to use")
+    group.add_argument(
+        "--batch-size", default=1000, type=int,
+        help="maximum number of updates written in one request "
+             "(default: %(default)s)")
+    group.add_argument(
+        "--flush-interval", default=1.0, type=float,
+        help="maximum time in seconds an update waits before being "
+             "written (default: %(default)s)")
+    group.add_argument(
+        "--max-pending", default=100000, type=int,
+        help="maximum number of pending updates, above which further "
+             "updates are dropped (default: %(default)s)")
+    group.add_argument(
+        "--retries", default=3, type=int,
+        help="number of times a failed write is retried "
+             "(default: %(default)s)")
     group = parser.add_argument_group("filter")
     group.add_argument(
         "--pattern-file", default="influxdb_patterns.cfg",
@@ -64,7 +85,59 @@ def get_argparser():
     return parser
 
 
-def format_influxdb(v):
+array_reducers = {
+    "min": np.min,
+    "max": np.max,
+    "mean": np.mean,
+    "std": np.std,
+    "sum": np.sum,
+    "first": lambda a: a.flat[0],
+    "last": lambda a: a.flat[-1]
+}
+
+
+def parse_reducer(reducer):
+    """Returns the name of a reducer, or its index for integer indices."""
+    if reducer == "size" or reducer in array_reducers:
+        return reducer
+    try:
+        return int(reducer)
+    except ValueError:
+        raise ValueError("unknown reducer '{}'".format(reducer)) from None
+
+
+def reduce_array(v, reducer_list):
+    """Returns the line protocol fields of a numeric array reduced with the
+    given reducers, or ``None`` if ``v`` is not a numeric array.
+
+    Reducer values are written as floats, the array size as integer.
+    Non-finite values and out-of-range indices are left out.
+    """
+    if not isinstance(v, (np.ndarray, list, tuple)):
+        return None
+    a = np.asarray(v)
+    if a.dtype.kind not in "biuf":
+        return None
+    fields = []
+    for reducer in reducer_list:
+        if reducer == "size":
+            fields.append("size={}i".format(a.size))
+            continue
+        if isinstance(reducer, int):
+            if not -a.size <= reducer < a.size:
+                continue
+            name, x = "[{}]".format(reducer), a.flat[reducer]
+        elif a.size:
+            name, x = reducer, array_reducers[reducer](a)
+        else:
+            continue
+        x = float(x)
+        if np.isfinite(x):
+            fields.append("{}={}".format(name, x))
+    return ",".join(fields)
+
+
+def format_influxdb(v, reducer_list=None):
     if np.issubdtype(type(v), np.bool_):
         return "bool={}".format(v)
     if np.issubdtype(type(v), np.integer):
@@ -73,47 +146,95 @@ def format_influxdb(v):
         return "float={}".format(v)
     if np.issubdtype(type(v), np.str_):
         return "str=\"{}\"".format(v.replace('"', '\\"'))
+    if reducer_list:
+        fields = reduce_array(v, reducer_list)
+        if fields:
+            return fields
     return "pyon=\"{}\"".format(pyon.encode(v).replace('"', '\\"'))
 
 
 class DBWriter(TaskObject):
-    def __init__(self, base_url, user, password, database, table):
+    """Writes dataset updates to InfluxDB in batches.
+
+    Updates are written when ``batch_size`` of them are pending, or after
+    at most ``flush_interval`` seconds. Repeated updates of a dataset that
+    is already pending replace the pending one. At most ``max_pending``
+    updates are held, further ones are dropped. Failed writes are retried
+    ``retries`` times with exponential backoff, while new updates keep
+    accumulating.
+    """
+    def __init__(self, base_url, user, password, database, table,
+                 batch_size=1000, flush_interval=1.0, max_pending=100000,
+                 retries=3, retry_interval=1.0):
         self.base_url = base_url
         self.user = user
         self.password = password
         self.database = database
         self.table = table
-
-        self._queue = asyncio.Queue(100)
-
-    def update(self, k, v):
-        try:
-            self._queue.put_nowait((k, v, time.time()))
-        except asyncio.QueueFull:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retries = retries
+        self.retry_interval = retry_interval
+
+        # dataset -> line protocol of its most recent update
+        self._pending = OrderedDict()
+        self._batch_ready = asyncio.Event()
+
+    def update(self, k, v, reducer_list=None):
+        if k not in self._pending and len(self._pending) >= self.max_pending:
             logger.warning("failed to update dataset '%s': "
                            "too many pending updates", k)
+            return
+        self._pending[k] = "{},dataset={} {} {}".format(
+            self.table, k, format_influxdb(v, reducer_list),
+            round(time.time()*1e3))
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+
+    def _take_batch(self):
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popitem(last=False)[1])
+        return batch
+
+    async def _write(self, session, batch):
+        url = self.base_url + "/write"
+        params = {"u": self.user, "p": self.password, "db": self.database,
+                  "precision": "ms"}
+        data = "\n".join(batch)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_interval*2**(attempt - 1))
+            try:
+                async with session.post(url, params=params,
+                                        data=data) as response:
+                    if response.status in (200, 204):
+                        return
+                    content = (await response.text()).strip()
+            except (aiohttp.ClientError, OSError, asyncio.TimeoutError):
+                logger.warning("got exception trying to write %d updates",
+                               len(batch), exc_info=True)
+                continue
+            logger.warning("got HTTP status %d trying to write %d updates: "
+                           "%s", response.status, len(batch), content)
+            if response.status < 500:
+                # the database rejected the data, do not retry
+                return
+        logger.warning("dropped %d updates after %d failed attempts",
+                       len(batch), self.retries + 1)
 
     async def _do(self):
-        while True:
-            k, v, t = await self._queue.get()
-            url = self.base_url + "/write"
-            params = {"u": self.user, "p": self.password, "db": self.database,
-                      "precision": "ms"}
-            data = "{},dataset={} {} {}".format(
-                self.table, k, format_influxdb(v), round(t*1e3))
-            try:
-                response = await aiohttp.request(
-                    "POST", url, params=params, data=data)
-            except:
-                logger.warning("got exception trying to update '%s'",
-                               k, exc_info=True)
-            else:
-                if response.status not in (200, 204):
-                    content = (await response.content.read()).decode().strip()
-                    logger.warning("got HTTP status %d "
-                                   "trying to update '%s': %s",
-                                   response.status, k, content)
-                response.close()
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(),
+                                           self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._batch_ready.clear()
+                while self._pending:
+                    await self._write(session, self._take_batch())
 
 
 class _Mock:
@@ -133,8 +254,9 @@ class Datasets:
         self.writer = writer
 
     def __setitem__(self, k, v):
-        if self.filter_function(k):
-            self.writer.update(k, v[1])
+        reducer_list = self.filter_function(k)
+        if reducer_list is not None:
+            self.writer.update(k, v[1], reducer_list)
 
     # ignore mutations
     def __getitem__(self, k):
@@ -192,17 +314,34 @@ class Filter:
         except FileNotFoundError:
             logger.info("no pattern file found, logging everything")
             self.patterns = []
-
-    # Privatize so that it is not shown in artiq_rpctool list-methods.
-    def _filter(self, k):
-        take = "+"
-        for pattern in self.patterns:
+        self._parsed = []
+        for line in self.patterns:
+            pattern, *reducer_list = line.split()
             sign = "-"
             if pattern[0] in "+-":
                 sign, pattern = pattern[0], pattern[1:]
+            try:
+                reducer_list = [parse_reducer(r) for r in reducer_list]
+            except ValueError as e:
+                logger.warning("ignoring reducers of pattern '%s': %s",
+                               pattern, e)
+                reducer_list = []
+            self._parsed.append((sign, pattern, reducer_list))
+
+    # Privatize so that it is not shown in artiq_rpctool list-methods.
+    def _filter(self, k):
+        return self._match(k) is not None
+
+    def _match(self, k):
+        # Returns the reducers of the last matching pattern, or None if
+        # the key is ignored.
+        take, take_reducers = "+", []
+        for sign, pattern, reducer_list in self._parsed:
             if fnmatch.fnmatchcase(k, pattern):
-                take = sign
-        return take == "+"
+                take, take_reducers = sign, reducer_list
+        if take == "+":
+            return take_reducers
+        return None
 
     def get_patterns(self):
         """Show existing patterns."""
@@ -218,7 +357,11 @@ def main():
 
     writer = DBWriter(args.baseurl_db,
                       args.user_db, args.password_db,
-                      args.database, args.table)
+                      args.database, args.table,
+                      batch_size=args.batch_size,
+                      flush_interval=args.flush_interval,
+                      max_pending=args.max_pending,
+                      retries=args.retries)
     writer.start()
     atexit_register_coroutine(writer.stop)
 
@@ -229,7 +372,7 @@ def main():
     atexit_register_coroutine(rpc_server.stop)
 
     reader = MasterReader(args.server_master, args.port_master,
-                          args.retry_master, filter._filter, writer)
+                          args.retry_master, filter._match, writer)
     reader.start()
     atexit_register_coroutine(reader.stop)
 
@@ -16,6 +16,7 @@ from artiq.master.log import log_args, init_log
 from artiq.master.databases import DeviceDB, DatasetDB
 from artiq.master.scheduler import Scheduler
 from artiq.master.worker_db import RIDCounter
+from artiq.master.results_index import ResultsIndex, ResultsIndexReader
 from artiq.master.experiments import (FilesystemBackend, GitBackend,
                                       ExperimentDB)
 
@@ -37,6 +38,9 @@ def get_argparser():
                        help="device database file (default: '%(default)s')")
     group.add_argument("--dataset-db", default="dataset_db.pyon",
                        help="dataset file (default: '%(default)s')")
+    group.add_argument("--results-index", default="results_index.sqlite",
+                       help="index of the runs in the results directory "
+                            "(default: '%(default)s')")
 
     group = parser.add_argument_group("repository")
     group.add_argument(
@@ -102,7 +106,11 @@ def main():
     experiment_db = ExperimentDB(repo_backend, worker_handlers)
     atexit.register(experiment_db.close)
 
-    scheduler = Scheduler(RIDCounter(), worker_handlers, experiment_db)
+    results_index = ResultsIndex(args.results_index)
+    atexit.register(results_index.close)
+
+    scheduler = Scheduler(RIDCounter(results_index=results_index),
+                          worker_handlers, experiment_db)
     scheduler.start()
     atexit_register_coroutine(scheduler.stop)
 
@@ -119,6 +127,7 @@ def main():
         "scheduler_get_status": scheduler.get_status,
         "scheduler_check_pause": scheduler.check_pause,
         "ccb_issue": ccb_issue,
+        "index_results": results_index.add,
     })
     experiment_db.scan_repository_async()
 
@@ -127,7 +136,8 @@ def main():
         "master_device_db": device_db,
         "master_dataset_db": dataset_db,
         "master_schedule": scheduler,
-        "master_experiment_db": experiment_db
+        "master_experiment_db": experiment_db,
+        "master_results_index": ResultsIndexReader(results_index)
     }, allow_parallel=True)
     loop.run_until_complete(server_control.start(
         bind, args.port_control))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+from artiq.tools import verbosity_args, init_logger
+from artiq.master.results_index import ResultsIndex
+
+
+def get_argparser():
+    parser = argparse.ArgumentParser(
+        description="ARTIQ results index rebuild tool",
+        epilog="Scans the results directory and recreates the index "
+               "of runs maintained by the master.")
+    verbosity_args(parser)
+    parser.add_argument("--results-dir", default="results",
+                        help="results directory (default: '%(default)s')")
+    parser.add_argument("--results-index", default="results_index.sqlite",
+                        help="index file (default: '%(default)s')")
+    parser.add_argument("-j", "--jobs", default=None, type=int,
+                        help="number of files read in parallel "
+                             "(default: number of CPUs)")
+    return parser
+
+
+def main():
+    args = get_argparser().parse_args()
+    init_logger(args)
+
+    index = ResultsIndex(args.results_index)
+    try:
+        t0 = time.monotonic()
+        n = index.rebuild(args.results_dir, args.jobs)
+        print("Indexed {} runs in {:.1f} s".format(n, time.monotonic() - t0))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
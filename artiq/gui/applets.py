@@ -5,9 +5,11 @@ import string
 import shlex
 import os
 import subprocess
+import tempfile
 from functools import partial
 from itertools import count
 
+import numpy
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from artiq.protocols.pipe_ipc import AsyncioParentComm
@@ -19,11 +21,94 @@ from artiq.gui.tools import QDockWidgetCloseDetect, LayoutWidget
 logger = logging.getLogger(__name__)
 
 
+class SharedArrays:
+    """Stores large NumPy arrays sent to applets in shared memory.
+
+    Instead of being PYON-encoded into the IPC pipe of every applet, arrays
+    of at least ``threshold`` bytes are written once into a file in shared
+    memory (``/dev/shm`` where available), and applets receive a handle with
+    the file name, shape and dtype. Applets read the file and then release
+    the handle; the file is deleted when all handles are released.
+    """
+    def __init__(self, threshold=1024*1024):
+        self.threshold = threshold
+        if os.path.isdir("/dev/shm"):
+            self.directory = "/dev/shm"
+        else:
+            self.directory = None
+        self.refcounts = dict()
+        # The same mod is forwarded to every applet, so segments are
+        # created once per mod and array.
+        self._mod = None
+        self._mod_handles = dict()
+
+    def _create(self, array):
+        array = numpy.ascontiguousarray(array)
+        fd, path = tempfile.mkstemp(prefix="artiq_applet_",
+                                    dir=self.directory)
+        with open(fd, "wb") as f:
+            array.tofile(f)
+        self.refcounts[path] = 0
+        return {"__shm__": path,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape)}
+
+    def _encode(self, obj, paths):
+        if isinstance(obj, numpy.ndarray):
+            if obj.nbytes < self.threshold or obj.dtype.hasobject:
+                return obj
+            handle = self._mod_handles.get(id(obj))
+            if handle is None or handle["__shm__"] not in self.refcounts:
+                handle = self._create(obj)
+                self._mod_handles[id(obj)] = handle
+            self.refcounts[handle["__shm__"]] += 1
+            paths.append(handle["__shm__"])
+            return handle
+        elif isinstance(obj, dict):
+            return {k: self._encode(v, paths) for k, v in obj.items()}
+        elif isinstance(obj, (list, tuple)):
+            r = [self._encode(v, paths) for v in obj]
+            return r if isinstance(obj, list) else tuple(r)
+        else:
+            return obj
+
+    def encode(self, mod):
+        """Replace large arrays in the mod with shared memory handles.
+        Returns the new mod and the list of the handles' file names,
+        which the caller must eventually :meth:`release`."""
+        if mod is not self._mod:
+            self._mod = mod
+            self._mod_handles = dict()
+        paths = []
+        return self._encode(mod, paths), paths
+
+    def release(self, path):
+        refcount = self.refcounts[path] - 1
+        if refcount:
+            self.refcounts[path] = refcount
+        else:
+            del self.refcounts[path]
+            try:
+                os.unlink(path)
+            except OSError:
+                logger.warning("failed to delete %s", path, exc_info=True)
+
+    def close(self):
+        for path in list(self.refcounts.keys()):
+            self.refcounts[path] = 1
+            self.release(path)
+
+
 class AppletIPCServer(AsyncioParentComm):
-    def __init__(self, datasets_sub):
+    def __init__(self, datasets_sub, shared_arrays=None, load_value=None):
         AsyncioParentComm.__init__(self)
         self.datasets_sub = datasets_sub
+        self.load_value = load_value
         self.datasets = set()
+        self.shared_arrays = shared_arrays
+        self.use_shared_arrays = False
+        # file name -> number of unreleased handles held by the applet
+        self.shared_handles = dict()
 
     def write_pyon(self, obj):
         self.write(pyon.encode(obj).encode() + b"\n")
@@ -34,6 +119,9 @@ class AppletIPCServer(AsyncioParentComm):
 
     def _synthesize_init(self, data):
         struct = {k: v for k, v in data.items() if k in self.datasets}
+        if self.load_value is not None:
+            struct = {k: (v[0], self.load_value(v[1]))
+                      for k, v in struct.items()}
         return {"action": "init",
                 "struct": struct}
 
@@ -47,8 +135,28 @@ class AppletIPCServer(AsyncioParentComm):
             elif mod["action"] in {"setitem", "delitem"}:
                 if mod["key"] not in self.datasets:
                     return
+        self._write_mod(mod)
+
+    def _write_mod(self, mod):
+        if self.use_shared_arrays:
+            mod, paths = self.shared_arrays.encode(mod)
+            for path in paths:
+                self.shared_handles[path] = self.shared_handles.get(path, 0) + 1
         self.write_pyon({"action": "mod", "mod": mod})
 
+    def _release(self, path):
+        refcount = self.shared_handles[path] - 1
+        if refcount:
+            self.shared_handles[path] = refcount
+        else:
+            del self.shared_handles[path]
+        self.shared_arrays.release(path)
+
+    def _release_all(self):
+        for path, refcount in list(self.shared_handles.items()):
+            for _ in range(refcount):
+                self._release(path)
+
     async def serve(self, embed_cb, fix_initial_size_cb):
         self.datasets_sub.notify_cbs.append(self._on_mod)
         try:
@@ -63,10 +171,15 @@ class AppletIPCServer(AsyncioParentComm):
                         fix_initial_size_cb()
                     elif action == "subscribe":
                         self.datasets = obj["datasets"]
+                        self.use_shared_arrays = (
+                            self.shared_arrays is not None
+                            and obj.get("shared_arrays", False))
                         if self.datasets_sub.model is not None:
                             mod = self._synthesize_init(
                                 self.datasets_sub.model.backing_store)
-                            self.write_pyon({"action": "mod", "mod": mod})
+                            self._write_mod(mod)
+                    elif action == "release":
+                        self._release(obj["path"])
                     else:
                         raise ValueError("unknown action in applet message")
                 except:
@@ -80,6 +193,8 @@ class AppletIPCServer(AsyncioParentComm):
                          "server stopped", exc_info=True)
         finally:
             self.datasets_sub.notify_cbs.remove(self._on_mod)
+            if self.shared_arrays is not None:
+                self._release_all()
 
     def start_server(self, embed_cb, fix_initial_size_cb):
         self.server_task = asyncio.ensure_future(
@@ -92,7 +207,8 @@ class AppletIPCServer(AsyncioParentComm):
 
 
 class _AppletDock(QDockWidgetCloseDetect):
-    def __init__(self, datasets_sub, uid, name, spec):
+    def __init__(self, datasets_sub, uid, name, spec, shared_arrays=None,
+                 load_value=None):
         QDockWidgetCloseDetect.__init__(self, "Applet: " + name)
         self.setObjectName("applet" + str(uid))
 
@@ -101,6 +217,8 @@ class _AppletDock(QDockWidgetCloseDetect):
         self.resize(40*qfm.averageCharWidth(), 10*qfm.lineSpacing())
 
         self.datasets_sub = datasets_sub
+        self.shared_arrays = shared_arrays
+        self.load_value = load_value
         self.applet_name = name
         self.spec = spec
 
@@ -118,7 +236,8 @@ class _AppletDock(QDockWidgetCloseDetect):
             return
         self.starting_stopping = True
         try:
-            self.ipc = AppletIPCServer(self.datasets_sub)
+            self.ipc = AppletIPCServer(self.datasets_sub, self.shared_arrays,
+                                       self.load_value)
             env = os.environ.copy()
             env["PYTHONUNBUFFERED"] = "1"
             env["ARTIQ_APPLET_EMBED"] = self.ipc.get_address()
@@ -313,7 +432,17 @@ class _CompleterDelegate(QtWidgets.QStyledItemDelegate):
 
 
 class AppletsDock(QtWidgets.QDockWidget):
-    def __init__(self, main_window, datasets_sub):
+    def __init__(self, main_window, datasets_sub, shared_array_threshold=1024*1024,
+                 load_value=None):
+        """
+        :param shared_array_threshold: size in bytes from which NumPy arrays
+            are sent to applets through shared memory (see
+            :class:`SharedArrays`), or ``None`` to always send them through
+            the IPC pipe.
+        :param load_value: function applied to the dataset values sent to
+            applets when they subscribe, e.g. to read data that is loaded
+            on demand, or ``None``.
+        """
         QtWidgets.QDockWidget.__init__(self, "Applets")
         self.setObjectName("Applets")
         self.setFeatures(QtWidgets.QDockWidget.DockWidgetMovable |
@@ -321,6 +450,11 @@ class AppletsDock(QtWidgets.QDockWidget):
 
         self.main_window = main_window
         self.datasets_sub = datasets_sub
+        self.load_value = load_value
+        if shared_array_threshold is None:
+            self.shared_arrays = None
+        else:
+            self.shared_arrays = SharedArrays(shared_array_threshold)
         self.dock_to_item = dict()
         self.applet_uids = set()
 
@@ -415,7 +549,8 @@ class AppletsDock(QtWidgets.QDockWidget):
             self.table.itemChanged.connect(self.item_changed)
 
     def create(self, uid, name, spec):
-        dock = _AppletDock(self.datasets_sub, uid, name, spec)
+        dock = _AppletDock(self.datasets_sub, uid, name, spec,
+                           self.shared_arrays, self.load_value)
         self.main_window.addDockWidget(QtCore.Qt.RightDockWidgetArea, dock)
         dock.setFloating(True)
         asyncio.ensure_future(dock.start())
@@ -594,6 +729,8 @@ class AppletsDock(QtWidgets.QDockWidget):
                 else:
                     raise ValueError
         await walk(self.table.invisibleRootItem())
+        if self.shared_arrays is not None:
+            self.shared_arrays.close()
 
     def save_state_item(self, wi):
         state = []
@@ -294,6 +294,62 @@ class _ExplicitScan(LayoutWidget):
         self.value.textEdited.connect(update)
 
 
+class _AdaptiveScan(LayoutWidget):
+    def __init__(self, procdesc, state):
+        LayoutWidget.__init__(self)
+
+        scale = procdesc["scale"]
+
+        def apply_properties(widget):
+            widget.setDecimals(procdesc["ndecimals"])
+            if procdesc["global_min"] is not None:
+                widget.setMinimum(procdesc["global_min"]/scale)
+            else:
+                widget.setMinimum(float("-inf"))
+            if procdesc["global_max"] is not None:
+                widget.setMaximum(procdesc["global_max"]/scale)
+            else:
+                widget.setMaximum(float("inf"))
+            if procdesc["global_step"] is not None:
+                widget.setSingleStep(procdesc["global_step"]/scale)
+            if procdesc["unit"]:
+                widget.setSuffix(" " + procdesc["unit"])
+            widget.setPrecision()
+            widget.setRelativeStep()
+            disable_scroll_wheel(widget)
+
+        def add_float(row, label, key):
+            widget = ScientificSpinBox()
+            apply_properties(widget)
+            self.addWidget(QtWidgets.QLabel(label), row, 0)
+            self.addWidget(widget, row, 1)
+            widget.setValue(state[key]/scale)
+            def update(value):
+                state[key] = value*scale
+            widget.valueChanged.connect(update)
+            return widget
+
+        def add_int(row, label, key):
+            widget = QtWidgets.QSpinBox()
+            widget.setMinimum(1)
+            widget.setMaximum((1 << 31) - 1)
+            disable_scroll_wheel(widget)
+            self.addWidget(QtWidgets.QLabel(label), row, 0)
+            self.addWidget(widget, row, 1)
+            widget.setValue(state[key])
+            def update(value):
+                state[key] = value
+            widget.valueChanged.connect(update)
+            return widget
+
+        add_float(0, "Start:", "start")
+        add_float(1, "Stop:", "stop")
+        add_int(2, "Initial points:", "npoints")
+        add_int(3, "Max. points:", "max_points")
+        min_step = add_float(4, "Min. step:", "min_step")
+        min_step.setMinimum(0.0)
+
+
 class ScanEntry(LayoutWidget):
     def __init__(self, argument):
         LayoutWidget.__init__(self)
@@ -308,6 +364,10 @@ class ScanEntry(LayoutWidget):
         self.widgets["NoScan"] = _NoScan(procdesc, state["NoScan"])
         self.widgets["RangeScan"] = _RangeScan(procdesc, state["RangeScan"])
         self.widgets["ExplicitScan"] = _ExplicitScan(state["ExplicitScan"])
+        # States saved by earlier versions lack the adaptive scan.
+        if "AdaptiveScan" not in state:
+            state["AdaptiveScan"] = self.default_state(procdesc)["AdaptiveScan"]
+        self.widgets["AdaptiveScan"] = _AdaptiveScan(procdesc, state["AdaptiveScan"])
         for widget in self.widgets.values():
             self.stack.addWidget(widget)
 
@@ -315,6 +375,7 @@ class ScanEntry(LayoutWidget):
         self.radiobuttons["NoScan"] = QtWidgets.QRadioButton("No scan")
         self.radiobuttons["RangeScan"] = QtWidgets.QRadioButton("Range")
         self.radiobuttons["ExplicitScan"] = QtWidgets.QRadioButton("Explicit")
+        self.radiobuttons["AdaptiveScan"] = QtWidgets.QRadioButton("Adaptive")
         scan_type = QtWidgets.QButtonGroup()
         for n, b in enumerate(self.radiobuttons.values()):
             self.addWidget(b, 0, n)
@@ -343,7 +404,9 @@ class ScanEntry(LayoutWidget):
             "NoScan": {"value": 0.0, "repetitions": 1},
             "RangeScan": {"start": 0.0, "stop": 100.0*scale, "npoints": 10,
                           "randomize": False},
-            "ExplicitScan": {"sequence": []}
+            "ExplicitScan": {"sequence": []},
+            "AdaptiveScan": {"start": 0.0, "stop": 100.0*scale, "npoints": 10,
+                             "max_points": 100, "min_step": 0.0}
         }
         if "default" in procdesc:
             defaults = procdesc["default"]
@@ -363,6 +426,10 @@ class ScanEntry(LayoutWidget):
                     state[ty]["seed"] = default["seed"]
                 elif ty == "ExplicitScan":
                     state[ty]["sequence"] = default["sequence"]
+                elif ty == "AdaptiveScan":
+                    for key in ("start", "stop", "npoints", "max_points",
+                                "min_step"):
+                        state[ty][key] = default[key]
                 else:
                     logger.warning("unknown default type: %s", ty)
         return state
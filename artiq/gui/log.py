@@ -2,6 +2,7 @@ import asyncio
 import logging
 import time
 import re
+import collections
 from functools import partial
 
 from PyQt5 import QtCore, QtGui, QtWidgets
@@ -11,23 +12,63 @@ from artiq.gui.tools import (LayoutWidget, log_level_to_name,
                              QDockWidgetCloseDetect)
 
 
-class _ModelItem:
-    def __init__(self, parent, row):
-        self.parent = parent
-        self.row = row
-        self.children_by_row = []
+class _RingBuffer:
+    """Fixed-capacity sequence with O(1) append, indexing and removal from
+    the front. ``offset`` counts the elements removed from the front so far,
+    and gives every element a stable absolute number."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self._buffer = [None]*self.capacity
+        self._start = 0
+        self._len = 0
+        self.offset = 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if i < 0 or i >= self._len:
+            raise IndexError
+        return self._buffer[(self._start + i) % self.capacity]
+
+    def extend(self, elements):
+        if self._len + len(elements) > self.capacity:
+            raise ValueError("ring buffer overflow")
+        for element in elements:
+            self._buffer[(self._start + self._len) % self.capacity] = element
+            self._len += 1
+
+    def popleft(self, n):
+        for i in range(n):
+            self._buffer[(self._start + i) % self.capacity] = None
+        self._start = (self._start + n) % self.capacity
+        self._len -= n
+        self.offset += n
+
+
+class _ContinuationParent:
+    # Internal pointer of the indexes of the continuation lines of an entry.
+    # Top-level indexes have no internal pointer.
+    def __init__(self, number):
+        self.number = number
 
 
 class _Model(QtCore.QAbstractItemModel):
-    def __init__(self):
+    def __init__(self, depth):
         QtCore.QAbstractTableModel.__init__(self)
 
         self.headers = ["Source", "Message"]
-        self.children_by_row = []
 
-        self.entries = []
-        self.pending_entries = []
-        self.depth = 1000
+        self.depth = depth
+        self.entries = _RingBuffer(depth)
+        # Entries that do not fit are dropped before reaching the view.
+        self.pending_entries = collections.deque(maxlen=depth)
+        # Created on demand, when Qt asks for the continuation lines of an
+        # entry, and keyed by absolute entry number.
+        self.continuation_parents = dict()
         timer = QtCore.QTimer(self)
         timer.timeout.connect(self.timer_tick)
         timer.start(100)
@@ -48,8 +89,10 @@ class _Model(QtCore.QAbstractItemModel):
 
     def rowCount(self, parent):
         if parent.isValid():
-            item = parent.internalPointer()
-            return len(item.children_by_row)
+            if parent.internalPointer() is None:
+                return len(self.entries[parent.row()][3]) - 1
+            else:
+                return 0
         else:
             return len(self.entries)
 
@@ -62,73 +105,77 @@ class _Model(QtCore.QAbstractItemModel):
                                      message.splitlines()))
 
     def clear(self):
-        self.beginRemoveRows(QtCore.QModelIndex(), 0, len(self.entries)-1)
+        self.beginResetModel()
         self.entries.clear()
-        self.children_by_row.clear()
+        self.continuation_parents.clear()
+        self.endResetModel()
+
+    def _trim(self, n):
+        self.beginRemoveRows(QtCore.QModelIndex(), 0, n-1)
+        offset = self.entries.offset
+        self.entries.popleft(n)
+        if self.continuation_parents:
+            for number in range(offset, offset + n):
+                self.continuation_parents.pop(number, None)
         self.endRemoveRows()
 
     def timer_tick(self):
         if not self.pending_entries:
             return
-        nrows = len(self.entries)
-        records = self.pending_entries
-        self.pending_entries = []
+        records = list(self.pending_entries)
+        self.pending_entries.clear()
 
+        # Make room first, as the ring buffer cannot hold more than
+        # depth entries.
+        overflow = len(self.entries) + len(records) - self.depth
+        if overflow > 0:
+            self._trim(overflow)
+
+        nrows = len(self.entries)
         self.beginInsertRows(QtCore.QModelIndex(), nrows, nrows+len(records)-1)
         self.entries.extend(records)
-        for rec in records:
-            item = _ModelItem(self, len(self.children_by_row))
-            self.children_by_row.append(item)
-            for i in range(len(rec[3])-1):
-                item.children_by_row.append(_ModelItem(item, i))
         self.endInsertRows()
 
-        if len(self.entries) > self.depth:
-            start = len(self.entries) - self.depth
-            self.beginRemoveRows(QtCore.QModelIndex(), 0, start-1)
-            self.entries = self.entries[start:]
-            self.children_by_row = self.children_by_row[start:]
-            for child in self.children_by_row:
-                child.row -= start
-            self.endRemoveRows()
-
     def index(self, row, column, parent):
         if parent.isValid():
-            parent_item = parent.internalPointer()
-            return self.createIndex(row, column,
-                                    parent_item.children_by_row[row])
+            number = self.entries.offset + parent.row()
+            try:
+                item = self.continuation_parents[number]
+            except KeyError:
+                item = _ContinuationParent(number)
+                self.continuation_parents[number] = item
+            return self.createIndex(row, column, item)
         else:
-            return self.createIndex(row, column, self.children_by_row[row])
+            return self.createIndex(row, column)
 
     def parent(self, index):
         if index.isValid():
-            parent = index.internalPointer().parent
-            if parent is self:
+            item = index.internalPointer()
+            if item is None:
                 return QtCore.QModelIndex()
             else:
-                return self.createIndex(parent.row, 0, parent)
+                return self.createIndex(item.number - self.entries.offset, 0)
         else:
             return QtCore.QModelIndex()
 
+    def _msgnum_line(self, index):
+        item = index.internalPointer()
+        if item is None:
+            return index.row(), 0
+        else:
+            return item.number - self.entries.offset, index.row() + 1
+
     def full_entry(self, index):
         if not index.isValid():
             return
-        item = index.internalPointer()
-        if item.parent is self:
-            msgnum = item.row
-        else:
-            msgnum = item.parent.row
+        msgnum, _ = self._msgnum_line(index)
         return self.entries[msgnum][3]
 
     def data(self, index, role):
         if not index.isValid():
             return
 
-        item = index.internalPointer()
-        if item.parent is self:
-            msgnum = item.row
-        else:
-            msgnum = item.parent.row
+        msgnum, line = self._msgnum_line(index)
 
         if role == QtCore.Qt.FontRole and index.column() == 1:
             return self.fixed_font
@@ -149,16 +196,10 @@ class _Model(QtCore.QAbstractItemModel):
         elif role == QtCore.Qt.DisplayRole:
             v = self.entries[msgnum]
             column = index.column()
-            if item.parent is self:
-                if column == 0:
-                    return v[1]
-                else:
-                    return v[3][0]
+            if column == 0:
+                return v[1] if line == 0 else ""
             else:
-                if column == 0:
-                    return ""
-                else:
-                    return v[3][item.row+1]
+                return v[3][line]
         elif role == QtCore.Qt.ToolTipRole:
             v = self.entries[msgnum]
             return (log_level_to_name(v[0]) + ", " +
@@ -166,7 +207,7 @@ class _Model(QtCore.QAbstractItemModel):
 
 
 class LogDock(QDockWidgetCloseDetect):
-    def __init__(self, manager, name):
+    def __init__(self, manager, name, depth=20000):
         QDockWidgetCloseDetect.__init__(self, "Log")
         self.setObjectName(name)
 
@@ -178,10 +219,13 @@ class LogDock(QDockWidgetCloseDetect):
         self.filter_level.addItems(["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"])
         self.filter_level.setToolTip("Receive entries at or above this level")
         grid.addWidget(self.filter_level, 0, 1)
+        self.filter_level.currentIndexChanged.connect(self.filter_changed)
         self.filter_freetext = QtWidgets.QLineEdit()
         self.filter_freetext.setPlaceholderText("freetext filter...")
         self.filter_freetext.setToolTip("Receive entries containing this text")
         grid.addWidget(self.filter_freetext, 0, 2)
+        self.filter_freetext.textChanged.connect(self.filter_changed)
+        self.filter_changed()
 
         scrollbottom = QtWidgets.QToolButton()
         scrollbottom.setToolTip("Scroll to bottom")
@@ -234,33 +278,31 @@ class LogDock(QDockWidgetCloseDetect):
         cw = QtGui.QFontMetrics(self.font()).averageCharWidth()
         self.log.header().resizeSection(0, 26*cw)
 
-        self.model = _Model()
+        self.model = _Model(depth)
         self.log.setModel(self.model)
-        self.model.rowsAboutToBeInserted.connect(self.rows_inserted_before)
-        self.model.rowsInserted.connect(self.rows_inserted_after)
+        self.model.rowsAboutToBeRemoved.connect(self.rows_changed_before)
         self.model.rowsRemoved.connect(self.rows_removed)
+        self.model.rowsAboutToBeInserted.connect(self.rows_changed_before)
+        self.model.rowsInserted.connect(self.rows_inserted_after)
 
-    def append_message(self, msg):
-        min_level = getattr(logging, self.filter_level.currentText())
-        freetext = self.filter_freetext.text()
-
-        accepted_level = msg[0] >= min_level
-
-        if freetext:
-            data_source = msg[1]
-            data_message = msg[3]
-            accepted_freetext = (freetext in data_source
-                or any(freetext in m for m in data_message))
-        else:
-            accepted_freetext = True
+    def filter_changed(self):
+        # Cached here, as append_message is called for every message and
+        # should not query the widgets.
+        self.min_level = getattr(logging, self.filter_level.currentText())
+        self.freetext = self.filter_freetext.text()
 
-        if accepted_level and accepted_freetext:
-            self.model.append(msg)
+    def append_message(self, msg):
+        if msg[0] < self.min_level:
+            return
+        freetext = self.freetext
+        if freetext and not (freetext in msg[1] or freetext in msg[3]):
+            return
+        self.model.append(msg)
 
     def scroll_to_bottom(self):
         self.log.scrollToBottom()
 
-    def rows_inserted_before(self):
+    def rows_changed_before(self):
         scrollbar = self.log.verticalScrollBar()
         self.scroll_value = scrollbar.value()
         self.scroll_at_bottom = self.scroll_value == scrollbar.maximum()
@@ -273,8 +315,8 @@ class LogDock(QDockWidgetCloseDetect):
     # Qt intermittently likes to scroll back to the top when rows are removed.
     # Work around this by restoring the scrollbar to the previously memorized
     # position, after the removal.
-    # Note that this works because _LogModel always does the insertion right
-    # before the removal.
+    # Note that this works because the position is memorized again before
+    # the insertion that follows the removal.
     # TODO: check if this is still required after moving to QTreeView
     def rows_removed(self):
         if self.scroll_at_bottom:
@@ -320,8 +362,9 @@ class LogDock(QDockWidgetCloseDetect):
 
 
 class LogDockManager:
-    def __init__(self, main_window):
+    def __init__(self, main_window, depth=20000):
         self.main_window = main_window
+        self.depth = depth
         self.docks = dict()
 
     def append_message(self, msg):
@@ -335,7 +378,7 @@ class LogDockManager:
             n += 1
             name = "log" + str(n)
 
-        dock = LogDock(self, name)
+        dock = LogDock(self, name, self.depth)
         self.docks[name] = dock
         if add_to_area:
             self.main_window.addDockWidget(QtCore.Qt.RightDockWidgetArea, dock)
@@ -365,7 +408,7 @@ class LogDockManager:
         if self.docks:
             raise NotImplementedError
         for name, dock_state in state.items():
-            dock = LogDock(self, name)
+            dock = LogDock(self, name, self.depth)
             self.docks[name] = dock
             dock.restore_state(dock_state)
             self.main_window.addDockWidget(QtCore.Qt.RightDockWidgetArea, dock)
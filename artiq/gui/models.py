@@ -1,3 +1,6 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+
 from PyQt5 import QtCore
 
 from artiq.protocols.sync_struct import Subscriber, process_mod
@@ -75,14 +78,96 @@ class _SyncSubstruct:
         return _SyncSubstruct(self.update_cb, self.ref[key])
 
 
-class DictSyncModel(QtCore.QAbstractTableModel):
+# Number of rows that may be inserted, removed or moved with individual
+# signals during one iteration of the event loop. Beyond that, the model
+# assumes it is receiving a burst of mods (e.g. a large experiment
+# submission or dataset import) and switches to a single layout change or
+# model reset, which views handle in one pass instead of once per row.
+_burst_threshold = 16
+
+
+class _LayoutBatcher:
+    """Mixin for the models below that turns bursts of row changes into
+    a single batch of signals.
+
+    Before each row change, the model calls ``_begin_row_change``; if it
+    returns ``False``, the model is inside a batch and must not emit row
+    or data signals. The batch ends the next time the event loop runs.
+    Qt does not allow rows to be inserted or removed within a layout
+    change, so bursts that do so are emitted as a model reset; bursts
+    that only move rows are emitted as ``layoutAboutToBeChanged`` and
+    ``layoutChanged``, for which subclasses implement ``_save_persistent``
+    and ``_restore_persistent`` to remap the persistent indexes.
+    """
+    def _init_batcher(self):
+        self._burst = 0
+        self._burst_end_scheduled = False
+        # None, "layout" or "reset" while row signals are suppressed.
+        self._batch = None
+        self._saved_persistent = None
+
+    def _begin_row_change(self, moves_only=False):
+        if self._batch == "reset":
+            return False
+        if self._batch == "layout":
+            if not moves_only:
+                self._end_layout_change()
+                self._begin_reset()
+            return False
+        if not self._burst_end_scheduled:
+            asyncio.get_event_loop().call_soon(self._end_burst)
+            self._burst_end_scheduled = True
+        self._burst += 1
+        if self._burst > _burst_threshold:
+            if moves_only:
+                self.layoutAboutToBeChanged.emit()
+                self._saved_persistent = self._save_persistent()
+                self._batch = "layout"
+            else:
+                self._begin_reset()
+            return False
+        return True
+
+    def _begin_reset(self):
+        self.beginResetModel()
+        self._batch = "reset"
+
+    def _end_layout_change(self):
+        self._batch = None
+        self._restore_persistent(self._saved_persistent)
+        self._saved_persistent = None
+        self.layoutChanged.emit()
+
+    def _end_burst(self):
+        self._burst = 0
+        self._burst_end_scheduled = False
+        if self._batch == "layout":
+            self._end_layout_change()
+        elif self._batch == "reset":
+            self._batch = None
+            self.endResetModel()
+
+    def _save_persistent(self):
+        raise NotImplementedError
+
+    def _restore_persistent(self, saved):
+        raise NotImplementedError
+
+
+class DictSyncModel(_LayoutBatcher, QtCore.QAbstractTableModel):
     def __init__(self, headers, init):
         self.headers = headers
         self.backing_store = init
-        self.row_to_key = sorted(
-            self.backing_store.keys(),
-            key=lambda k: self.sort_key(k, self.backing_store[k]))
+        self.key_to_sort_key = {k: self.sort_key(k, v)
+                                for k, v in self.backing_store.items()}
+        self.row_to_key = sorted(self.backing_store.keys(),
+                                 key=self.key_to_sort_key.__getitem__)
+        # Kept parallel to row_to_key, so that rows can be found by
+        # bisection without calling sort_key again.
+        self._row_to_sort_key = [self.key_to_sort_key[k]
+                                 for k in self.row_to_key]
         QtCore.QAbstractTableModel.__init__(self)
+        self._init_batcher()
 
     def rowCount(self, parent):
         return len(self.backing_store)
@@ -103,53 +188,96 @@ class DictSyncModel(QtCore.QAbstractTableModel):
             return self.headers[col]
         return None
 
-    def _find_row(self, k, v):
-        lo = 0
-        hi = len(self.row_to_key)
-        while lo < hi:
-            mid = (lo + hi)//2
-            if (self.sort_key(self.row_to_key[mid],
-                              self.backing_store[self.row_to_key[mid]]) <
-                    self.sort_key(k, v)):
-                lo = mid + 1
-            else:
-                hi = mid
-        return lo
+    def _find_row(self, sort_key):
+        return bisect_left(self._row_to_sort_key, sort_key)
+
+    def key_to_row(self, k):
+        """Return the current row of key *k*."""
+        row = self._find_row(self.key_to_sort_key[k])
+        # Only rows with equal sort keys need to be scanned.
+        while self.row_to_key[row] != k:
+            row += 1
+        return row
+
+    def _take_row(self, row):
+        del self.row_to_key[row]
+        del self._row_to_sort_key[row]
+
+    def _put_row(self, row, k, sort_key):
+        self.row_to_key.insert(row, k)
+        self._row_to_sort_key.insert(row, sort_key)
+        self.key_to_sort_key[k] = sort_key
 
     def __setitem__(self, k, v):
+        sort_key = self.sort_key(k, v)
         if k in self.backing_store:
-            old_row = self.row_to_key.index(k)
-            new_row = self._find_row(k, v)
+            old_row = self.key_to_row(k)
+            # Qt wants the destination in terms of the rows before the
+            # move, which is what bisection finds while the row is still
+            # in place.
+            destination = self._find_row(sort_key)
+            new_row = destination - 1 if destination > old_row else destination
             if old_row == new_row:
-                self.dataChanged.emit(self.index(old_row, 0),
-                                      self.index(old_row, len(self.headers)-1))
+                self.backing_store[k] = v
+                self._row_to_sort_key[old_row] = sort_key
+                self.key_to_sort_key[k] = sort_key
+                if self._batch is None:
+                    self.dataChanged.emit(
+                        self.index(old_row, 0),
+                        self.index(old_row, len(self.headers)-1))
             else:
-                self.beginMoveRows(QtCore.QModelIndex(), old_row, old_row,
-                                   QtCore.QModelIndex(), new_row)
-            self.backing_store[k] = v
-            self.row_to_key[old_row], self.row_to_key[new_row] = \
-                self.row_to_key[new_row], self.row_to_key[old_row]
-            if old_row != new_row:
-                self.endMoveRows()
+                # The model must not change before the move begins, as
+                # this may save the persistent indexes.
+                signals = self._begin_row_change(moves_only=True)
+                if signals:
+                    self.beginMoveRows(QtCore.QModelIndex(), old_row, old_row,
+                                       QtCore.QModelIndex(), destination)
+                self._take_row(old_row)
+                self.backing_store[k] = v
+                self._put_row(new_row, k, sort_key)
+                if signals:
+                    self.endMoveRows()
         else:
-            row = self._find_row(k, v)
-            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            row = self._find_row(sort_key)
+            signals = self._begin_row_change()
+            if signals:
+                self.beginInsertRows(QtCore.QModelIndex(), row, row)
             self.backing_store[k] = v
-            self.row_to_key.insert(row, k)
-            self.endInsertRows()
+            self._put_row(row, k, sort_key)
+            if signals:
+                self.endInsertRows()
 
     def __delitem__(self, k):
-        row = self.row_to_key.index(k)
-        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
-        del self.row_to_key[row]
+        row = self.key_to_row(k)
+        signals = self._begin_row_change()
+        if signals:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        self._take_row(row)
+        del self.key_to_sort_key[k]
         del self.backing_store[k]
-        self.endRemoveRows()
+        if signals:
+            self.endRemoveRows()
 
     def __getitem__(self, k):
         def update():
             self[k] = self.backing_store[k]
         return _SyncSubstruct(update, self.backing_store[k])
 
+    def _save_persistent(self):
+        return [(index, self.row_to_key[index.row()])
+                for index in self.persistentIndexList()]
+
+    def _restore_persistent(self, saved):
+        old = []
+        new = []
+        for index, k in saved:
+            old.append(index)
+            if k in self.backing_store:
+                new.append(self.index(self.key_to_row(k), index.column()))
+            else:
+                new.append(QtCore.QModelIndex())
+        self.changePersistentIndexList(old, new)
+
     def sort_key(self, k, v):
         raise NotImplementedError
 
@@ -211,11 +339,12 @@ class ListSyncModel(QtCore.QAbstractTableModel):
 # There can be a node and a leaf with the same name and different
 # rows, e.g. foo/bar and foo.
 class _DictSyncTreeSepItem:
-    def __init__(self, parent, row, name):
+    def __init__(self, parent, name):
         self.parent = parent
-        self.row = row
         self.name = name
         self.children_by_row = []
+        # Kept parallel to children_by_row for bisection.
+        self.children_names = []
         self.children_nodes_by_name = dict()
         self.children_leaves_by_name = dict()
         # is_node is permanently set when a child is added.
@@ -227,38 +356,52 @@ class _DictSyncTreeSepItem:
         # resulting in convert() being called for an invalid key if we hadn't
         # permanently marked those items as nodes.
         self.is_node = False
+        self.removed = False
+
+    @property
+    def row(self):
+        # Rows are not stored, as inserting or removing a child would then
+        # require renumbering all its following siblings.
+        return _item_row(self.parent, self)
 
     def __repr__(self):
         return ("<DictSyncTreeSepItem {}, row={}, nchildren={}>".
                 format(self.name, self.row, len(self.children_by_row)))
 
 
-def _bisect_item(a, name):
-    lo = 0
-    hi = len(a)
-    while lo < hi:
-        mid = (lo + hi)//2
-        if name < a[mid].name:
-            hi = mid
-        else:
-            lo = mid + 1
-    return lo
+def _item_row(parent, item):
+    """Return the row of *item* in *parent*, or ``None`` if it has been
+    removed, as views may still hold indexes of removed items."""
+    if item.removed:
+        return None
+    row = bisect_left(parent.children_names, item.name)
+    # At most a node and a leaf share a name.
+    if parent.children_by_row[row] is not item:
+        row += 1
+    return row
 
 
-class DictSyncTreeSepModel(QtCore.QAbstractItemModel):
+class DictSyncTreeSepModel(_LayoutBatcher, QtCore.QAbstractItemModel):
     def __init__(self, separator, headers, init):
         QtCore.QAbstractItemModel.__init__(self)
+        self._init_batcher()
 
         self.separator = separator
         self.headers = headers
 
         self.backing_store = dict()
         self.children_by_row = []
+        self.children_names = []
         self.children_nodes_by_name = dict()
         self.children_leaves_by_name = dict()
 
-        for k, v in init.items():
-            self[k] = v
+        # No view is attached yet, so there is no need to emit signals.
+        self._batch = "reset"
+        try:
+            for k, v in init.items():
+                self[k] = v
+        finally:
+            self._batch = None
 
     def rowCount(self, parent):
         if parent.isValid():
@@ -299,14 +442,17 @@ class DictSyncTreeSepModel(QtCore.QAbstractItemModel):
     def _index_item(self, item):
         if item is self:
             return QtCore.QModelIndex()
-        else:
-            return self.createIndex(item.row, 0, item)
+        row = item.row
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, 0, item)
 
     def parent(self, index):
         if index.isValid():
-            return self._index_item(index.internalPointer().parent)
-        else:
-            return QtCore.QModelIndex()
+            item = index.internalPointer()
+            if not item.removed:
+                return self._index_item(item.parent)
+        return QtCore.QModelIndex()
 
     def _add_item(self, parent, name, leaf):
         if leaf:
@@ -316,16 +462,18 @@ class DictSyncTreeSepModel(QtCore.QAbstractItemModel):
 
         if name in name_dict:
             return name_dict[name]
-        row = _bisect_item(parent.children_by_row, name)
-        item = _DictSyncTreeSepItem(parent, row, name)
+        row = bisect_right(parent.children_names, name)
+        item = _DictSyncTreeSepItem(parent, name)
 
-        self.beginInsertRows(self._index_item(parent), row, row)
+        signals = self._begin_row_change()
+        if signals:
+            self.beginInsertRows(self._index_item(parent), row, row)
         parent.is_node = True
         parent.children_by_row.insert(row, item)
-        for next_item in parent.children_by_row[row+1:]:
-            next_item.row += 1
+        parent.children_names.insert(row, name)
         name_dict[name] = item
-        self.endInsertRows()
+        if signals:
+            self.endInsertRows()
 
         return item
 
@@ -336,10 +484,12 @@ class DictSyncTreeSepModel(QtCore.QAbstractItemModel):
             for node_name in node_names:
                 parent = parent.children_nodes_by_name[node_name]
             item = parent.children_leaves_by_name[leaf_name]
-            index0 = self.createIndex(item.row, 0, item)
-            index1 = self.createIndex(item.row, len(self.headers)-1, item)
             self.backing_store[k] = v
-            self.dataChanged.emit(index0, index1)
+            if self._batch is None:
+                row = item.row
+                index0 = self.createIndex(row, 0, item)
+                index1 = self.createIndex(row, len(self.headers)-1, item)
+                self.dataChanged.emit(index0, index1)
         else:
             self.backing_store[k] = v
             parent = self
@@ -347,31 +497,32 @@ class DictSyncTreeSepModel(QtCore.QAbstractItemModel):
                 parent = self._add_item(parent, node_name, False)
             self._add_item(parent, leaf_name, True)
 
+    def _remove_item(self, parent, item, name_dict):
+        row = _item_row(parent, item)
+        signals = self._begin_row_change()
+        if signals:
+            self.beginRemoveRows(self._index_item(parent), row, row)
+        del name_dict[item.name]
+        del parent.children_by_row[row]
+        del parent.children_names[row]
+        item.removed = True
+        if signals:
+            self.endRemoveRows()
+
     def _del_item(self, parent, path):
         if len(path) == 1:
             # leaf
             name = path[0]
             item = parent.children_leaves_by_name[name]
-            row = item.row
-            self.beginRemoveRows(self._index_item(parent), row, row)
-            del parent.children_leaves_by_name[name]
-            del parent.children_by_row[row]
-            for next_item in parent.children_by_row[row:]:
-                next_item.row -= 1
-            self.endRemoveRows()
+            self._remove_item(parent, item, parent.children_leaves_by_name)
         else:
             # node
             name, *rest = path
             item = parent.children_nodes_by_name[name]
             self._del_item(item, rest)
             if not item.children_by_row:
-                row = item.row
-                self.beginRemoveRows(self._index_item(parent), row, row)
-                del parent.children_nodes_by_name[name]
-                del parent.children_by_row[row]
-                for next_item in parent.children_by_row[row:]:
-                    next_item.row -= 1
-                self.endRemoveRows()
+                self._remove_item(parent, item,
+                                  parent.children_nodes_by_name)
 
     def __delitem__(self, k):
         self._del_item(self, k.split(self.separator))
@@ -399,6 +550,8 @@ class DictSyncTreeSepModel(QtCore.QAbstractItemModel):
             return None
         else:
             column = index.column()
+            if index.internalPointer().removed:
+                return None
             if column == 0 and role == QtCore.Qt.DisplayRole:
                 return index.internalPointer().name
             else:
@@ -15,19 +15,26 @@ Iterating multiple times on the same scan object is possible, with the scan
 yielding the same values each time. Iterating concurrently on the
 same scan object (e.g. via nested loops) is also supported, and the
 iterators are independent from each other.
+
+Scan objects can also be indexed, and converted to NumPy arrays for
+vectorized analysis, e.g. ``numpy.asarray(self.scan)``.
 """
 
 import random
 import inspect
+import operator
+import bisect
 from itertools import product
 
+import numpy
+
 from artiq.language.core import *
 from artiq.language.environment import NoDefault, DefaultMissing
 from artiq.language import units
 
 
 __all__ = ["ScanObject",
-           "NoScan", "RangeScan", "ExplicitScan",
+           "NoScan", "RangeScan", "ExplicitScan", "AdaptiveScan",
            "Scannable", "MultiScanManager"]
 
 
@@ -35,23 +42,68 @@ class ScanObject:
     pass
 
 
+def _index(index, length):
+    index = operator.index(index)
+    if index < 0:
+        index += length
+    if not 0 <= index < length:
+        raise IndexError("scan index out of range")
+    return index
+
+
+def _explicit_getitem(sequence, index):
+    if isinstance(index, slice):
+        return numpy.asarray(sequence[index])
+    return sequence[index]
+
+
 class NoScan(ScanObject):
     """A scan object that yields a single value for a specified number
     of repetitions."""
     def __init__(self, value, repetitions=1):
         self.value = value
         self.repetitions = repetitions
+        self._sequence = None
 
     def _gen(self):
         for i in range(self.repetitions):
             yield self.value
 
     def __iter__(self):
+        if self._sequence is not None:
+            return iter(self._sequence)
         return self._gen()
 
     def __len__(self):
+        if self._sequence is not None:
+            return len(self._sequence)
         return self.repetitions
 
+    def __getitem__(self, index):
+        if self._sequence is not None:
+            return _explicit_getitem(self._sequence, index)
+        if isinstance(index, slice):
+            return numpy.full(len(range(*index.indices(self.repetitions))),
+                              self.value)
+        _index(index, self.repetitions)
+        return self.value
+
+    def __array__(self, dtype=None):
+        if self._sequence is not None:
+            return numpy.asarray(self._sequence, dtype=dtype)
+        return numpy.full(self.repetitions, self.value, dtype=dtype)
+
+    @property
+    def sequence(self):
+        if self._sequence is not None:
+            return self._sequence
+        return [self.value]*self.repetitions
+
+    @sequence.setter
+    def sequence(self, sequence):
+        # Kernels write back the attributes they use, including this one.
+        self._sequence = list(sequence)
+
     def describe(self):
         return {"ty": "NoScan", "value": self.value,
                 "repetitions": self.repetitions}
@@ -59,7 +111,12 @@ class NoScan(ScanObject):
 
 class RangeScan(ScanObject):
     """A scan object that yields a fixed number of evenly spaced values in a
-    range. If ``randomize`` is True the points are randomly ordered."""
+    range. If ``randomize`` is True the points are randomly ordered.
+
+    Points are computed on demand: indexing and iteration do not build the
+    list of all points. Slicing and :func:`numpy.asarray` return NumPy
+    arrays. A randomized scan stores only the permutation of the point
+    indices."""
     def __init__(self, start, stop, npoints, randomize=False, seed=None):
         self.start = start
         self.stop = stop
@@ -67,24 +124,83 @@ class RangeScan(ScanObject):
         self.randomize = randomize
         self.seed = seed
 
-        if npoints == 0:
-            self.sequence = []
-        if npoints == 1:
-            self.sequence = [self.start]
+        if npoints > 1:
+            self._dx = (stop - start)/(npoints - 1)
         else:
-            dx = (stop - start)/(npoints - 1)
-            self.sequence = [i*dx + start for i in range(npoints)]
+            self._dx = 0.0
+        self._permutation = None
+        self._sequence = None
+
+    def _get_permutation(self):
+        if self._permutation is None:
+            # Fisher-Yates shuffle of the indices, drawing the same random
+            # numbers as random.shuffle() does on the list of points, so that
+            # seeded scans keep their order.
+            rng = random.Random(self.seed)
+            permutation = numpy.arange(self.npoints)
+            for i in reversed(range(1, self.npoints)):
+                j = int(rng.random()*(i + 1))
+                permutation[i], permutation[j] = permutation[j], permutation[i]
+            self._permutation = permutation
+        return self._permutation
+
+    def _point(self, i):
+        if self.npoints == 1:
+            return self.start
+        return i*self._dx + self.start
 
-        if randomize:
-            rng = random.Random(seed)
-            random.shuffle(self.sequence, rng.random)
+    def _gen(self):
+        if self.randomize:
+            for i in self._get_permutation():
+                yield self._point(int(i))
+        else:
+            for i in range(self.npoints):
+                yield self._point(i)
 
     def __iter__(self):
-        return iter(self.sequence)
+        if self._sequence is not None:
+            return iter(self._sequence)
+        return self._gen()
 
     def __len__(self):
+        if self._sequence is not None:
+            return len(self._sequence)
         return self.npoints
 
+    def __getitem__(self, index):
+        if self._sequence is not None:
+            return _explicit_getitem(self._sequence, index)
+        if isinstance(index, slice):
+            indices = numpy.arange(*index.indices(self.npoints))
+            if self.randomize:
+                indices = self._get_permutation()[indices]
+            return self._points(indices)
+        index = _index(index, self.npoints)
+        if self.randomize:
+            index = int(self._get_permutation()[index])
+        return self._point(index)
+
+    def _points(self, indices):
+        if self.npoints == 1:
+            return numpy.full(len(indices), self.start, dtype=float)
+        return indices*self._dx + self.start
+
+    def __array__(self, dtype=None):
+        if self._sequence is not None:
+            return numpy.asarray(self._sequence, dtype=dtype)
+        return self[:].astype(dtype, copy=False) if dtype is not None else self[:]
+
+    @property
+    def sequence(self):
+        if self._sequence is not None:
+            return self._sequence
+        return list(self)
+
+    @sequence.setter
+    def sequence(self, sequence):
+        # Kernels write back the attributes they use, including this one.
+        self._sequence = list(sequence)
+
     def describe(self):
         return {"ty": "RangeScan",
                 "start": self.start, "stop": self.stop,
@@ -104,14 +220,126 @@ class ExplicitScan(ScanObject):
     def __len__(self):
         return len(self.sequence)
 
+    def __getitem__(self, index):
+        return _explicit_getitem(self.sequence, index)
+
+    def __array__(self, dtype=None):
+        return numpy.asarray(self.sequence, dtype=dtype)
+
     def describe(self):
         return {"ty": "ExplicitScan", "sequence": self.sequence}
 
 
+class AdaptiveScan(ScanObject):
+    """A scan object that chooses its points from the results fed back by
+    the experiment.
+
+    The scan first yields ``npoints`` evenly spaced values between
+    ``start`` and ``stop``. It then repeatedly bisects the interval between
+    two neighbouring points over which the result changes the most (taking
+    both axes normalized to the range covered so far), until ``max_points``
+    values have been yielded or all intervals are narrower than
+    ``min_step``. Features of the result are therefore sampled densely and
+    flat regions sparsely.
+
+    Report the result for each value with :meth:`feed`, e.g. ::
+
+        for frequency in self.scan:
+            self.scan.feed(frequency, self.measure(frequency))
+
+    Points without results only contribute their interval length; a scan
+    that is never fed refines uniformly. Iterating again restarts the scan
+    and discards the results. Concurrent iteration on the same adaptive scan
+    object is not supported.
+    """
+    def __init__(self, start, stop, npoints, max_points, min_step=0.0):
+        self.start = start
+        self.stop = stop
+        self.npoints = npoints
+        self.max_points = max_points
+        self.min_step = min_step
+        self._reset()
+
+    def _reset(self):
+        self._x = []
+        self._y = dict()
+
+    def feed(self, x, y):
+        """Report the result ``y`` of the measurement at value ``x``."""
+        self._y[x] = float(y)
+
+    @property
+    def points(self):
+        """The values yielded so far, in increasing order."""
+        return numpy.array(self._x)
+
+    @property
+    def results(self):
+        """The results fed for :attr:`points`, NaN where none was fed."""
+        return numpy.array([self._y.get(x, numpy.nan) for x in self._x])
+
+    def _next_point(self):
+        x = self._x
+        xscale = abs(x[-1] - x[0]) or 1.0
+        ys = [y for y in self._y.values() if y == y]
+        if ys:
+            yscale = (max(ys) - min(ys)) or 1.0
+        else:
+            yscale = 1.0
+
+        best_loss = None
+        best_index = None
+        for i in range(len(x) - 1):
+            dx = x[i+1] - x[i]
+            if dx <= self.min_step or (x[i] + x[i+1])/2 in (x[i], x[i+1]):
+                continue
+            y0 = self._y.get(x[i])
+            y1 = self._y.get(x[i+1])
+            if y0 is None or y1 is None or y0 != y0 or y1 != y1:
+                dy = 0.0
+            else:
+                dy = (y1 - y0)/yscale
+            loss = (dx/xscale)**2 + dy**2
+            if best_loss is None or loss > best_loss:
+                best_loss = loss
+                best_index = i
+        if best_index is None:
+            return None
+        return (x[best_index] + x[best_index+1])/2
+
+    def _gen(self):
+        self._reset()
+        for value in RangeScan(self.start, self.stop,
+                               min(self.npoints, self.max_points)):
+            bisect.insort(self._x, value)
+            yield value
+        while len(self._x) < self.max_points:
+            value = self._next_point()
+            if value is None:
+                break
+            bisect.insort(self._x, value)
+            yield value
+
+    def __iter__(self):
+        return self._gen()
+
+    def __len__(self):
+        """The maximum number of values yielded by the scan."""
+        return self.max_points
+
+    def describe(self):
+        return {"ty": "AdaptiveScan",
+                "start": self.start, "stop": self.stop,
+                "npoints": self.npoints,
+                "max_points": self.max_points,
+                "min_step": self.min_step}
+
+
 _ty_to_scan = {
     "NoScan": NoScan,
     "RangeScan": RangeScan,
-    "ExplicitScan": ExplicitScan
+    "ExplicitScan": ExplicitScan,
+    "AdaptiveScan": AdaptiveScan
 }
 
 
@@ -230,9 +458,29 @@ class MultiScanManager:
 
         self.scan_point_cls = ScanPoint
 
+    def __len__(self):
+        n = 1
+        for scan_object in self.scan_objects:
+            n *= len(scan_object)
+        return n
+
     def _gen(self):
-        for values in product(*self.scan_objects):
-            d = {k: v for k, v in zip(self.names, values)}
+        if not all(hasattr(scan_object, "__getitem__")
+                   for scan_object in self.scan_objects):
+            for values in product(*self.scan_objects):
+                d = {k: v for k, v in zip(self.names, values)}
+                yield self.scan_point_cls(**d)
+            return
+
+        # Index the scan objects directly instead of having product()
+        # materialize every one of them.
+        lengths = [len(scan_object) for scan_object in self.scan_objects]
+        for index in range(len(self)):
+            d = dict()
+            for name, scan_object, length in reversed(list(zip(
+                    self.names, self.scan_objects, lengths))):
+                index, i = divmod(index, length)
+                d[name] = scan_object[i]
             yield self.scan_point_cls(**d)
 
     def __iter__(self):
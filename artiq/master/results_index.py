@@ -0,0 +1,273 @@
+"""
+Index of the runs whose results have been written by the master.
+
+The master records every run in an SQLite database as its HDF5 file is
+written: RID, experiment, repository revision, arguments, start and run
+times, and the names, shapes and types of the datasets. This allows
+finding runs without walking the ``results/YYYY-MM-DD/HH`` tree and
+opening every file. :meth:`ResultsIndex.rebuild` recreates the index from
+existing results.
+"""
+
+import os
+import re
+import sqlite3
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import h5py
+
+from artiq.protocols import pyon
+
+
+logger = logging.getLogger(__name__)
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    rid INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    file TEXT,
+    class_name TEXT,
+    repo_rev TEXT,
+    arguments TEXT,
+    artiq_version TEXT,
+    start_time REAL,
+    run_time REAL
+);
+CREATE INDEX IF NOT EXISTS runs_class_name ON runs (class_name);
+CREATE INDEX IF NOT EXISTS runs_start_time ON runs (start_time);
+CREATE TABLE IF NOT EXISTS datasets (
+    rid INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    archive INTEGER NOT NULL,
+    shape TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    PRIMARY KEY (rid, archive, name)
+);
+CREATE INDEX IF NOT EXISTS datasets_name ON datasets (name);
+"""
+
+_run_columns = ["rid", "path", "file", "class_name", "repo_rev", "arguments",
+                "artiq_version", "start_time", "run_time"]
+
+
+def _str(x):
+    if isinstance(x, bytes):
+        return x.decode()
+    return x
+
+
+def _scalar(f, name):
+    try:
+        value = f[name][()]
+    except KeyError:
+        return None
+    if isinstance(value, bytes):
+        return value.decode()
+    return value.item() if hasattr(value, "item") else value
+
+
+def run_record(f, path):
+    """Build the index record of the run whose results are in the open
+    HDF5 file *f*. *path* is the name of the file relative to the results
+    directory."""
+    expid = pyon.decode(_str(f["expid"][()]))
+    record = {
+        "rid": int(f["rid"][()]),
+        "path": path,
+        "file": expid.get("file"),
+        "class_name": expid.get("class_name"),
+        "repo_rev": expid.get("repo_rev"),
+        "arguments": expid.get("arguments", {}),
+        "artiq_version": _scalar(f, "artiq_version"),
+        "start_time": _scalar(f, "start_time"),
+        "run_time": _scalar(f, "run_time"),
+    }
+    for group in "datasets", "archive":
+        datasets = dict()
+        if group in f:
+            # dataset keys containing "/" are stored in subgroups
+            def add_dataset(name, obj):
+                if isinstance(obj, h5py.Dataset):
+                    datasets[name] = (list(obj.shape), obj.dtype.str)
+            f[group].visititems(add_dataset)
+        record[group] = datasets
+    return record
+
+
+def iter_result_files(results_dir):
+    """Yield the ``(rid, path)`` of all result files in *results_dir*, with
+    *path* relative to *results_dir*."""
+    try:
+        day_folders = os.listdir(results_dir)
+    except OSError:
+        return
+    for df in day_folders:
+        if not re.fullmatch("\\d\\d\\d\\d-\\d\\d-\\d\\d", df):
+            continue
+        try:
+            hm_folders = os.listdir(os.path.join(results_dir, df))
+        except OSError:
+            continue
+        for hmf in hm_folders:
+            if not re.fullmatch("\\d\\d(-\\d\\d)?", hmf):
+                continue
+            try:
+                h5files = os.listdir(os.path.join(results_dir, df, hmf))
+            except OSError:
+                continue
+            for x in h5files:
+                m = re.fullmatch("(\\d\\d\\d\\d\\d\\d\\d\\d\\d)-.*\\.h5", x)
+                if m is not None:
+                    yield int(m.group(1)), os.path.join(df, hmf, x)
+
+
+def _read_record(results_dir, path):
+    try:
+        with h5py.File(os.path.join(results_dir, path), "r") as f:
+            return run_record(f, path)
+    except:
+        logger.warning("failed to index %s", path, exc_info=True)
+        return None
+
+
+class ResultsIndex:
+    """SQLite database of the runs in a results directory.
+
+    The methods that return runs give dictionaries with the keys of
+    :func:`run_record`; ``datasets`` and ``archive`` are only included
+    by :meth:`get`.
+
+    :param filename: name of the database file; created if it does not
+        exist.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename)
+        self.db.executescript(_schema)
+
+    def close(self):
+        self.db.close()
+
+    def _insert(self, record):
+        row = [record[c] for c in _run_columns]
+        row[_run_columns.index("arguments")] = pyon.encode(record["arguments"])
+        rid = record["rid"]
+        self.db.execute("DELETE FROM datasets WHERE rid=?", (rid, ))
+        self.db.execute("INSERT OR REPLACE INTO runs VALUES ({})".format(
+            ",".join("?"*len(_run_columns))), row)
+        self.db.executemany(
+            "INSERT INTO datasets VALUES (?,?,?,?,?)",
+            [(rid, name, archive, pyon.encode(shape), dtype)
+             for archive, group in enumerate(("datasets", "archive"))
+             for name, (shape, dtype) in record[group].items()])
+
+    def add(self, record):
+        """Add a run (as returned by :func:`run_record`) to the index,
+        replacing any existing run with the same RID."""
+        with self.db:
+            self._insert(record)
+
+    def _run(self, row):
+        run = dict(zip(_run_columns, row))
+        run["arguments"] = pyon.decode(run["arguments"])
+        return run
+
+    def get(self, rid):
+        """Return the run with the given RID, or ``None``."""
+        row = self.db.execute(
+            "SELECT * FROM runs WHERE rid=?", (rid, )).fetchone()
+        if row is None:
+            return None
+        run = self._run(row)
+        run["datasets"] = dict()
+        run["archive"] = dict()
+        for name, archive, shape, dtype in self.db.execute(
+                "SELECT name, archive, shape, dtype FROM datasets "
+                "WHERE rid=?", (rid, )):
+            group = run["archive"] if archive else run["datasets"]
+            group[name] = (pyon.decode(shape), dtype)
+        return run
+
+    def query(self, class_name=None, file=None, dataset=None,
+              start=None, stop=None, limit=100):
+        """Return the runs matching all the given criteria, most recent
+        first.
+
+        :param class_name: experiment class name.
+        :param file: experiment file, relative to the repository.
+        :param dataset: name of a dataset saved by the run.
+        :param start: earliest start time (as a timestamp).
+        :param stop: latest start time (as a timestamp).
+        :param limit: maximum number of runs returned, or ``None``.
+        """
+        conditions = []
+        parameters = []
+        if class_name is not None:
+            conditions.append("class_name=?")
+            parameters.append(class_name)
+        if file is not None:
+            conditions.append("file=?")
+            parameters.append(file)
+        if dataset is not None:
+            conditions.append(
+                "rid IN (SELECT rid FROM datasets WHERE name=?)")
+            parameters.append(dataset)
+        if start is not None:
+            conditions.append("start_time>=?")
+            parameters.append(start)
+        if stop is not None:
+            conditions.append("start_time<=?")
+            parameters.append(stop)
+        sql = "SELECT * FROM runs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY rid DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [self._run(row) for row in self.db.execute(sql, parameters)]
+
+    def last_rid(self):
+        """Return the largest RID in the index, or -1 if it is empty."""
+        rid, = self.db.execute("SELECT MAX(rid) FROM runs").fetchone()
+        return -1 if rid is None else rid
+
+    def rebuild(self, results_dir, workers=None):
+        """Replace the contents of the index with the runs found in
+        *results_dir*. The files are read by a pool of *workers* processes
+        (by default, one per CPU). Returns the number of indexed runs."""
+        paths = [path for rid, path in iter_result_files(results_dir)]
+        n = 0
+        with ProcessPoolExecutor(workers) as executor, self.db:
+            self.db.execute("DELETE FROM runs")
+            self.db.execute("DELETE FROM datasets")
+            for record in executor.map(_read_record,
+                                       [results_dir]*len(paths), paths,
+                                       chunksize=64):
+                if record is not None:
+                    self._insert(record)
+                    n += 1
+        return n
+
+
+class ResultsIndexReader:
+    """Read-only view of a :class:`ResultsIndex`, for exporting it over
+    RPC."""
+    def __init__(self, index):
+        self._index = index
+
+    def get(self, rid):
+        """See :meth:`ResultsIndex.get`."""
+        return self._index.get(rid)
+
+    def query(self, class_name=None, file=None, dataset=None,
+              start=None, stop=None, limit=100):
+        """See :meth:`ResultsIndex.query`."""
+        return self._index.query(class_name, file, dataset,
+                                 start, stop, limit)
+
+    def last_rid(self):
+        """See :meth:`ResultsIndex.last_rid`."""
+        return self._index.last_rid()
@@ -214,8 +214,12 @@ class Worker:
             elif action == "register_experiment":
                 func = self.register_experiment
             else:
-                func = self.handlers[action]
+                func = self.handlers.get(action)
             try:
+                if func is None:
+                    # e.g. index_results with a master that keeps no index
+                    raise KeyError("no handler for worker action '{}'"
+                                   .format(action))
                 data = func(*obj["args"], **obj["kwargs"])
                 reply = {"status": "ok", "data": data}
             except:
@@ -4,19 +4,21 @@ import importlib
 import logging
 import os
 import tempfile
-import re
 
 from artiq.protocols.sync_struct import Notifier
 from artiq.protocols.pc_rpc import AutoTarget, Client, BestEffortClient
+from artiq.master.results_index import iter_result_files
 
 
 logger = logging.getLogger(__name__)
 
 
 class RIDCounter:
-    def __init__(self, cache_filename="last_rid.pyon", results_dir="results"):
+    def __init__(self, cache_filename="last_rid.pyon", results_dir="results",
+                 results_index=None):
         self.cache_filename = cache_filename
         self.results_dir = results_dir
+        self.results_index = results_index
         self._next_rid = self._last_rid() + 1
         logger.debug("Next RID is %d", self._next_rid)
 
@@ -31,7 +33,11 @@ class RIDCounter:
             rid = self._last_rid_from_cache()
         except FileNotFoundError:
             logger.debug("Last RID cache not found, scanning results")
+            # The index may miss runs (e.g. if indexing failed, or results
+            # were copied in), so it cannot replace the scan.
             rid = self._last_rid_from_results()
+            if self.results_index is not None:
+                rid = max(rid, self.results_index.last_rid())
             self._update_cache(rid)
             return rid
         else:
@@ -52,37 +58,8 @@ class RIDCounter:
             return int(f.read())
 
     def _last_rid_from_results(self):
-        r = -1
-        try:
-            day_folders = os.listdir(self.results_dir)
-        except:
-            return r
-        day_folders = filter(
-            lambda x: re.fullmatch("\\d\\d\\d\\d-\\d\\d-\\d\\d", x),
-            day_folders)
-        for df in day_folders:
-            day_path = os.path.join(self.results_dir, df)
-            try:
-                hm_folders = os.listdir(day_path)
-            except:
-                continue
-            hm_folders = filter(lambda x: re.fullmatch("\\d\\d(-\\d\\d)?", x),
-                                hm_folders)
-            for hmf in hm_folders:
-                hm_path = os.path.join(day_path, hmf)
-                try:
-                    h5files = os.listdir(hm_path)
-                except:
-                    continue
-                for x in h5files:
-                    m = re.fullmatch(
-                        "(\\d\\d\\d\\d\\d\\d\\d\\d\\d)-.*\\.h5", x)
-                    if m is None:
-                        continue
-                    rid = int(m.group(1))
-                    if rid > r:
-                        r = rid
-        return r
+        return max((rid for rid, path in iter_result_files(self.results_dir)),
+                   default=-1)
 
 
 class DummyDevice:
@@ -12,6 +12,7 @@ from artiq.protocols import pipe_ipc, pyon
 from artiq.protocols.packed_exceptions import raise_packed_exc
 from artiq.tools import multiline_log_config, file_import
 from artiq.master.worker_db import DeviceManager, DatasetManager, DummyDevice
+from artiq.master.results_index import run_record
 from artiq.language.environment import (is_experiment, TraceArgumentManager,
                                         ProcessArgumentManager)
 from artiq.language.core import set_watchdog_factory, TerminationRequested
@@ -133,6 +134,9 @@ def get_exp(file, class_name):
 register_experiment = make_parent_action("register_experiment")
 
 
+index_results = make_parent_action("index_results")
+
+
 class ExamineDeviceMgr:
     get_device_db = make_parent_action("get_device_db")
 
@@ -231,6 +235,7 @@ def main():
     start_time = None
     run_time = None
     rid = None
+    results_subdir = None
     expid = None
     exp = None
     exp_inst = None
@@ -263,9 +268,10 @@ def main():
                 device_mgr.virtual_devices["scheduler"].set_run_info(
                     rid, obj["pipeline_name"], expid, obj["priority"])
                 start_local_time = time.localtime(start_time)
-                dirname = os.path.join("results",
-                                   time.strftime("%Y-%m-%d", start_local_time),
-                                   time.strftime("%H", start_local_time))
+                results_subdir = os.path.join(
+                    time.strftime("%Y-%m-%d", start_local_time),
+                    time.strftime("%H", start_local_time))
+                dirname = os.path.join("results", results_subdir)
                 os.makedirs(dirname, exist_ok=True)
                 os.chdir(dirname)
                 argument_mgr = ProcessArgumentManager(expid["arguments"])
@@ -296,6 +302,13 @@ def main():
                     f["start_time"] = start_time
                     f["run_time"] = run_time
                     f["expid"] = pyon.encode(expid)
+                    # indexing must not fail the run
+                    try:
+                        index_results(run_record(
+                            f, os.path.join(results_subdir, filename)))
+                    except Exception:
+                        logging.warning("failed to add RID %d to the "
+                                        "results index", rid, exc_info=True)
                 put_object({"action": "completed"})
             elif action == "examine":
                 examine(ExamineDeviceMgr, ExamineDatasetMgr, obj["file"])
@@ -8,11 +8,16 @@ describing each modification made to the structure (*mods*).
 
 Structures must be PYON serializable and contain only lists, dicts, and
 immutable types. Lists and dicts can be nested arbitrarily.
+
+Subscribers to a dictionary may request a *key filter*, a list of
+``fnmatch``-style patterns. The publisher then only sends the matching
+top-level keys in the initialization and the mods that concern them.
 """
 
 import asyncio
 from operator import getitem
 from functools import partial
+from fnmatch import fnmatchcase
 
 from artiq.monkey_patches import *
 from artiq.protocols import pyon
@@ -41,6 +46,22 @@ def process_mod(target, mod):
         raise ValueError
 
 
+def _mod_key(mod):
+    """Return the top-level key affected by a *mod*, or ``None`` if the mod
+    is not specific to a key (e.g. it acts on a top-level list)."""
+    if mod["path"]:
+        return mod["path"][0]
+    elif mod["action"] in {"setitem", "delitem"}:
+        return mod["key"]
+    else:
+        return None
+
+
+def _key_matches(key, key_filter):
+    return isinstance(key, str) and any(fnmatchcase(key, pattern)
+                                        for pattern in key_filter)
+
+
 class Subscriber:
     """An asyncio-based client to connect to a ``Publisher``.
 
@@ -54,8 +75,12 @@ class Subscriber:
         A list of functions may also be used, and they will be called in turn.
     :param disconnect_cb: An optional function called when disconnection happens
         from external causes (i.e. not when ``close`` is called).
+    :param key_filter: An optional list of ``fnmatch``-style patterns. If
+        given, and the structure is a dictionary, only the keys matching
+        any of the patterns are synchronized.
     """
-    def __init__(self, notifier_name, target_builder, notify_cb=None, disconnect_cb=None):
+    def __init__(self, notifier_name, target_builder, notify_cb=None, disconnect_cb=None,
+                 key_filter=None):
         self.notifier_name = notifier_name
         self.target_builder = target_builder
         if notify_cb is None:
@@ -64,6 +89,7 @@ class Subscriber:
             notify_cb = [notify_cb]
         self.notify_cbs = notify_cb
         self.disconnect_cb = disconnect_cb
+        self.key_filter = key_filter
 
     async def connect(self, host, port, before_receive_cb=None):
         self.reader, self.writer = \
@@ -72,7 +98,10 @@ class Subscriber:
             if before_receive_cb is not None:
                 before_receive_cb()
             self.writer.write(_init_string)
-            self.writer.write((self.notifier_name + "\n").encode())
+            line = self.notifier_name
+            if self.key_filter is not None:
+                line += " " + pyon.encode(list(self.key_filter))
+            self.writer.write((line + "\n").encode())
             self.receive_task = asyncio.ensure_future(self._receive_cr())
         except:
             self.writer.close()
@@ -208,7 +237,8 @@ class Publisher(AsyncioServer):
     def __init__(self, notifiers):
         AsyncioServer.__init__(self)
         self.notifiers = notifiers
-        self._recipients = {k: set() for k in notifiers.keys()}
+        # notifier name -> {queue: key filter or None}
+        self._recipients = {k: dict() for k in notifiers.keys()}
         self._notifier_names = {id(v): k for k, v in notifiers.items()}
 
         for notifier in notifiers.values():
@@ -223,19 +253,27 @@ class Publisher(AsyncioServer):
             line = await reader.readline()
             if not line:
                 return
-            notifier_name = line.decode()[:-1]
+            notifier_name, _, key_filter = line.decode()[:-1].partition(" ")
 
             try:
                 notifier = self.notifiers[notifier_name]
             except KeyError:
                 return
 
-            obj = {"action": "init", "struct": notifier.read}
+            struct = notifier.read
+            if key_filter:
+                key_filter = pyon.decode(key_filter)
+                if isinstance(struct, dict):
+                    struct = {k: v for k, v in struct.items()
+                              if _key_matches(k, key_filter)}
+            else:
+                key_filter = None
+            obj = {"action": "init", "struct": struct}
             line = pyon.encode(obj) + "\n"
             writer.write(line.encode())
 
             queue = asyncio.Queue()
-            self._recipients[notifier_name].add(queue)
+            self._recipients[notifier_name][queue] = key_filter
             try:
                 while True:
                     line = await queue.get()
@@ -243,7 +281,7 @@ class Publisher(AsyncioServer):
                     # raise exception on connection error
                     await writer.drain()
             finally:
-                self._recipients[notifier_name].remove(queue)
+                del self._recipients[notifier_name][queue]
         except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
             # subscribers disconnecting are a normal occurence
             pass
@@ -251,8 +289,17 @@ class Publisher(AsyncioServer):
             writer.close()
 
     def publish(self, notifier, mod):
-        line = pyon.encode(mod) + "\n"
-        line = line.encode()
         notifier_name = self._notifier_names[id(notifier)]
-        for recipient in self._recipients[notifier_name]:
+        recipients = self._recipients[notifier_name]
+        if not recipients:
+            return
+        key = _mod_key(mod)
+        filter_by_key = key is not None and isinstance(notifier.read, dict)
+        line = None
+        for recipient, key_filter in recipients.items():
+            if (key_filter is not None and filter_by_key
+                    and not _key_matches(key, key_filter)):
+                continue
+            if line is None:
+                line = (pyon.encode(mod) + "\n").encode()
             recipient.put_nowait(line)
@@ -6,15 +6,23 @@ from artiq.sim import time
 
 
 class Core:
-    def __init__(self, dmgr):
+    """Simulated core device.
+
+    :param print_timeline: if True, the timeline of events is printed and
+        cleared after each top-level kernel. Otherwise, events accumulate in
+        ``artiq.sim.time.manager.timeline`` (see
+        :class:`artiq.sim.time.Timeline`) for later analysis.
+    """
+    def __init__(self, dmgr, print_timeline=True):
         self.ref_period = 1
+        self.print_timeline = print_timeline
         self._level = 0
 
     def run(self, k_function, k_args, k_kwargs):
         self._level += 1
         r = k_function.artiq_embedded.function(*k_args, **k_kwargs)
         self._level -= 1
-        if self._level == 0:
+        if self._level == 0 and self.print_timeline:
             print(time.manager.format_timeline())
             time.manager.timeline.clear()
         return r
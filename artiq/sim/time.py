@@ -1,4 +1,6 @@
-from operator import itemgetter
+from array import array
+
+import numpy
 
 from artiq.language.units import *
 from artiq.language import core as core_language
@@ -24,10 +26,215 @@ class ParallelTimeContext:
             self.block_duration = amount
 
 
+class Timeline:
+    """Columnar record of the events of a simulated kernel.
+
+    Each event consists of a time, a device name, an action (e.g. ``"pulse"``)
+    and an optional value. Times are stored in a compact array, and device
+    names and actions as indices into the :attr:`devices` and :attr:`actions`
+    lists. Events are kept in the order they were recorded.
+
+    Iterating yields ``(time, description)`` tuples, where the description
+    is the tuple originally passed to :meth:`Manager.event`.
+    """
+    def __init__(self):
+        self.devices = []
+        self.actions = []
+        self._device_codes = dict()
+        self._action_codes = dict()
+        self.clear()
+
+    def clear(self):
+        """Remove all events."""
+        self.time = array("d")
+        self.device = array("l")
+        self.action = array("l")
+        self.value = []
+
+    def _code(self, codes, names, name):
+        try:
+            return codes[name]
+        except KeyError:
+            code = codes[name] = len(names)
+            names.append(name)
+            return code
+
+    def append(self, time, action, device="", value=None):
+        """Record an event."""
+        self.time.append(time)
+        self.action.append(self._code(self._action_codes, self.actions, action))
+        self.device.append(self._code(self._device_codes, self.devices, device))
+        self.value.append(value)
+
+    def __len__(self):
+        return len(self.time)
+
+    def _description(self, i):
+        description = (self.actions[self.action[i]],)
+        device = self.devices[self.device[i]]
+        if device:
+            description += (device,)
+        value = self.value[i]
+        if isinstance(value, tuple):
+            return description + value
+        elif value is not None:
+            return description + (value,)
+        else:
+            return description
+
+    def __iter__(self):
+        for i in range(len(self.time)):
+            yield self.time[i], self._description(i)
+
+    def _order(self):
+        return numpy.argsort(numpy.frombuffer(self.time), kind="mergesort")
+
+    def to_arrays(self, device=None, action=None, start=None, stop=None):
+        """Return the events as a dictionary of NumPy arrays with the keys
+        ``"time"``, ``"device"``, ``"action"`` and ``"value"``, sorted by time.
+
+        Events can be selected by device name, action and time interval
+        (``start`` inclusive, ``stop`` exclusive). The value array has a
+        floating point type if all selected values are numbers, and the
+        object type otherwise."""
+        order = self._order()
+        time = numpy.frombuffer(self.time)[order]
+        device_codes = numpy.frombuffer(self.device, dtype=numpy.dtype("l"))[order]
+        action_codes = numpy.frombuffer(self.action, dtype=numpy.dtype("l"))[order]
+
+        mask = numpy.ones(len(order), dtype=bool)
+        if device is not None:
+            mask &= device_codes == self._device_codes.get(device, -1)
+        if action is not None:
+            mask &= action_codes == self._action_codes.get(action, -1)
+        if start is not None:
+            mask &= time >= start
+        if stop is not None:
+            mask &= time < stop
+        order = order[mask]
+
+        values = [self.value[i] for i in order]
+        if all(isinstance(v, (int, float, numpy.number)) for v in values):
+            values = numpy.array(values, dtype=float)
+        else:
+            values = numpy.array(values + [None], dtype=object)[:-1]
+        return {
+            "time": time[mask],
+            "device": numpy.array(self.devices, dtype=object)[device_codes[mask]],
+            "action": numpy.array(self.actions, dtype=object)[action_codes[mask]],
+            "value": values
+        }
+
+    def format(self):
+        """Return a human-readable listing of the events, sorted by time."""
+        lines = []
+        prev_time = 0*s
+        for i in self._order():
+            time = self.time[i]
+            lines.append("@{:.9f} (+{:.9f}) ".format(time, time-prev_time) +
+                         "".join("{:16}".format(str(item))
+                                 for item in self._description(i)))
+            prev_time = time
+        return "".join(line + "\n" for line in lines)
+
+    def write_vcd(self, f, timescale=1*ns):
+        """Write the events to the text file ``f`` in VCD format.
+
+        Every device is a scope containing one variable per action. Boolean
+        values are written as wires, numbers as reals, and actions without
+        values as events. For tuple values, the first element is used."""
+        def scalar(value):
+            if isinstance(value, tuple):
+                return value[0] if value else None
+            return value
+
+        variables = dict()
+        kinds = dict()
+        for device, action, value in zip(self.device, self.action, self.value):
+            value = scalar(value)
+            if value is None:
+                kind = "event"
+            elif isinstance(value, (bool, numpy.bool_)):
+                kind = "wire"
+            else:
+                kind = "real"
+            previous = kinds.setdefault((device, action), kind)
+            if previous != kind:
+                kinds[(device, action)] = "real"
+
+        f.write("$timescale {}s $end\n".format(_format_timescale(timescale)))
+        for device_code, device_name in enumerate(self.devices):
+            f.write("$scope module {} $end\n".format(device_name or "timeline"))
+            for (device, action), kind in sorted(kinds.items()):
+                if device != device_code:
+                    continue
+                identifier = _vcd_identifier(len(variables))
+                variables[(device, action)] = identifier, kind
+                f.write("$var {} {} {} {} $end\n".format(
+                    kind, 1 if kind != "real" else 64, identifier,
+                    self.actions[action]))
+            f.write("$upscope $end\n")
+        f.write("$enddefinitions $end\n")
+
+        chunks = []
+        current_time = None
+        for i in self._order():
+            t = int(round(self.time[i]/timescale))
+            if t != current_time:
+                chunks.append("#{}\n".format(t))
+                current_time = t
+            identifier, kind = variables[(self.device[i], self.action[i])]
+            value = scalar(self.value[i])
+            if kind == "event":
+                chunks.append("1{}\n".format(identifier))
+            elif kind == "wire":
+                chunks.append("{}{}\n".format(int(bool(value)), identifier))
+            else:
+                chunks.append("r{} {}\n".format(float(value), identifier))
+            if len(chunks) > 8192:
+                f.write("".join(chunks))
+                chunks.clear()
+        f.write("".join(chunks))
+
+    def write_hdf5(self, group):
+        """Write the events to the ``h5py`` group (or file) ``group``.
+
+        Datasets ``time``, ``device`` and ``action`` are written, the latter
+        two as indices into the ``devices`` and ``actions`` attributes of the
+        group. Numeric values are written into the ``value`` dataset."""
+        order = self._order()
+        group["time"] = numpy.frombuffer(self.time)[order]
+        group["device"] = numpy.frombuffer(self.device, dtype=numpy.dtype("l"))[order]
+        group["action"] = numpy.frombuffer(self.action, dtype=numpy.dtype("l"))[order]
+        group.attrs["devices"] = numpy.array(self.devices, dtype="S")
+        group.attrs["actions"] = numpy.array(self.actions, dtype="S")
+        values = self.to_arrays()["value"]
+        if values.dtype != object:
+            group["value"] = values
+
+
+def _format_timescale(timescale):
+    for unit, factor in (("", 1), ("m", 1e-3), ("u", 1e-6), ("n", 1e-9),
+                         ("p", 1e-12), ("f", 1e-15)):
+        n = timescale/factor
+        if round(n) in (1, 10, 100) and abs(n - round(n)) < 1e-6:
+            return "{} {}".format(int(round(n)), unit)
+    raise ValueError("unsupported VCD timescale: {}".format(timescale))
+
+
+def _vcd_identifier(n):
+    identifier = ""
+    while True:
+        identifier += chr(33 + n % 94)
+        n //= 94
+        if not n:
+            return identifier
+
+
 class Manager:
     def __init__(self):
         self.stack = [SequentialTimeContext(0*s)]
-        self.timeline = []
+        self.timeline = Timeline()
 
     def enter_sequential(self):
         new_context = SequentialTimeContext(self.get_time_mu())
@@ -56,18 +263,20 @@ class Manager:
     take_time = take_time_mu
 
     def event(self, description):
-        self.timeline.append((self.get_time_mu(), description))
+        """Record an event described by the tuple
+        ``(action, device, value...)`` at the current time."""
+        n = len(description)
+        if n == 3 and not isinstance(description[2], tuple):
+            value = description[2]
+        elif n >= 3:
+            value = description[2:]
+        else:
+            value = None
+        self.timeline.append(self.get_time_mu(), description[0],
+                             description[1] if n > 1 else "", value)
 
     def format_timeline(self):
-        r = ""
-        prev_time = 0*s
-        for time, description in sorted(self.timeline, key=itemgetter(0)):
-            r += "@{:.9f} (+{:.9f}) ".format(time, time-prev_time)
-            for item in description:
-                r += "{:16}".format(str(item))
-            r += "\n"
-            prev_time = time
-        return r
+        return self.timeline.format()
 
 manager = Manager()
 core_language.set_time_manager(manager)
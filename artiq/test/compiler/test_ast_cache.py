@@ -0,0 +1,41 @@
+import unittest
+import tempfile
+
+from pythonparser import diagnostic
+
+from artiq.compiler.ast_cache import ASTCache
+
+
+source_code = """    def f(self, x):
+        return x + 1
+"""
+
+
+class TestASTCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = diagnostic.Engine(all_errors_are_fatal=True)
+
+    def test_copies_are_independent(self):
+        cache = ASTCache()
+        a = cache.parse_function(source_code, "test.py", 10, self.engine)
+        a.name = "mangled"
+        a.body.pop()
+        b = cache.parse_function(source_code, "test.py", 10, self.engine)
+        self.assertEqual(b.name, "f")
+        self.assertEqual(len(b.body), 1)
+        self.assertEqual(b.loc.line(), 10)
+
+    def test_key(self):
+        cache = ASTCache()
+        cache.parse_function(source_code, "test.py", 10, self.engine)
+        cache.parse_function(source_code, "test.py", 20, self.engine)
+        cache.parse_function(source_code.replace("1", "2"), "test.py", 10, self.engine)
+        self.assertEqual(len(cache.entries), 3)
+
+    def test_persistent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ASTCache(directory).parse_function(source_code, "test.py", 10, self.engine)
+            cache = ASTCache(directory)
+            cache._parse = None
+            node = cache.parse_function(source_code, "test.py", 10, self.engine)
+            self.assertEqual(node.name, "f")
@@ -0,0 +1,44 @@
+import unittest
+
+from pythonparser import diagnostic
+
+from artiq.compiler.module import Module, Source
+from artiq.compiler.targets import NativeTarget
+
+
+source_code = """
+def double(x):
+    return x * 2
+
+def add_one(x):
+    return double(x) // 2 + 1
+
+def entry():
+    print(add_one(3), "hello")
+"""
+
+
+class TestPartitions(unittest.TestCase):
+    def compile(self):
+        engine = diagnostic.Engine(all_errors_are_fatal=True)
+        target = NativeTarget(codegen_partitions=2)
+        module = Module(Source.from_string(source_code, engine=engine))
+        return target, target.compile(module)
+
+    def test_single_partition(self):
+        # linkage is only changed when there are several partitions
+        target, llmodule = self.compile()
+        llvm_ir = str(llmodule)
+        self.assertEqual(len(target.assemble_partitioned(llmodule, 1)), 1)
+        self.assertEqual(str(llmodule), llvm_ir)
+
+    def test_partitions(self):
+        target, llmodule = self.compile()
+        # functions may have been inlined, leaving a single partition
+        partitions = target.partition(llmodule, 2)
+        self.assertLessEqual(len(partitions), 2)
+        functions = {llfunction.name for llfunction in llmodule.functions
+                     if not llfunction.is_declaration}
+        self.assertEqual(set.union(*partitions), functions)
+        self.assertEqual(len(target.assemble_partitioned(llmodule, 2)),
+                         len(partitions))
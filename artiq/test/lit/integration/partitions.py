@@ -0,0 +1,38 @@
+# RUN: %python -m artiq.compiler.testbench.jit %s >%t.1
+# RUN: %python -m artiq.compiler.testbench.jit +partitions=2 %s >%t.2
+# RUN: diff %t.1 %t.2
+# RUN: OutputCheck %s --file-to-check=%t.2
+# RUN: %python %s >%t.3
+# RUN: OutputCheck %s --file-to-check=%t.3
+# REQUIRES: exceptions
+
+# Functions and constants are spread over partitions, and referenced
+# across them.
+
+def double(x):
+    return x * 2
+
+def add_one(x):
+    return double(x) // 2 + 1
+
+def fail(x):
+    if x > 1:
+        raise ValueError
+    return x
+
+class C:
+    x = 5
+    def get(self):
+        return add_one(self.x)
+
+# CHECK-L: 4 [2, 4, 6]
+print(add_one(3), [double(x) for x in [1, 2, 3]])
+
+# CHECK-L: 6 hello
+print(C().get(), "hello")
+
+# CHECK-L: caught
+try:
+    fail(2)
+except ValueError:
+    print("caught")
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from artiq.coredevice.comm_analyzer import MessageType, decode_dump
+from artiq.coredevice.analyzer_capture import (AnalyzerStore,
+                                               AnalyzerCapture, encode_dump)
+from artiq.test.test_comm_analyzer import (encode_message,
+                                           encode_dump as encode_test_dump)
+
+
+test_address = "::1"
+test_port = 7783
+
+
+def make_dump(rtio_counters, stopped=True):
+    messages = [encode_message(MessageType.output, 1, data=i,
+                               rtio_counter=t, timestamp=t + 10)
+                for i, t in rtio_counters]
+    if stopped:
+        messages.append(encode_message(MessageType.stopped,
+                                       rtio_counter=rtio_counters[-1][1] + 1))
+    return encode_test_dump(messages, log_channel=7)
+
+
+class _ReplayServer:
+    """Stand-in for the analyzer service of the core device, which sends
+    the next recorded dump on every connection."""
+    def __init__(self, dumps):
+        self.dumps = list(dumps)
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle_connection, test_address, test_port)
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _handle_connection(self, reader, writer):
+        if self.dumps:
+            writer.write(self.dumps.pop(0))
+        writer.close()
+
+
+class AnalyzerCaptureCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "analyzer")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        self.tmpdir.cleanup()
+
+    def data(self, dump):
+        return [m.data for m in dump.messages]
+
+    async def _do_test_capture(self):
+        # the second dump repeats messages of the first one, including
+        # one of the two messages with the last RTIO counter value
+        server = _ReplayServer([
+            make_dump([(0, 100), (1, 200), (2, 300), (3, 300)]),
+            make_dump([(3, 300), (4, 300), (5, 400)], stopped=False),
+            make_dump([(6, 500)])
+        ])
+        await server.start()
+        try:
+            store = AnalyzerStore(self.directory)
+            capture = AnalyzerCapture(store, test_address, test_port)
+            self.assertEqual(await capture.capture(), 4)
+            self.assertEqual(await capture.capture(), 2)
+            self.assertEqual(await capture.capture(), 1)
+        finally:
+            await server.stop()
+        return store
+
+    def test_capture(self):
+        store = self.loop.run_until_complete(self._do_test_capture())
+        self.assertEqual(store.get_range(), (100, 500))
+        dump = store.query()
+        self.assertEqual(dump.log_channel, 7)
+        self.assertEqual(self.data(dump), list(range(7)))
+        self.assertEqual(self.data(store.query(200, 400)), [1, 2, 3, 4])
+        self.assertEqual(self.data(store.query(start=400)), [5, 6])
+        self.assertEqual(self.data(decode_dump(encode_dump(dump))),
+                         list(range(7)))
+
+        # the state is restored when the store is opened again
+        store = AnalyzerStore(self.directory)
+        self.assertEqual(
+            store.add(decode_dump(make_dump([(6, 500), (7, 600)]))), 1)
+        self.assertEqual(self.data(store.query()), list(range(8)))
+
+    def test_reset(self):
+        store = AnalyzerStore(self.directory)
+        store.add(decode_dump(make_dump([(0, 100), (1, 200)])))
+        with self.assertLogs("artiq.coredevice.analyzer_capture", "WARNING"):
+            self.assertEqual(
+                store.add(decode_dump(make_dump([(2, 10), (3, 20)]))), 2)
+        self.assertEqual(self.data(store.query()), [0, 1, 2, 3])
+        self.assertEqual(self.data(store.query(stop=100)), [2, 3])
+
+    def test_retention(self):
+        store = AnalyzerStore(self.directory, segment_size=64,
+                              max_size=128)
+        for i in range(10):
+            store.add(decode_dump(make_dump([(i, 100*i)])))
+        # segments of two messages, at most four messages kept
+        self.assertEqual(len(store.segments), 2)
+        self.assertEqual(self.data(store.query()), [6, 7, 8, 9])
+        self.assertEqual(store.get_range(), (600, 900))
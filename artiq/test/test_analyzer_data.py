@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from artiq.coredevice.comm_analyzer import MessageType, decode_dump
+from artiq.coredevice.analyzer_data import get_channel_names, AnalyzerData
+from artiq.test.test_comm_analyzer import encode_message, encode_dump
+
+
+devices = {
+    "ttl0": {"type": "local", "module": "artiq.coredevice.ttl",
+             "class": "TTLOut", "arguments": {"channel": 0}},
+    "ttl1": {"type": "local", "module": "artiq.coredevice.ttl",
+             "class": "TTLInOut", "arguments": {"channel": 1}},
+    "dds0": {"type": "local", "module": "artiq.coredevice.ad9914",
+             "class": "AD9914",
+             "arguments": {"sysclk": 3e9, "bus_channel": 5, "channel": 0}},
+    "dds1": {"type": "local", "module": "artiq.coredevice.ad9914",
+             "class": "AD9914",
+             "arguments": {"sysclk": 3e9, "bus_channel": 5, "channel": 1}},
+    "ttl_alias": "ttl0"
+}
+
+
+class AnalyzerDataCase(unittest.TestCase):
+    def setUp(self):
+        messages = [
+            encode_message(MessageType.output, 0, data=1,
+                           rtio_counter=900, timestamp=1000),
+            encode_message(MessageType.output, 1, data=1,
+                           rtio_counter=1000, timestamp=1200),
+            encode_message(MessageType.output, 0, data=0,
+                           rtio_counter=1000, timestamp=1100),
+            encode_message(MessageType.input, 1, data=1,
+                           rtio_counter=1400, timestamp=1300),
+            encode_message(MessageType.output, 9, data=0x12,
+                           rtio_counter=1500, timestamp=1500),
+            encode_message(MessageType.exception, 0, rtio_counter=1600,
+                           address=0b010100),
+            encode_message(MessageType.stopped, rtio_counter=2000)
+        ]
+        self.dump = decode_dump(encode_dump(messages, log_channel=7))
+        self.data = AnalyzerData.from_dump(self.dump, devices)
+
+    def test_channel_names(self):
+        self.assertEqual(get_channel_names(devices, 7), {
+            0: "ttl0", 1: "ttl1", 5: "dds0,dds1", 7: "rtio_log"})
+
+    def check_data(self, data):
+        self.assertEqual(data.channels, {"ttl0": 0, "ttl1": 1, "ch9": 9})
+        self.assertEqual(data.log_channel, 7)
+        np.testing.assert_equal(data.stopped, [2000])
+
+        ttl0 = data.get("ttl0")
+        np.testing.assert_equal(ttl0["timestamp"], [1000, 1100])
+        np.testing.assert_equal(ttl0["data"], [1, 0])
+        np.testing.assert_equal(data.get(0, "exception")["exception_type"],
+                                [0b010100])
+        self.assertEqual(len(data.get("ttl0", "input")["timestamp"]), 0)
+        np.testing.assert_equal(
+            data.get(1, MessageType.input)["rtio_counter"], [1400])
+
+        window = data.get("ttl0", start=1050, stop=2000)
+        np.testing.assert_equal(window["timestamp"], [1100])
+        np.testing.assert_equal(window["rtio_counter"], [1000])
+
+        merged = data.select()
+        np.testing.assert_equal(merged["timestamp"],
+                                [1000, 1100, 1200, 1500])
+        np.testing.assert_equal(merged["channel"], [0, 0, 1, 9])
+        merged = data.select(["ttl1", 0], start=1100, stop=1500)
+        np.testing.assert_equal(merged["timestamp"], [1100, 1200])
+        np.testing.assert_equal(merged["channel"], [0, 1])
+
+    def test_from_dump(self):
+        self.check_data(self.data)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for ext in ".h5", ".npz":
+                filename = os.path.join(tmpdir, "analyzer" + ext)
+                self.data.save(filename)
+                self.check_data(AnalyzerData.load(filename))
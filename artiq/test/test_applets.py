@@ -0,0 +1,24 @@
+import unittest
+import unittest.mock
+
+from artiq.applets.simple import SimpleApplet
+
+
+class SimpleAppletCase(unittest.TestCase):
+    def make_applet(self, argv):
+        applet = SimpleApplet(object)
+        applet.add_dataset("y", "Y values")
+        applet.add_dataset("x", "X values", required=False)
+        applet.add_dataset("fit", "Fit values", required=False)
+        with unittest.mock.patch("sys.argv", ["applet"] + argv):
+            applet.args_init()
+        return applet
+
+    def test_key_filter(self):
+        applet = self.make_applet(["y[0]", "--x", "x"])
+        self.assertEqual(applet.get_key_filter(), ["x", "y[[]0]"])
+
+    def test_key_filter_unset(self):
+        # optional datasets that are not given are not subscribed to
+        applet = self.make_applet(["y"])
+        self.assertEqual(applet.get_key_filter(), ["y"])
@@ -16,6 +16,38 @@ class TestSplineCoef(unittest.TestCase):
     def test_get_segment(self):
         return list(self.s.get_segment(start=1.5, stop=3.2, scale=.01))
 
+    def test_build_segment(self):
+        c = np.array([[[1., 0.], [0., 2.]],
+                      [[0., 0.], [3., 0.]],
+                      [[4., 0.], [0., 0.]]])
+        self.assertEqual(list(coefficients.build_segment([5, 6], c)), [
+            {"duration": 5, "channel_data": [
+                {"bias": {"amplitude": [1., 0., 4.]}},
+                {"bias": {"amplitude": [0., 3.]}}]},
+            {"duration": 6, "channel_data": [
+                {"bias": {"amplitude": [0.]}},
+                {"bias": {"amplitude": [2.]}}]}])
+        line = next(coefficients.build_segment([5], c[:, :, 1:],
+                                               compress=False))
+        self.assertEqual(line["channel_data"][0],
+                         {"bias": {"amplitude": [0., 0., 0.]}})
+
+    def test_derivatives(self):
+        for start, stop in (0, 4), (3.2, 1.5):
+            x = self.s.crop_x(start, stop)
+            u = self.s.spline(x)
+            alde = self.s.spline.alde(x)[:, :, :4].transpose(2, 0, 1)
+            np.testing.assert_allclose(u, alde, rtol=0, atol=1e-12)
+            # splev
+            np.testing.assert_allclose(u, self.s.spline(x, use_alde=False),
+                                       rtol=0, atol=1e-12)
+
+    def test_cache(self):
+        a = self.test_get_segment()
+        durations, c = self.s.get_coefficients(1.5, 3.2, .01)
+        self.assertIs(self.s.get_coefficients(1.5, 3.2, .01)[1], c)
+        self.assertEqual(self.test_get_segment(), a)
+
     def test_synth(self):
         d = self.test_get_segment()
         d[0]["trigger"] = True
@@ -0,0 +1,129 @@
+import unittest
+import struct
+import io
+
+import numpy as np
+
+from artiq.coredevice.comm_analyzer import (
+    MessageType, ExceptionType, OutputMessage, InputMessage,
+    ExceptionMessage, StoppedMessage, decode_message, decode_dump,
+    decoded_dump_to_vcd)
+
+
+def encode_message(message_type, channel=0, data=0, address=0,
+                   rtio_counter=0, timestamp=0):
+    return struct.pack(">QIQQI", data, address, rtio_counter, timestamp,
+                       channel << 2 | message_type.value)
+
+
+def encode_dump(messages, log_channel=7, dds_onehot_sel=0):
+    payload = b"".join(messages)
+    return struct.pack(">IQbbb", len(payload), len(payload), 0,
+                       log_channel, dds_onehot_sel) + payload
+
+
+test_messages = [
+    encode_message(MessageType.output, 1, data=1, address=0,
+                   rtio_counter=900, timestamp=1000),
+    encode_message(MessageType.input, 2, data=0x1234,
+                   rtio_counter=1100, timestamp=1050),
+    encode_message(MessageType.output, 1, data=0, address=1,
+                   rtio_counter=1900, timestamp=2000),
+    encode_message(MessageType.exception, 3, rtio_counter=2100,
+                   address=ExceptionType.o_underflow.value),
+    encode_message(MessageType.output, 7, data=0x666f6f1e, address=0,
+                   rtio_counter=2200, timestamp=2300),
+    encode_message(MessageType.stopped, rtio_counter=3000)
+]
+
+expected_messages = [
+    OutputMessage(1, 1000, 900, 0, 1),
+    InputMessage(2, 1050, 1100, 0x1234),
+    OutputMessage(1, 2000, 1900, 1, 0),
+    ExceptionMessage(3, 2100, ExceptionType.o_underflow),
+    OutputMessage(7, 2300, 2200, 0, 0x666f6f1e),
+    StoppedMessage(3000)
+]
+
+
+class DecodeDumpCase(unittest.TestCase):
+    def test_decode_message(self):
+        for data, expected in zip(test_messages, expected_messages):
+            self.assertEqual(decode_message(data), expected)
+
+    def test_messages(self):
+        dump = decode_dump(encode_dump(test_messages))
+        self.assertEqual(dump.log_channel, 7)
+        self.assertFalse(dump.dds_onehot_sel)
+        self.assertEqual(len(dump.messages), len(expected_messages))
+        self.assertEqual(list(dump.messages), expected_messages)
+        self.assertEqual(dump.messages[-1], StoppedMessage(3000))
+        self.assertEqual(dump.messages[1:3], expected_messages[1:3])
+
+    def test_columns(self):
+        dump = decode_dump(encode_dump(test_messages))
+        output = dump.columns(MessageType.output)
+        np.testing.assert_equal(output["index"], [0, 2, 4])
+        np.testing.assert_equal(output["channel"], [1, 1, 7])
+        np.testing.assert_equal(output["timestamp"], [1000, 2000, 2300])
+        np.testing.assert_equal(output["rtio_counter"], [900, 1900, 2200])
+        np.testing.assert_equal(output["address"], [0, 1, 0])
+        np.testing.assert_equal(output["data"], [1, 0, 0x666f6f1e])
+        self.assertEqual(output["timestamp"].dtype, np.uint64)
+        input = dump.columns(MessageType.input)
+        self.assertEqual(set(input.keys()), {
+            "index", "channel", "timestamp", "rtio_counter", "data"})
+        np.testing.assert_equal(input["data"], [0x1234])
+        exception = dump.columns(MessageType.exception)
+        np.testing.assert_equal(exception["exception_type"],
+                                [ExceptionType.o_underflow.value])
+        stopped = dump.columns(MessageType.stopped)
+        np.testing.assert_equal(stopped["rtio_counter"], [3000])
+
+    def test_length(self):
+        with self.assertRaises(ValueError):
+            decode_dump(encode_dump(test_messages)[:-1])
+
+
+def double_bits(x):
+    return "{:064b}".format(struct.unpack(">Q", struct.pack(">d", x))[0])
+
+
+class VCDCase(unittest.TestCase):
+    def test_ttl(self):
+        devices = {
+            "core": {"type": "local", "module": "artiq.coredevice.core",
+                     "class": "Core", "arguments": {"ref_period": 1e-9}},
+            "ttl_out": {"type": "local", "module": "artiq.coredevice.ttl",
+                        "class": "TTLOut", "arguments": {"channel": 1}},
+            "ttl_in": {"type": "local", "module": "artiq.coredevice.ttl",
+                       "class": "TTLInOut", "arguments": {"channel": 2}}
+        }
+        # out of order, as recorded by the analyzer
+        messages = [
+            encode_message(MessageType.output, 1, data=0,
+                           rtio_counter=1200, timestamp=1100),
+            encode_message(MessageType.output, 1, data=1,
+                           rtio_counter=900, timestamp=1000),
+            encode_message(MessageType.input, 2, data=1,
+                           rtio_counter=1100, timestamp=1050),
+            encode_message(MessageType.output, 3, data=1,
+                           rtio_counter=1100, timestamp=1050),
+            encode_message(MessageType.stopped, rtio_counter=3000)
+        ]
+        f = io.StringIO()
+        decoded_dump_to_vcd(f, devices, decode_dump(encode_dump(messages)))
+        self.assertEqual(f.getvalue().splitlines(), [
+            "$timescale 1000ps $end",
+            "$var wire 1 ! ttl/ttl_in $end",
+            "$var wire 1 \" ttl/ttl_out $end",
+            "$var wire 64 # rtio_slack $end",
+            "#0",
+            "1\"",
+            "b" + double_bits(100*1e-9) + " #",
+            "#50",
+            "1!",
+            "#100",
+            "0\"",
+            "b" + double_bits(-100*1e-9) + " #"
+        ])
@@ -5,7 +5,7 @@ import logging
 import asyncio
 
 from artiq.devices.ctlmgr import Controllers
-from artiq.protocols.pc_rpc import AsyncioClient
+from artiq.protocols.pc_rpc import AsyncioClient, Server
 
 logger = logging.getLogger(__name__)
 
@@ -70,3 +70,66 @@ class ControllerCase(unittest.TestCase):
             await remote.ping()
 
         self.loop.run_until_complete(test())
+
+
+class _CountingServer(Server):
+    def __init__(self, *args, **kwargs):
+        Server.__init__(self, *args, **kwargs)
+        self.connections = 0
+
+    async def _handle_connection_cr(self, reader, writer):
+        self.connections += 1
+        await Server._handle_connection_cr(self, reader, writer)
+
+
+class _Target:
+    def ping(self):
+        return True
+
+
+class ControllerSessionCase(unittest.TestCase):
+    def setUp(self):
+        if os.name == "nt":
+            self.loop = asyncio.ProactorEventLoop()
+        else:
+            self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+
+    def test_persistent_session(self):
+        # the RPC server runs in this process, the controller process
+        # only has to stay alive
+        entry = {
+            "type": "controller",
+            "host": "::1",
+            "port": 3254,
+            "command": (sys.executable.replace("\\", "\\\\")
+                        + " -c \"import time; time.sleep(60)\""),
+            "ping_timer": 0.05,
+            "term_timeout": 0.5
+        }
+        async def test():
+            server = _CountingServer({"target": _Target()},
+                                     builtin_terminate=True)
+            await server.start(entry["host"], entry["port"])
+            controllers = Controllers(ping_concurrency=1)
+            controllers.host_filter = "::1"
+            try:
+                controllers["ctl"] = entry
+                await controllers.queue.join()
+                stats = controllers.active["ctl"].ping_stats
+                for i in range(100):
+                    if stats.count >= 3:
+                        break
+                    await asyncio.sleep(0.05)
+            finally:
+                await controllers.shutdown()
+                await server.stop()
+            return server.connections, stats.get()
+
+        connections, stats = self.loop.run_until_complete(test())
+        self.assertEqual(connections, 1)
+        self.assertGreaterEqual(stats["count"], 3)
+        self.assertEqual(stats["failures"], 0)
+        self.assertLessEqual(stats["min"], stats["mean"])
+        self.assertLessEqual(stats["mean"], stats["max"])
@@ -0,0 +1,137 @@
+import asyncio
+import unittest
+
+from PyQt5 import QtCore
+
+from artiq.gui import models
+
+
+class _Model(models.DictSyncModel):
+    def __init__(self, init):
+        models.DictSyncModel.__init__(self, ["Value"], init)
+
+    def sort_key(self, k, v):
+        return v
+
+    def convert(self, k, v, column):
+        return k
+
+
+class _TreeModel(models.DictSyncTreeSepModel):
+    def __init__(self, init):
+        models.DictSyncTreeSepModel.__init__(self, ".", ["Key", "Value"],
+                                             init)
+
+    def convert(self, k, v, column):
+        return v
+
+
+class _SignalRecorder:
+    signals = ["rowsInserted", "rowsRemoved", "rowsMoved",
+               "layoutChanged", "modelReset"]
+
+    def __init__(self, model):
+        self.emitted = []
+        for signal in self.signals:
+            getattr(model, signal).connect(
+                lambda *args, signal=signal: self.emitted.append(signal))
+
+    def count(self, signal):
+        return self.emitted.count(signal)
+
+
+class DictSyncModelCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def end_burst(self):
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+    def keys(self, model):
+        return [model.data(model.index(row, 0), QtCore.Qt.DisplayRole)
+                for row in range(model.rowCount(QtCore.QModelIndex()))]
+
+    def test_move(self):
+        model = _Model({"a": 1, "b": 2, "c": 3})
+        recorder = _SignalRecorder(model)
+        model["a"] = 4
+        self.assertEqual(self.keys(model), ["b", "c", "a"])
+        model["a"] = 0
+        self.assertEqual(self.keys(model), ["a", "b", "c"])
+        # the last row
+        model["c"] = -1
+        self.assertEqual(self.keys(model), ["c", "a", "b"])
+        model["b"] = -2
+        self.assertEqual(self.keys(model), ["b", "c", "a"])
+        model["b"] = -1.5
+        self.assertEqual(self.keys(model), ["b", "c", "a"])
+        self.assertEqual(recorder.emitted, ["rowsMoved"]*4)
+
+    def test_move_burst(self):
+        n = models._burst_threshold + 2
+        model = _Model({i: i for i in range(n)})
+        first = QtCore.QPersistentModelIndex(model.index(0, 0))
+        # the move that starts the layout change
+        last = QtCore.QPersistentModelIndex(model.index(n - 1, 0))
+        recorder = _SignalRecorder(model)
+        for i in range(n):
+            model[i] = -i
+        self.end_burst()
+        self.assertEqual(self.keys(model), list(reversed(range(n))))
+        self.assertEqual(recorder.count("rowsMoved"),
+                         models._burst_threshold)
+        self.assertEqual(recorder.count("layoutChanged"), 1)
+        self.assertEqual(recorder.count("modelReset"), 0)
+        self.assertEqual(first.row(), n - 1)
+        self.assertEqual(last.row(), 0)
+
+    def test_insert_burst(self):
+        n = models._burst_threshold + 2
+        model = _Model({})
+        recorder = _SignalRecorder(model)
+        for i in range(n):
+            model[i] = i
+        self.end_burst()
+        self.assertEqual(self.keys(model), list(range(n)))
+        self.assertEqual(recorder.count("rowsInserted"),
+                         models._burst_threshold)
+        self.assertEqual(recorder.count("layoutChanged"), 0)
+        self.assertEqual(recorder.count("modelReset"), 1)
+
+    def test_move_insert_burst(self):
+        # rows may not be inserted or removed during a layout change
+        n = models._burst_threshold + 2
+        model = _Model({i: i for i in range(n)})
+        recorder = _SignalRecorder(model)
+        for i in range(n):
+            model[i] = -i
+        model[n] = n
+        del model[0]
+        self.end_burst()
+        self.assertEqual(self.keys(model), list(range(n - 1, 0, -1)) + [n])
+        self.assertEqual(recorder.count("layoutChanged"), 1)
+        self.assertEqual(recorder.count("modelReset"), 1)
+
+
+class DictSyncTreeSepModelCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_removed_index(self):
+        model = _TreeModel({"a.b": 1, "a.c": 2})
+        a = model.index(0, 0, QtCore.QModelIndex())
+        b = model.index(0, 0, a)
+        self.assertEqual(model.index_to_key(b), "a.b")
+        del model["a.b"]
+        del model["a.c"]
+        for index in a, b:
+            self.assertFalse(model.parent(index).isValid())
+            self.assertIsNone(model.data(index, QtCore.Qt.DisplayRole))
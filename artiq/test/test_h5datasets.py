@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from artiq.browser.h5datasets import LazyDataset, load, read_datasets
+
+
+class H5DatasetsCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "results.h5")
+        self.big = np.arange(100000, dtype=">f8").reshape(1000, 100)
+        with h5py.File(self.filename, "w") as f:
+            f["datasets/scalar"] = 42
+            f["datasets/small"] = np.arange(10)
+            f["datasets/big"] = self.big
+            f.create_dataset("datasets/chunked", data=self.big,
+                             chunks=(100, 10), compression="gzip")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_datasets(self):
+        with h5py.File(self.filename, "r") as f:
+            datasets = read_datasets(f, "datasets")
+        self.assertEqual(datasets["scalar"], 42)
+        np.testing.assert_equal(datasets["small"], np.arange(10))
+        for name in "big", "chunked":
+            lazy = datasets[name]
+            self.assertIsInstance(lazy, LazyDataset)
+            self.assertEqual(lazy.shape, (1000, 100))
+            self.assertEqual(lazy.nbytes, self.big.nbytes)
+            value = load(lazy)
+            self.assertIs(type(value), np.ndarray)
+            np.testing.assert_equal(value, self.big)
+            # shared while referenced
+            self.assertIs(lazy.load(), value)
+        self.assertEqual(load(datasets["scalar"]), 42)
+
+    def test_threshold(self):
+        with h5py.File(self.filename, "r") as f:
+            datasets = read_datasets(f, "datasets", threshold=1 << 30)
+        self.assertNotIsInstance(datasets["big"], LazyDataset)
+        np.testing.assert_equal(datasets["big"], self.big)
+
+    def test_writeable(self):
+        with h5py.File(self.filename, "r") as f:
+            datasets = read_datasets(f, "datasets")
+        value = load(datasets["big"])
+        value -= 1
+        value[0] = 0
+        np.testing.assert_equal(value[1], self.big[1] - 1)
+        # the file is not changed
+        with h5py.File(self.filename, "r") as f:
+            np.testing.assert_equal(f["datasets/big"][()], self.big)
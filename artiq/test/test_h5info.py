@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from artiq.protocols import pyon
+from artiq.browser.h5info import read_h5_info, H5InfoCache
+
+
+def write_results(filename, rid, thumbnail=None):
+    with h5py.File(filename, "w") as f:
+        f["artiq_version"] = "4.0"
+        f["rid"] = rid
+        f["start_time"] = 1234.5
+        f["expid"] = pyon.encode({"repo_rev": "abc", "file": "foo.py",
+                                  "class_name": "Foo", "arguments": {}})
+        if thumbnail is not None:
+            f["datasets/thumbnail"] = np.void(thumbnail)
+
+
+class H5InfoCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.results = os.path.join(self.tmpdir.name, "results")
+        os.mkdir(self.results)
+        self.cache_dir = os.path.join(self.tmpdir.name, "cache")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        self.loop.close()
+
+    def test_read(self):
+        path = os.path.join(self.results, "000000001-Foo.h5")
+        write_results(path, 1, b"\x89PNG")
+        metadata, thumbnail = read_h5_info(path)
+        self.assertEqual(metadata, {
+            "artiq_version": "4.0", "repo_rev": "abc", "file": "foo.py",
+            "class_name": "Foo", "rid": 1, "start_time": 1234.5})
+        self.assertEqual(thumbnail, b"\x89PNG")
+
+        path = os.path.join(self.results, "other.h5")
+        with h5py.File(path, "w") as f:
+            f["x"] = 1
+        self.assertEqual(read_h5_info(path), (None, None))
+
+    def _get(self, cache, path, mtime):
+        ready = []
+        cache.ready_cb = ready.append
+        info = cache.get(path, mtime)
+        if info is None:
+            while not ready:
+                self.loop.run_until_complete(asyncio.sleep(0.01))
+            self.assertEqual(ready, [path])
+            info = cache.get(path, mtime)
+        return info, bool(ready)
+
+    def test_cache(self):
+        path = os.path.join(self.results, "000000002-Foo.h5")
+        write_results(path, 2)
+
+        cache = H5InfoCache(cache_dir=self.cache_dir)
+        info, read = self._get(cache, path, 1)
+        self.assertTrue(read)
+        self.assertEqual(info[0]["rid"], 2)
+        info, read = self._get(cache, path, 1)
+        self.assertFalse(read)
+        cache.close()
+
+        # persisted entries are reused...
+        cache = H5InfoCache(cache_dir=self.cache_dir)
+        info, read = self._get(cache, path, 1)
+        self.assertFalse(read)
+        self.assertEqual(info[0]["rid"], 2)
+        # ...unless the file has changed
+        write_results(path, 3)
+        info, read = self._get(cache, path, 2)
+        self.assertTrue(read)
+        self.assertEqual(info[0]["rid"], 3)
+        cache.close()
+
+    def test_eviction(self):
+        cache = H5InfoCache(cache_dir=self.cache_dir, max_dirs=1)
+        paths = []
+        for i in range(2):
+            directory = os.path.join(self.results, str(i))
+            os.mkdir(directory)
+            paths.append(os.path.join(directory, "r.h5"))
+            write_results(paths[-1], i)
+            self._get(cache, paths[-1], 1)
+        self.assertEqual(len(cache.dirs), 1)
+        # the evicted directory was persisted
+        info, read = self._get(cache, paths[0], 1)
+        self.assertFalse(read)
+        self.assertEqual(info[0]["rid"], 0)
+        cache.close()
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import urllib.parse
+
+import numpy as np
+
+from artiq.frontend.artiq_influxdb import DBWriter, Filter, format_influxdb
+
+
+test_address = "::1"
+test_port = 7784
+
+
+class _FakeInfluxDB:
+    """Stand-in for the InfluxDB HTTP API, which records the written data
+    and answers with the given HTTP statuses, then 204."""
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.writes = []
+        self.connections = 0
+        self.written = asyncio.Event()
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle_connection, test_address, test_port)
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                header = await reader.readuntil(b"\r\n\r\n")
+                lines = header.decode().split("\r\n")
+                path = lines[0].split()[1]
+                length = 0
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                query = urllib.parse.parse_qs(
+                    urllib.parse.urlsplit(path).query)
+                self.writes.append((query["db"][0], body.decode()))
+                self.written.set()
+                status = self.statuses.pop(0) if self.statuses else 204
+                writer.write("HTTP/1.1 {} X\r\nContent-Length: 0\r\n\r\n"
+                             .format(status).encode())
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+
+class DBWriterCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def lines(self, data):
+        return [line.split(" ")[:2] for line in data.split("\n")]
+
+    async def wait_writes(self, db, nwrites):
+        while len(db.writes) < nwrites:
+            db.written.clear()
+            await asyncio.wait_for(db.written.wait(), 5)
+
+    async def run_writer(self, db, writer, updates):
+        # each element of updates is written before the next one is sent
+        await db.start()
+        try:
+            writer.start()
+            try:
+                for k, v, nwrites in updates:
+                    writer.update(k, v)
+                    await self.wait_writes(db, nwrites)
+            finally:
+                await writer.stop()
+        finally:
+            await db.stop()
+
+    def make_writer(self, **kwargs):
+        return DBWriter("http://[{}]:{}".format(test_address, test_port),
+                        "", "", "db", "lab", **kwargs)
+
+    def test_batches(self):
+        db = _FakeInfluxDB()
+        writer = self.make_writer(batch_size=2, flush_interval=0.1)
+        updates = [("a", 1, 0), ("b", 2.5, 0), ("a", 3, 0), ("c", "x", 0),
+                   ("d", True, 2)]
+        self.loop.run_until_complete(self.run_writer(db, writer, updates))
+        self.assertEqual(db.connections, 1)
+        self.assertEqual([w[0] for w in db.writes], ["db", "db"])
+        self.assertEqual(self.lines(db.writes[0][1]),
+                         [["lab,dataset=a", "int=3i"],
+                          ["lab,dataset=b", "float=2.5"]])
+        self.assertEqual(self.lines(db.writes[1][1]),
+                         [["lab,dataset=c", "str=\"x\""],
+                          ["lab,dataset=d", "bool=True"]])
+
+    def test_retry(self):
+        db = _FakeInfluxDB([500, 503, 400])
+        writer = self.make_writer(flush_interval=0.01, retry_interval=0.01)
+        self.loop.run_until_complete(
+            self.run_writer(db, writer, [("a", 1, 3), ("b", 2, 4)]))
+        self.assertEqual(db.writes[0], db.writes[2])
+        # rejected data is not retried
+        self.assertEqual(self.lines(db.writes[3][1]),
+                         [["lab,dataset=b", "int=2i"]])
+
+    def test_max_pending(self):
+        writer = self.make_writer(max_pending=2)
+        writer.update("a", 1)
+        writer.update("b", 1)
+        writer.update("a", 2)
+        with self.assertLogs("artiq.frontend.artiq_influxdb", "WARNING"):
+            writer.update("c", 1)
+        self.assertEqual(list(writer._pending.keys()), ["a", "b"])
+
+
+class ReducerCase(unittest.TestCase):
+    def test_format(self):
+        a = np.array([[1, 2], [3, 6]])
+        self.assertEqual(format_influxdb(a, ["min", "mean", "size", -1, 5]),
+                         "min=1.0,mean=3.0,size=4i,[-1]=6.0")
+        self.assertEqual(format_influxdb([0.5, float("nan")], ["first",
+                                                                "max", 1]),
+                         "first=0.5")
+        self.assertEqual(format_influxdb(np.zeros(0), ["mean", "size"]),
+                         "size=0i")
+        self.assertEqual(format_influxdb(3, ["mean"]), "int=3i")
+        # non-numeric values and values without reducers are PYON-encoded
+        self.assertEqual(format_influxdb(["x"], ["last"]),
+                         "pyon=\"[\\\"x\\\"]\"")
+        self.assertEqual(format_influxdb([1, 2]), "pyon=\"[1, 2]\"")
+
+    def test_patterns(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "patterns.cfg")
+            with open(filename, "w") as f:
+                f.write("-*\n+counts.* mean  -1\n+counts.raw\n"
+                        "+scan.* median\n")
+            with self.assertLogs("artiq.frontend.artiq_influxdb",
+                                 "WARNING"):
+                f = Filter(filename)
+        self.assertIsNone(f._match("other"))
+        self.assertEqual(f._match("counts.a"), ["mean", -1])
+        self.assertEqual(f._match("counts.raw"), [])
+        self.assertEqual(f._match("scan.x"), [])
+        self.assertTrue(f._filter("scan.x"))
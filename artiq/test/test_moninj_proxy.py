@@ -0,0 +1,151 @@
+import unittest
+import asyncio
+import struct
+
+from artiq.coredevice.comm_moninj import CommMonInj
+from artiq.frontend.aqctl_moninj_proxy import MonInjProxy
+
+
+test_address = "::1"
+core_port = 7781
+proxy_port = 7782
+
+
+class _FakeCore:
+    """Stand-in for the moninj service of the core device."""
+    def __init__(self):
+        self.requests = []
+        self.writer = None
+        self.task = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle_connection, test_address, core_port)
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        if self.task is not None:
+            await self.task
+
+    def _handle_connection(self, reader, writer):
+        self.writer = writer
+        self.task = asyncio.ensure_future(self._serve(reader, writer))
+
+    async def _serve(self, reader, writer):
+        try:
+            await reader.readline()
+            while True:
+                ty = await reader.read(1)
+                if not ty:
+                    return
+                if ty == b"\x00":
+                    self.requests.append(("monitor", ) + struct.unpack(
+                        ">blb", await reader.readexactly(6)))
+                elif ty == b"\x01":
+                    self.requests.append(("inject", ) + struct.unpack(
+                        ">lbb", await reader.readexactly(6)))
+                elif ty == b"\x02":
+                    self.requests.append(("get_injection_status", ) +
+                        struct.unpack(">lb", await reader.readexactly(5)))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def send_monitor(self, channel, probe, value):
+        self.writer.write(b"\x00" + struct.pack(">lbl", channel, probe, value))
+
+    def send_injection_status(self, channel, override, value):
+        self.writer.write(b"\x01" + struct.pack(">lbb",
+                                                channel, override, value))
+
+
+class _Client:
+    def __init__(self):
+        self.values = []
+        self.injection_status = []
+        self.comm = CommMonInj(
+            lambda *args: self.values.append(args),
+            lambda *args: self.injection_status.append(args))
+
+
+async def _wait_until(condition, timeout=2.0):
+    t = 0.0
+    while not condition():
+        if t > timeout:
+            raise asyncio.TimeoutError
+        await asyncio.sleep(0.01)
+        t += 0.01
+
+
+class MonInjProxyCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    async def _do_test_proxy(self):
+        core = _FakeCore()
+        await core.start()
+        proxy = MonInjProxy(test_address, core_port, update_interval=0.05,
+                            reconnect_interval=0.1)
+        await proxy.start(test_address, proxy_port)
+        await proxy.connected.wait()
+        clients = [_Client(), _Client()]
+        for client in clients:
+            await client.comm.connect(test_address, proxy_port)
+
+        try:
+            # subscriptions are merged
+            for client in clients:
+                client.comm.monitor(True, 5, 0)
+            await _wait_until(lambda: core.requests)
+            await asyncio.sleep(0.1)
+            self.assertEqual(core.requests, [("monitor", 1, 5, 0)])
+
+            # values are fanned out and coalesced
+            for value in range(3):
+                core.send_monitor(5, 0, value)
+            await _wait_until(lambda: all(c.values for c in clients))
+            await asyncio.sleep(0.1)
+            for client in clients:
+                self.assertEqual(client.values, [(5, 0, 2)])
+
+            # a late subscriber gets the current value
+            client = _Client()
+            await client.comm.connect(test_address, proxy_port)
+            client.comm.monitor(True, 5, 0)
+            await _wait_until(lambda: client.values)
+            self.assertEqual(client.values, [(5, 0, 2)])
+            await client.comm.close()
+
+            # the probe is disabled when the last client unsubscribes
+            clients[0].comm.monitor(False, 5, 0)
+            await asyncio.sleep(0.1)
+            self.assertEqual(len(core.requests), 1)
+            clients[1].comm.monitor(False, 5, 0)
+            await _wait_until(lambda: len(core.requests) == 2)
+            self.assertEqual(core.requests[1], ("monitor", 0, 5, 0))
+
+            # injection status is sent to the requesting client only
+            clients[0].comm.inject(5, 1, 1)
+            clients[0].comm.get_injection_status(5, 1)
+            await _wait_until(lambda: len(core.requests) == 4)
+            self.assertEqual(core.requests[2:], [
+                ("inject", 5, 1, 1), ("get_injection_status", 5, 1)])
+            core.send_injection_status(5, 1, 1)
+            await _wait_until(lambda: clients[0].injection_status)
+            await asyncio.sleep(0.1)
+            self.assertEqual(clients[0].injection_status, [(5, 1, 1)])
+            self.assertEqual(clients[1].injection_status, [])
+        finally:
+            for client in clients:
+                await client.comm.close()
+            await proxy.stop()
+            await core.stop()
+
+    def test_proxy(self):
+        self.loop.run_until_complete(self._do_test_proxy())
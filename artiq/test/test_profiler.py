@@ -0,0 +1,78 @@
+import io
+import os
+import sys
+import stat
+import tempfile
+import unittest
+
+from artiq.coredevice.profiler import Symbolizer, CallgrindWriter
+
+
+# Stand-in for addr2line with --addresses --functions --inlines: odd
+# addresses are in a function inlined into another one.
+fake_addr2line = """#!{python}
+import sys
+for line in sys.stdin:
+    addr = int(line, 16)
+    print("0x{{:08x}}".format(addr))
+    if addr:
+        print("f{{:x}}".format(addr))
+        print("/src/a.rs:{{}}".format(addr % 100))
+        if addr % 2:
+            print("caller{{:x}}".format(addr))
+            print("/src/b.rs:{{}}".format(addr % 7))
+    else:
+        print("??")
+        print("??:0")
+    sys.stdout.flush()
+"""
+
+
+class ProfilerCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        filename = os.path.join(self.tmpdir.name, "fake-addr2line")
+        with open(filename, "w") as f:
+            f.write(fake_addr2line.format(python=sys.executable))
+        os.chmod(filename, os.stat(filename).st_mode | stat.S_IEXEC)
+        self.path = os.environ["PATH"]
+        os.environ["PATH"] = self.tmpdir.name + os.pathsep + self.path
+
+    def tearDown(self):
+        os.environ["PATH"] = self.path
+        self.tmpdir.cleanup()
+
+    def test_symbolize(self):
+        symbolizer = Symbolizer("firmware", "fake", demangle=False)
+        symbolizer.symbolize_many(range(0x1000, 0x1000 + 20000))
+        self.assertEqual(symbolizer.symbolize(0x1000),
+                         [("f1000", "/src/a.rs", "96", 0x1000)])
+        self.assertEqual(symbolizer.symbolize(0x1001), [
+            ("f1001", "/src/a.rs", "97", 0x1001),
+            ("caller1001", "/src/b.rs", str(0x1001 % 7), 0x1001)])
+        # not prefetched
+        self.assertEqual(symbolizer.symbolize(0x42),
+                         [("f42", "/src/a.rs", "66", 0x42)])
+
+    def test_callgrind(self):
+        hits = {0x100: 3, 0x101: 1, 0x200: 7}
+        edges = {(0x100, 0x201): 2, (0x101, 0x200): 5}
+
+        output = io.StringIO()
+        writer = CallgrindWriter(output, "firmware", "fake",
+                                 demangle=False)
+        writer.header()
+        writer.profile(hits, edges)
+
+        expected = io.StringIO()
+        writer = CallgrindWriter(expected, "firmware", "fake",
+                                 demangle=False)
+        writer.header()
+        for addr, count in hits.items():
+            writer.hit(addr, count)
+        for (caller, callee), count in edges.items():
+            writer.edge(caller, callee, count)
+
+        self.assertEqual(output.getvalue(), expected.getvalue())
+        self.assertIn("fn=(3) caller101\n0x00000101 5 1\n",
+                      output.getvalue())
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from artiq.protocols import pyon
+from artiq.master.results_index import (ResultsIndex, ResultsIndexReader,
+                                        run_record, iter_result_files)
+from artiq.master.worker_db import RIDCounter
+
+
+def write_results(results_dir, rid, class_name, start_time, datasets):
+    subdir = os.path.join("2017-01-{:02}".format(rid % 28 + 1), "12")
+    os.makedirs(os.path.join(results_dir, subdir), exist_ok=True)
+    path = os.path.join(subdir, "{:09}-{}.h5".format(rid, class_name))
+    with h5py.File(os.path.join(results_dir, path), "w") as f:
+        group = f.create_group("datasets")
+        for k, v in datasets.items():
+            group[k] = v
+        f.create_group("archive")
+        f["artiq_version"] = "4.0"
+        f["rid"] = rid
+        f["start_time"] = start_time
+        f["run_time"] = start_time + 1
+        f["expid"] = pyon.encode({
+            "file": "repository/foo.py", "class_name": class_name,
+            "repo_rev": "abc", "arguments": {"n": rid}, "log_level": 30})
+        return run_record(f, path)
+
+
+class ResultsIndexCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.results_dir = os.path.join(self.tmpdir.name, "results")
+        self.index = ResultsIndex(
+            os.path.join(self.tmpdir.name, "results_index.sqlite"))
+        self.records = [
+            write_results(self.results_dir, 0, "Foo", 1000.0,
+                          {"x": np.arange(10), "y": 1.5}),
+            write_results(self.results_dir, 1, "Bar", 2000.0,
+                          {"x": np.zeros((2, 3))}),
+            write_results(self.results_dir, 2, "Foo", 3000.0,
+                          {"z": "abc"}),
+        ]
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def test_record(self):
+        record = self.records[0]
+        self.assertEqual(record["rid"], 0)
+        self.assertEqual(record["class_name"], "Foo")
+        self.assertEqual(record["arguments"], {"n": 0})
+        self.assertEqual(record["start_time"], 1000.0)
+        self.assertEqual(record["datasets"]["x"][0], [10])
+        self.assertEqual(record["datasets"]["y"][0], [])
+        self.assertEqual(record["archive"], {})
+
+    def check_index(self):
+        self.assertEqual(self.index.last_rid(), 2)
+        self.assertEqual(self.index.get(1), self.records[1])
+        self.assertIsNone(self.index.get(3))
+        rids = lambda runs: [run["rid"] for run in runs]
+        self.assertEqual(rids(self.index.query()), [2, 1, 0])
+        self.assertEqual(rids(self.index.query(class_name="Foo")), [2, 0])
+        self.assertEqual(rids(self.index.query(dataset="x")), [1, 0])
+        self.assertEqual(rids(self.index.query(start=1500, stop=2500)), [1])
+        self.assertEqual(rids(self.index.query(limit=1)), [2])
+        run = self.index.query(class_name="Bar")[0]
+        self.assertEqual(run["path"], self.records[1]["path"])
+        self.assertEqual(run["arguments"], {"n": 1})
+
+    def test_add(self):
+        self.assertEqual(self.index.last_rid(), -1)
+        for record in self.records:
+            self.index.add(record)
+        self.check_index()
+        # replacing a run replaces its datasets
+        record = dict(self.records[0], datasets={})
+        self.index.add(record)
+        self.assertEqual(self.index.get(0)["datasets"], {})
+
+    def test_rebuild(self):
+        self.assertEqual(
+            sorted(iter_result_files(self.results_dir)),
+            [(record["rid"], record["path"]) for record in self.records])
+        self.index.add(dict(self.records[0], rid=10))
+        self.assertEqual(self.index.rebuild(self.results_dir, 2), 3)
+        self.check_index()
+
+    def test_reader(self):
+        for record in self.records:
+            self.index.add(record)
+        reader = ResultsIndexReader(self.index)
+        self.assertEqual(reader.last_rid(), 2)
+        self.assertEqual(reader.get(1), self.records[1])
+        self.assertEqual([run["rid"] for run in reader.query(dataset="z")],
+                         [2])
+        for method in "add", "close", "rebuild":
+            self.assertFalse(hasattr(reader, method))
+
+    def test_rid_counter(self):
+        # the index misses the most recent run
+        self.index.add(self.records[0])
+        self.index.add(self.records[1])
+        cache_filename = os.path.join(self.tmpdir.name, "last_rid.pyon")
+        counter = RIDCounter(cache_filename, self.results_dir, self.index)
+        self.assertEqual(counter.get(), 3)
+        # results may also miss runs that are in the index
+        os.remove(cache_filename)
+        self.index.add(dict(self.records[0], rid=10))
+        counter = RIDCounter(cache_filename, self.results_dir, self.index)
+        self.assertEqual(counter.get(), 11)
+
+    def test_nested_names(self):
+        # h5py stores dataset keys containing "/" in subgroups
+        record = write_results(self.results_dir, 3, "Foo", 4000.0,
+                               {"a/b": np.arange(3), "c": 1})
+        self.assertEqual(record["datasets"],
+                         {"a/b": ([3], np.arange(3).dtype.str),
+                          "c": ([], np.array(1).dtype.str)})
@@ -0,0 +1,100 @@
+import unittest
+import random
+
+import numpy as np
+
+from artiq.language.scan import *
+
+
+def reference_range(start, stop, npoints, randomize=False, seed=None):
+    if npoints == 1:
+        sequence = [start]
+    else:
+        dx = (stop - start)/(npoints - 1)
+        sequence = [i*dx + start for i in range(npoints)]
+    if randomize:
+        rng = random.Random(seed)
+        for i in reversed(range(1, npoints)):
+            j = int(rng.random()*(i + 1))
+            sequence[i], sequence[j] = sequence[j], sequence[i]
+    return sequence
+
+
+class TestRangeScan(unittest.TestCase):
+    def check(self, *args):
+        scan = RangeScan(*args)
+        reference = reference_range(*args)
+        self.assertEqual(list(scan), reference)
+        self.assertEqual(scan.sequence, reference)
+        self.assertEqual(list(np.asarray(scan)), reference)
+        self.assertEqual(len(scan), len(reference))
+        for i in range(-len(reference), len(reference)):
+            self.assertEqual(scan[i], reference[i])
+        self.assertEqual(list(scan[1::2]), reference[1::2])
+
+    def test_ordered(self):
+        self.check(0, 10, 11)
+        self.check(1.5, -3., 7)
+        self.check(3., 3., 1)
+        self.check(0., 1., 0)
+
+    def test_randomized(self):
+        self.check(0., 1., 100, True, 42)
+        self.check(0., 1., 1, True, 42)
+
+    def test_index_error(self):
+        with self.assertRaises(IndexError):
+            RangeScan(0., 1., 10)[10]
+
+    def test_sequence_writeback(self):
+        # kernels write back the attributes they access with setattr
+        for scan in RangeScan(0., 1., 5, True, 42), NoScan(3., 4):
+            reference = list(scan)
+            setattr(scan, "sequence", scan.sequence)
+            self.assertEqual(scan.sequence, reference)
+            self.assertEqual(list(scan), reference)
+            scan.sequence = [2., 1.]
+            self.assertEqual(list(scan), [2., 1.])
+            self.assertEqual(len(scan), 2)
+            self.assertEqual(scan[-1], 1.)
+            self.assertEqual(list(np.asarray(scan)), [2., 1.])
+
+    def test_describe(self):
+        scan = RangeScan(1., 2., 3, True, 4)
+        self.assertEqual(Scannable().process(scan.describe()).describe(),
+                         scan.describe())
+
+
+class TestMultiScanManager(unittest.TestCase):
+    def test_order(self):
+        msm = MultiScanManager(("a", RangeScan(0., 1., 3)),
+                               ("b", ExplicitScan([5, 6])),
+                               ("c", NoScan(7, 2)))
+        points = [(p.a, p.b, p.c) for p in msm]
+        self.assertEqual(len(msm), 12)
+        self.assertEqual(points, [(a, b, c) for a in (0., .5, 1.)
+                                            for b in (5, 6) for c in (7, 7)])
+
+
+class TestAdaptiveScan(unittest.TestCase):
+    def test_refines_feature(self):
+        scan = AdaptiveScan(0., 10., 11, 50, 1e-3)
+        for x in scan:
+            scan.feed(x, float(x > 3.3))
+        self.assertEqual(len(scan.points), 50)
+        self.assertEqual(list(scan.points), sorted(scan.points))
+        below = scan.points[scan.points < 3.3].max()
+        above = scan.points[scan.points > 3.3].min()
+        self.assertLess(above - below, 2e-3)
+
+    def test_uniform_without_feedback(self):
+        self.assertEqual(list(AdaptiveScan(0., 4., 3, 5)),
+                         [0., 2., 4., 1., 3.])
+
+    def test_min_step(self):
+        self.assertEqual(len(list(AdaptiveScan(0., 1., 2, 100, 0.2))), 9)
+
+    def test_describe(self):
+        scan = AdaptiveScan(1., 2., 3, 10, 0.1)
+        self.assertEqual(Scannable().process(scan.describe()).describe(),
+                         scan.describe())
@@ -0,0 +1,57 @@
+import unittest
+import io
+
+from artiq.language.units import us
+from artiq.sim import time
+
+
+class TimelineCase(unittest.TestCase):
+    def setUp(self):
+        self.manager = time.Manager()
+
+    def event(self, description, duration=0):
+        self.manager.event(description)
+        self.manager.take_time(duration)
+
+    def test_record(self):
+        self.event(("pulse", "ttl0", 1*us), 1*us)
+        self.event(("set", "ttl0", True))
+        self.event(("pulse", "dds", 1e6, 2*us))
+        tl = self.manager.timeline
+        self.assertEqual(len(tl), 3)
+        self.assertEqual(list(tl), [(0, ("pulse", "ttl0", 1*us)),
+                                    (1*us, ("set", "ttl0", True)),
+                                    (1*us, ("pulse", "dds", 1e6, 2*us))])
+
+        arrays = tl.to_arrays(device="ttl0")
+        self.assertEqual(list(arrays["time"]), [0, 1*us])
+        self.assertEqual(list(arrays["value"]), [1*us, 1.0])
+        self.assertEqual(len(tl.to_arrays(start=0.5*us)["time"]), 2)
+
+        tl.clear()
+        self.assertEqual(len(tl), 0)
+        self.assertEqual(self.manager.format_timeline(), "")
+
+    def test_format_sorted(self):
+        self.manager.enter_parallel()
+        self.manager.enter_sequential()
+        self.manager.take_time(2*us)
+        self.event(("set", "a", 1))
+        self.manager.exit()
+        self.manager.enter_sequential()
+        self.manager.take_time(1*us)
+        self.event(("set", "b", 2))
+        self.manager.exit()
+        self.manager.exit()
+        lines = self.manager.format_timeline().splitlines()
+        self.assertTrue(lines[0].startswith("@0.000001000 (+0.000001000) set"))
+        self.assertTrue(lines[1].startswith("@0.000002000 (+0.000001000) set"))
+
+    def test_vcd(self):
+        self.event(("set", "ttl0", True), 1*us)
+        self.event(("set", "ttl0", False))
+        f = io.StringIO()
+        self.manager.timeline.write_vcd(f)
+        vcd = f.getvalue()
+        self.assertIn("$var wire 1 ! set $end", vcd)
+        self.assertTrue(vcd.endswith("#0\n1!\n#1000\n0!\n"))
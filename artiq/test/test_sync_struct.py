@@ -1,5 +1,6 @@
 import unittest
 import asyncio
+import copy
 import numpy as np
 
 from artiq.protocols import sync_struct
@@ -68,5 +69,38 @@ class SyncStructCase(unittest.TestCase):
     def test_recv(self):
         self.loop.run_until_complete(self._do_test_recv())
 
+    async def _do_test_key_filter(self):
+        self.receiving_done = asyncio.Event()
+
+        test_dict = sync_struct.Notifier(dict())
+        test_dict["1"] = 1
+        test_dict["2"] = 2
+        publisher = sync_struct.Publisher({"test": test_dict})
+        await publisher.start(test_address, test_port)
+
+        mods = []
+        subscriber = sync_struct.Subscriber("test", self.init_test_dict,
+                                            [lambda mod: mods.append(copy.deepcopy(mod)),
+                                             self.notify],
+                                            key_filter=["1", "list*",
+                                                        "finished"])
+        await subscriber.connect(test_address, test_port)
+
+        write_test_data(test_dict)
+        await self.receiving_done.wait()
+
+        await subscriber.close()
+        await publisher.stop()
+
+        expected = {k: v for k, v in test_dict.read.items()
+                    if k in {"1", "list", "finished"}}
+        self.assertEqual(self.received_dict, expected)
+        self.assertEqual(mods[0]["action"], "init")
+        self.assertTrue(all(sync_struct._mod_key(mod) in expected
+                            for mod in mods[1:]))
+
+    def test_key_filter(self):
+        self.loop.run_until_complete(self._do_test_key_filter())
+
     def tearDown(self):
         self.loop.close()
@@ -1,7 +1,10 @@
 # Copyright (C) 2014, 2015 Robert Jordens <jordens@gmail.com>
 
+import time
 import unittest
 
+import numpy as np
+
 from artiq.wavesynth import compute_samples
 
 
@@ -119,9 +122,75 @@ class TestSynthesizer(unittest.TestCase):
     def test_run(self):
         x, y = self.drive()
 
+    def test_scalar(self):
+        x, y = self.drive()
+        self.dev = compute_samples.ScalarSynthesizer(1, self.program)
+        x, y_scalar = self.drive()
+        np.testing.assert_allclose(y, y_scalar, rtol=0, atol=1e-9)
+
     @unittest.skip("manual/visual test")
     def test_plot(self):
         from matplotlib import pyplot as plt
         x, y = self.drive()
         plt.plot(x, y)
         plt.show()
+
+
+def make_program(duration):
+    # two channels, bias and DDS, with a silenced line and an empty one
+    def line(trigger, duration, silence=False):
+        return {
+            "dac_divider": 1,
+            "duration": duration,
+            "channel_data": [
+                {"bias": {"amplitude": [0.5, 1e-4, -2e-8, 1e-12]},
+                 "dds": {"amplitude": [1.0, 0.0, 1e-7],
+                         "phase": [0.25, 0.01, 1e-6, -1e-11],
+                         "clear": trigger}},
+                {"bias": {"amplitude": [-0.2]},
+                 "silence": silence,
+                 "dds": {"amplitude": [0.3, -1e-5],
+                         "phase": [0.0, 0.123]}},
+            ],
+            "trigger": trigger
+        }
+    return [[line(True, duration), line(False, duration, silence=True),
+             line(False, 0), line(False, duration // 3),
+             line(True, duration)]]
+
+
+class TestVectorizedSynthesizer(unittest.TestCase):
+    def run_program(self, cls, program, nchannels=2):
+        dev = cls(nchannels, program)
+        dev.select(0)
+        y = dev.trigger()
+        y = [a + b for a, b in zip(y, dev.trigger())]
+        return np.array(y)
+
+    def test_scalar(self):
+        program = make_program(3000)
+        y = self.run_program(compute_samples.Synthesizer, program)
+        y_scalar = self.run_program(compute_samples.ScalarSynthesizer,
+                                    program)
+        self.assertEqual(y.shape, (2, 10000))
+        np.testing.assert_allclose(y, y_scalar, rtol=0, atol=1e-9)
+        # silenced channel holds its last value
+        np.testing.assert_equal(y[1, 3000:6000], y[1, 2999])
+
+    def test_errors(self):
+        dev = compute_samples.Synthesizer(2, make_program(10))
+        with self.assertRaises(compute_samples.TriggerError):
+            dev.trigger()
+        dev.select(0)
+        with self.assertRaises(compute_samples.TriggerError):
+            dev.select(0)
+
+    @unittest.skip("manual benchmark")
+    def test_benchmark(self):
+        program = make_program(100000)
+        for cls in (compute_samples.ScalarSynthesizer,
+                    compute_samples.Synthesizer):
+            t0 = time.monotonic()
+            self.run_program(cls, program)
+            print("{}: {:.3f} s".format(cls.__name__,
+                                        time.monotonic() - t0))
@@ -11,7 +11,7 @@ import numpy as np
 
 from artiq.language.environment import is_experiment
 from artiq.protocols import pyon
-from artiq.appdirs import user_config_dir
+from artiq.appdirs import user_config_dir, user_cache_dir
 from artiq import __version__ as artiq_version
 
 
@@ -20,7 +20,7 @@ __all__ = ["parse_arguments", "elide", "short_format", "file_import",
            "multiline_log_config", "init_logger", "bind_address_from_args",
            "atexit_register_coroutine", "exc_to_warning",
            "asyncio_wait_or_cancel", "TaskObject", "Condition",
-           "get_windows_drives", "get_user_config_dir"]
+           "get_windows_drives", "get_user_config_dir", "get_user_cache_dir"]
 
 
 logger = logging.getLogger(__name__)
@@ -253,3 +253,10 @@ def get_user_config_dir():
     dir = user_config_dir("artiq", "m-labs", major)
     os.makedirs(dir, exist_ok=True)
     return dir
+
+
+def get_user_cache_dir():
+    major = artiq_version.split(".")[0]
+    dir = user_cache_dir("artiq", "m-labs", major)
+    os.makedirs(dir, exist_ok=True)
+    return dir
@@ -1,7 +1,7 @@
 # Copyright (C) 2014, 2015 Robert Jordens <jordens@gmail.com>
 
 import numpy as np
-from scipy.interpolate import splrep, splev, spalde
+from scipy.interpolate import splrep, splev, spalde, PPoly
 
 
 class UnivariateMultiSpline:
@@ -16,12 +16,13 @@ class UnivariateMultiSpline:
             if x0 is not None:
                 yi = self.upsample_knots(x0[i], yi, x)
             self.s.append(splrep(x, yi, k=order - 1, **kwargs))
+        self._derivatives = None
 
     def upsample_knots(self, x0, y0, x):
         return splev(x, splrep(x0, y0, k=self.order - 1))
 
     def lev(self, x, *a, **k):
-        return np.array([splev(x, si) for si in self.s])
+        return np.array([splev(x, si, *a, **k) for si in self.s])
 
     def alde(self, x):
         u = np.array([spalde(x, si) for si in self.s])
@@ -29,12 +30,25 @@ class UnivariateMultiSpline:
             u = u[:, None, :]
         return u
 
+    def derivatives(self, x):
+        """Evaluate all derivatives of all splines at `x`.
+
+        The splines are converted once to piecewise polynomials and their
+        derivatives, which are kept for later calls.
+        """
+        if self._derivatives is None:
+            self._derivatives = []
+            for si in self.s:
+                pp = PPoly.from_spline(si)
+                self._derivatives.append(
+                    [pp] + [pp.derivative(i) for i in range(1, self.order)])
+        u = np.array([[di(x) for di in d] for d in self._derivatives])
+        return u.transpose(1, 0, 2)
+
     def __call__(self, x, use_alde=True):
         if use_alde:
-            u = self.alde(x)[:, :, :self.order]
-            s = (len(self.s), len(x), self.order)
-            assert u.shape == s, (u.shape, s)
-            return u.transpose(2, 0, 1)
+            # same values as alde(), evaluated in bulk
+            return self.derivatives(x)
         else:
             return np.array([self.lev(x, der=i) for i in range(self.order)])
 
@@ -65,18 +79,29 @@ def build_segment(durations, coefficients, target="bias",
     :param variable: The variable within the target component.
     :param compress: If `True`, skip zero high order coefficients.
     """
-    for dxi, yi in zip(durations, coefficients.transpose()):
-        cd = []
-        for yij in yi:
-            cdj = []
-            for yijk in reversed(yij):
-                if cdj or abs(yijk) or not compress:
-                    cdj.append(float(yijk))
-            cdj.reverse()
-            if not cdj:
-                cdj.append(float(yij[0]))
-            cd.append({target: {variable: cdj}})
-        yield {"duration": int(dxi), "channel_data": cd}
+    lengths = coefficient_lengths(coefficients, compress).T.tolist()
+    durations = np.asanyarray(durations).astype(int).tolist()
+    coefficients = coefficients.transpose().tolist()
+    for dxi, yi, li in zip(durations, coefficients, lengths):
+        cd = [{target: {variable: yij[:lij]}} for yij, lij in zip(yi, li)]
+        yield {"duration": dxi, "channel_data": cd}
+
+
+def coefficient_lengths(coefficients, compress=True):
+    """Number of coefficients to keep for each channel and line.
+
+    :param coefficients: 3D array with shape `(n, m, l)`, see
+        `build_segment()`.
+    :param compress: If `True`, skip zero high order coefficients, but keep
+        at least one coefficient.
+    :return: Integer array with shape `(m, l)`.
+    """
+    n = coefficients.shape[0]
+    if not compress:
+        return np.full(coefficients.shape[1:], n, int)
+    # index of the last non-zero coefficient, counted from the end
+    trailing = np.argmax(coefficients[::-1] != 0, axis=0)
+    return np.where(np.any(coefficients != 0, axis=0), n - trailing, 1)
 
 
 class CoefficientSource:
@@ -122,14 +147,14 @@ class CoefficientSource:
             with `n` being the number of channels."""
         raise NotImplementedError
 
-    def get_segment(self, start, stop, scale, *, cutoff=1e-12,
-                    target="bias", variable="amplitude"):
-        """Build wavesynth segment.
+    def get_coefficients(self, start, stop, scale, *, cutoff=1e-12):
+        """Sample the coefficients of a segment.
 
-        :param start: see `crop_x()`.
-        :param stop: see `crop_x()`.
-        :param scale: see `scale_x()`.
-        :param cutoff: coefficient cutoff towards zero to compress data.
+        See `get_segment()` for arguments.
+
+        :return: `durations`, the integer line durations, and
+            `coefficients`, the array of coefficients with shape
+            `(order, n, len(durations))`, scaled to clock cycles.
         """
         x = self.crop_x(start, stop)
         x_sample, durations = self.scale_x(x, scale)
@@ -141,7 +166,20 @@ class CoefficientSource:
             coefficients.shape[0])[:, None, None]
         if cutoff:
             coefficients[np.fabs(coefficients) < cutoff] = 0
-        return build_segment(np.fabs(durations), coefficients, target=target,
+        return np.fabs(durations), coefficients
+
+    def get_segment(self, start, stop, scale, *, cutoff=1e-12,
+                    target="bias", variable="amplitude"):
+        """Build wavesynth segment.
+
+        :param start: see `crop_x()`.
+        :param stop: see `crop_x()`.
+        :param scale: see `scale_x()`.
+        :param cutoff: coefficient cutoff towards zero to compress data.
+        """
+        durations, coefficients = self.get_coefficients(
+            start, stop, scale, cutoff=cutoff)
+        return build_segment(durations, coefficients, target=target,
                              variable=variable)
 
     def extend_segment(self, segment, *args, **kwargs):
@@ -172,6 +210,7 @@ class SplineSource(CoefficientSource):
 
         assert self.y.shape[1] == self.x.shape[0]
         self.spline = UnivariateMultiSpline(self.x, self.y, order=order)
+        self._coefficients = {}
 
     def crop_x(self, start, stop):
         ia, ib = np.searchsorted(self.x, (start, stop))
@@ -214,6 +253,20 @@ class SplineSource(CoefficientSource):
     def __call__(self, x):
         return self.spline(x)
 
+    def get_coefficients(self, start, stop, scale, *, cutoff=1e-12):
+        # Segments are often requested repeatedly, e.g. when the same
+        # waveform is played in several frames.
+        key = start, stop, scale, cutoff
+        if key not in self._coefficients:
+            if len(self._coefficients) >= 64:
+                self._coefficients.pop(next(iter(self._coefficients)))
+            durations, coefficients = CoefficientSource.get_coefficients(
+                self, start, stop, scale, cutoff=cutoff)
+            durations.flags.writeable = False
+            coefficients.flags.writeable = False
+            self._coefficients[key] = durations, coefficients
+        return self._coefficients[key]
+
 
 def discrete_compensate(c):
     """Compensate spline coefficients for discrete accumulators
@@ -4,6 +4,8 @@
 from copy import copy
 from math import cos, pi
 
+import numpy as np
+
 from artiq.wavesynth.coefficients import discrete_compensate
 
 
@@ -78,9 +80,8 @@ class TriggerError(Exception):
     pass
 
 
-class Synthesizer:
-    def __init__(self, nchannels, program):
-        self.channels = [Channel() for _ in range(nchannels)]
+class _Sequencer:
+    def __init__(self, program):
         self.program = program
         # line_iter is None: "wait for segment selection" state
         # otherwise: iterator on the current position in the frame
@@ -92,7 +93,9 @@ class Synthesizer:
         self.line_iter = iter(self.program[selection])
         self.line = next(self.line_iter)
 
-    def trigger(self):
+    def _run(self, process_line):
+        # Passes the lines up to the next triggered one, or to the end of
+        # the frame, to process_line.
         if self.line_iter is None:
             raise TriggerError("no frame selected")
 
@@ -100,34 +103,167 @@ class Synthesizer:
         if not line.get("trigger", False):
             raise TriggerError("segment is not triggered")
 
-        r = [[] for _ in self.channels]
         while True:
-            for channel, channel_data in zip(self.channels,
-                                             line["channel_data"]):
-                channel.set_silence(channel_data.get("silence", False))
-                if "bias" in channel_data:
-                    channel.bias.set_coefficients(
-                        channel_data["bias"]["amplitude"])
-                if "dds" in channel_data:
-                    channel.dds.amplitude.set_coefficients(
-                        channel_data["dds"]["amplitude"])
-                    if "phase" in channel_data["dds"]:
-                        channel.dds.phase.set_coefficients(
-                            channel_data["dds"]["phase"])
-                    if channel_data["dds"].get("clear", False):
-                        channel.dds.phase.clear()
-
             if line.get("dac_divider", 1) != 1:
                 raise NotImplementedError
-
-            for channel, rc in zip(self.channels, r):
-                for i in range(line["duration"]):
-                    rc.append(channel.next())
+            process_line(line)
 
             try:
                 self.line = line = next(self.line_iter)
                 if line.get("trigger", False):
-                    return r
+                    return
             except StopIteration:
                 self.line_iter = None
-                return r
+                return
+
+
+class ScalarSynthesizer(_Sequencer):
+    """Computes the samples of a program one by one, as the hardware does.
+    Reference for :class:`Synthesizer`."""
+    def __init__(self, nchannels, program):
+        _Sequencer.__init__(self, program)
+        self.channels = [Channel() for _ in range(nchannels)]
+
+    def _process_line(self, line, r):
+        for channel, channel_data in zip(self.channels,
+                                         line["channel_data"]):
+            channel.set_silence(channel_data.get("silence", False))
+            if "bias" in channel_data:
+                channel.bias.set_coefficients(
+                    channel_data["bias"]["amplitude"])
+            if "dds" in channel_data:
+                channel.dds.amplitude.set_coefficients(
+                    channel_data["dds"]["amplitude"])
+                if "phase" in channel_data["dds"]:
+                    channel.dds.phase.set_coefficients(
+                        channel_data["dds"]["phase"])
+                if channel_data["dds"].get("clear", False):
+                    channel.dds.phase.clear()
+
+        for channel, rc in zip(self.channels, r):
+            for i in range(line["duration"]):
+                rc.append(channel.next())
+
+    def trigger(self):
+        r = [[] for _ in self.channels]
+        self._run(lambda line: self._process_line(line, r))
+        return r
+
+
+class _Splines:
+    # Discrete spline accumulators (as Spline, or as SplinePhase if
+    # phase is True) of several channels, advanced by whole lines.
+    #
+    # Accumulator i evolves as c[i](n+1) = c[i](n) + c[i+1](n), i.e. it
+    # is the cumulative sum of accumulator i+1, starting at c[i](0).
+    # np.cumsum() adds sequentially, so this gives the same values as
+    # advancing the accumulators sample by sample.
+    def __init__(self, nchannels, phase=False):
+        self.c = np.zeros((nchannels, 4))
+        # number of coefficients of each channel
+        self.order = np.ones(nchannels, np.int64)
+        self.phase = phase
+        self.c0 = np.zeros(nchannels)
+
+    def _set_row(self, channel, start, c):
+        if start + len(c) > self.c.shape[1]:
+            self.c = np.pad(
+                self.c, [(0, 0), (0, start + len(c) - self.c.shape[1])],
+                "constant")
+        self.c[channel, start:] = 0.
+        self.c[channel, start:start + len(c)] = c
+        self.order[channel] = start + len(c)
+
+    def set_coefficients(self, channel, c):
+        if not c:
+            c = [0.]
+        if self.phase:
+            self.c0[channel] = c[0]
+            c1p = list(c[1:])
+            discrete_compensate(c1p)
+            self._set_row(channel, 1, c1p)
+        else:
+            c = list(c)
+            discrete_compensate(c)
+            self._set_row(channel, 0, c)
+
+    def clear(self, channel):
+        self.c[channel, 0] = 0.0
+
+    def _accumulate_mod1(self, acc, block=1024):
+        # Cumulative sums modulo 1, wrapped every block samples to keep
+        # the rounding errors small.
+        for i in range(1, acc.shape[1], block):
+            j = min(i + block, acc.shape[1])
+            acc[:, i - 1:j] = np.cumsum(acc[:, i - 1:j], axis=1) % 1.0
+
+    def advance(self, duration):
+        """Returns the values of accumulator 0 over the next ``duration``
+        samples, shape ``(nchannels, duration)``."""
+        nchannels, width = self.c.shape
+        higher = np.zeros((nchannels, duration))
+        for i in reversed(range(width)):
+            acc = np.empty((nchannels, duration + 1))
+            acc[:, 0] = self.c[:, i]
+            acc[:, 1:] = higher
+            wrap = self.phase & (i < self.order - 1)
+            if np.any(wrap):
+                acc[~wrap] = np.cumsum(acc[~wrap], axis=1)
+                rows = acc[wrap]
+                self._accumulate_mod1(rows)
+                acc[wrap] = rows
+            else:
+                np.cumsum(acc, axis=1, out=acc)
+            self.c[:, i] = acc[:, duration]
+            higher = acc[:, :duration]
+        if self.phase:
+            return higher + self.c0[:, None]
+        return higher
+
+
+class Synthesizer(_Sequencer):
+    """Computes the samples of a program, for all channels and whole lines
+    at once. Gives the same samples as :class:`ScalarSynthesizer` (up to
+    rounding of the phase)."""
+    def __init__(self, nchannels, program):
+        _Sequencer.__init__(self, program)
+        self.nchannels = nchannels
+        self.bias = _Splines(nchannels)
+        self.amplitude = _Splines(nchannels)
+        self.phase = _Splines(nchannels, phase=True)
+        self.silence = np.zeros(nchannels, bool)
+        self.v = np.zeros(nchannels)
+
+    def _process_line(self, line):
+        for channel, channel_data in enumerate(line["channel_data"]):
+            self.silence[channel] = channel_data.get("silence", False)
+            if "bias" in channel_data:
+                self.bias.set_coefficients(
+                    channel, channel_data["bias"]["amplitude"])
+            if "dds" in channel_data:
+                self.amplitude.set_coefficients(
+                    channel, channel_data["dds"]["amplitude"])
+                if "phase" in channel_data["dds"]:
+                    self.phase.set_coefficients(
+                        channel, channel_data["dds"]["phase"])
+                if channel_data["dds"].get("clear", False):
+                    self.phase.clear(channel)
+
+        duration = line["duration"]
+        v = (self.bias.advance(duration) +
+             self.amplitude.advance(duration)*np.cos(
+                 2*np.pi*self.phase.advance(duration)))
+        v[self.silence] = self.v[self.silence, None]
+        if duration:
+            self.v = v[:, -1].copy()
+        return v
+
+    def trigger_array(self):
+        """Returns the samples up to the next trigger as an array of shape
+        ``(nchannels, nsamples)``."""
+        r = []
+        self._run(lambda line: r.append(self._process_line(line)))
+        return np.concatenate(r, axis=1)
+
+    def trigger(self):
+        return self.trigger_array().tolist()
@@ -28,6 +28,7 @@ console_scripts = [
     "artiq_pcap = artiq.frontend.artiq_pcap:main",
     "artiq_influxdb = artiq.frontend.artiq_influxdb:main",
     "artiq_master = artiq.frontend.artiq_master:main",
+    "artiq_results_index = artiq.frontend.artiq_results_index:main",
     "artiq_mkfs = artiq.frontend.artiq_mkfs:main",
     "artiq_session = artiq.frontend.artiq_session:main",
     "artiq_rpctool = artiq.frontend.artiq_rpctool:main",
@@ -35,8 +36,10 @@ console_scripts = [
     "artiq_flash = artiq.frontend.artiq_flash:main",
 
     "aqctl_corelog = artiq.frontend.aqctl_corelog:main",
+    "aqctl_coreanalyzer = artiq.frontend.aqctl_coreanalyzer:main",
     "aqctl_korad_ka3005p = artiq.frontend.aqctl_korad_ka3005p:main",
     "aqctl_lda = artiq.frontend.aqctl_lda:main",
+    "aqctl_moninj_proxy = artiq.frontend.aqctl_moninj_proxy:main",
     "aqctl_novatech409b = artiq.frontend.aqctl_novatech409b:main",
     "aqctl_thorlabs_tcube = artiq.frontend.aqctl_thorlabs_tcube:main",
 ]